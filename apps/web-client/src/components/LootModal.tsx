@@ -40,9 +40,9 @@ export default function LootModal({ isOpen, items, onClaim }: LootModalProps) {
                                 >
                                     {/* Visual Vault Asset (Placeholder/Real) */}
                                     <div className="w-16 h-16 rounded bg-[#0a0a0a] border border-[#2a2a2d] flex items-center justify-center overflow-hidden">
-                                        {(item.stats as any).visual_asset_url ? (
+                                        {item.visual_asset_url ? (
                                             <img
-                                                src={(item.stats as any).visual_asset_url}
+                                                src={item.visual_asset_url}
                                                 alt={item.name}
                                                 className="w-full h-full object-cover"
                                             />
@@ -11,6 +11,7 @@ interface PaperDollProps {
     onEquip: (itemId: string, slot: string) => void;
     onUnequip: (itemId: string) => void;
     onMoveInBackpack?: (itemId: string, newIndex: number) => void;
+    onInspect?: (itemId: string) => void;
 }
 
 const EQUIPMENT_SLOTS = [
@@ -25,6 +26,12 @@ const EQUIPMENT_SLOTS = [
     { id: "ring_2", label: "Ring II", position: "col-start-3 row-start-4 justify-self-start" },
 ] as const;
 
+// Fallback glyphs keyed on the slim projection's slot_type (no SRD stats needed)
+const SLOT_GLYPHS: Record<string, string> = {
+    head: "🪖", torso: "🥋", neck: "📿", waist: "🎗️", main_hand: "🗡️",
+    off_hand: "🛡️", ring_1: "💍", ring_2: "💍", feet: "🥾",
+};
+
 // ─── Rarity border colour ─────────────────────────────────────────────────────
 function getRarityBorder(rarity = "Common") {
     switch (rarity.toLowerCase()) {
@@ -37,7 +44,7 @@ function getRarityBorder(rarity = "Common") {
 }
 
 // ─── DraggableItem ────────────────────────────────────────────────────────────
-function DraggableItem({ item }: { item: InventoryItem }) {
+function DraggableItem({ item, onInspect }: { item: InventoryItem; onInspect?: (itemId: string) => void }) {
     const { attributes, listeners, setNodeRef, transform, isDragging } = useDraggable({
         id: item.instance_id,
         data: item,
@@ -47,13 +54,19 @@ function DraggableItem({ item }: { item: InventoryItem }) {
         ? { transform: `translate3d(${transform.x}px,${transform.y}px,0)`, zIndex: 100 }
         : undefined;
 
+    // Full stats are not part of INVENTORY_UPDATE; ask for them the first time the item is looked at
+    const handleInspect = () => {
+        if (onInspect && Object.keys(item.stats ?? {}).length === 0) onInspect(item.instance_id);
+    };
+
     return (
         <div
             ref={setNodeRef}
             style={style}
             {...listeners}
             {...attributes}
-            title={item.name}
+            onMouseEnter={handleInspect}
+            title={item.rarity ? `${item.name} (${item.rarity})` : item.name}
             className={`
                 relative w-full h-full flex items-center justify-center
                 bg-[#0f0a0a] border cursor-grab active:cursor-grabbing
@@ -71,7 +84,7 @@ function DraggableItem({ item }: { item: InventoryItem }) {
                 />
             ) : (
                 <span className="text-xl drop-shadow-md select-none">
-                    {((item.stats as Record<string, unknown>)?.visual_emoji as string) || "📦"}
+                    {(item.slot_type && SLOT_GLYPHS[item.slot_type]) || "📦"}
                 </span>
             )}
             {item.attunement && (
@@ -82,7 +95,7 @@ function DraggableItem({ item }: { item: InventoryItem }) {
 }
 
 // ─── Equipment Slot ───────────────────────────────────────────────────────────
-function Slot({ id, label, item }: { id: string; label: string; item?: InventoryItem }) {
+function Slot({ id, label, item, onInspect }: { id: string; label: string; item?: InventoryItem; onInspect?: (itemId: string) => void }) {
     const { setNodeRef, isOver } = useDroppable({
         id,
         data: { type: "slot", slot_type: id },
@@ -102,7 +115,7 @@ function Slot({ id, label, item }: { id: string; label: string; item?: Inventory
                 `}
             >
                 {item
-                    ? <DraggableItem item={item} />
+                    ? <DraggableItem item={item} onInspect={onInspect} />
                     : <span className="absolute inset-0 flex items-center justify-center text-[#39282b] text-xs select-none">·</span>
                 }
             </div>
@@ -112,7 +125,7 @@ function Slot({ id, label, item }: { id: string; label: string; item?: Inventory
 }
 
 // ─── Backpack Cell ────────────────────────────────────────────────────────────
-function BackpackSlot({ index, item }: { index: number; item?: InventoryItem }) {
+function BackpackSlot({ index, item, onInspect }: { index: number; item?: InventoryItem; onInspect?: (itemId: string) => void }) {
     const { setNodeRef, isOver } = useDroppable({
         id: `backpack-${index}`,
         data: { type: "backpack", index },
@@ -133,7 +146,7 @@ function BackpackSlot({ index, item }: { index: number; item?: InventoryItem })
             `}
         >
             {item
-                ? <DraggableItem item={item} />
+                ? <DraggableItem item={item} onInspect={onInspect} />
                 : <span className="absolute inset-0 flex items-center justify-center text-[9px] text-[#2a1e20] select-none font-mono">{index + 1}</span>
             }
         </div>
@@ -222,7 +235,7 @@ function VitalsPanel({ character, lastFactPacket }: { character?: Combatant; las
 }
 
 // ─── PaperDoll (root export) ──────────────────────────────────────────────────
-export default function PaperDoll({ inventory, character, lastFactPacket, onEquip, onUnequip }: PaperDollProps) {
+export default function PaperDoll({ inventory, character, lastFactPacket, onEquip, onUnequip, onInspect }: PaperDollProps) {
     const equipped = inventory.filter((i) => i.location === "EQUIPPED");
     const backpack = inventory.filter((i) => i.location === "BACKPACK");
 
@@ -267,7 +280,7 @@ export default function PaperDoll({ inventory, character, lastFactPacket, onEqui
 
                         {EQUIPMENT_SLOTS.map(({ id, label, position }) => (
                             <div key={id} className={`z-10 ${position}`}>
-                                <Slot id={id} label={label} item={equipped.find((i) => i.slot_type === id)} />
+                                <Slot id={id} label={label} item={equipped.find((i) => i.slot_type === id)} onInspect={onInspect} />
                             </div>
                         ))}
                     </div>
@@ -285,6 +298,7 @@ export default function PaperDoll({ inventory, character, lastFactPacket, onEqui
                                 key={i}
                                 index={i}
                                 item={backpack.find((item) => item.grid_index === i) ?? backpack[i]}
+                                onInspect={onInspect}
                             />
                         ))}
                     </div>
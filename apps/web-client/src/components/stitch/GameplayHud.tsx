@@ -1,9 +1,10 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useAgentState } from '../../hooks/useAgentState';
 import { QuestJournal } from './QuestJournal';
 import { Spellbook } from './Spellbook';
 import { InventoryForge } from './InventoryForge';
 import PaperDoll from '../PaperDoll';
+import HexMap from '../HexMap';
 import WorldMap from '../../app/WorldMap';
 import InitiativeSidebar from '../InitiativeSidebar';
 import LootModal from '../../app/LootModal';
@@ -35,6 +36,10 @@ export function GameplayHud({ onAction, onSendMessage, onLevelUp }: GameplayHudP
         inventory,
         equipItem,
         unequipItem,
+        requestInventory,
+        getItemDetails,
+        moveTo,
+        connected,
         lastFactPacket,
         activeWidgets,
         gold,
@@ -44,6 +49,15 @@ export function GameplayHud({ onAction, onSendMessage, onLevelUp }: GameplayHudP
     const [activeTab, setActiveTab] = useState<GameTab>('historia');
 
     const player = combatants.find((c: any) => c.isPlayer) || null;
+    // An encounter is running once the server marks whose turn it is
+    const inCombat = combatants.some((c: any) => c.current);
+
+    // Refresh on opening an inventory tab; the server answers INVENTORY_UNCHANGED if we are current
+    useEffect(() => {
+        if (connected && (activeTab === 'personaje' || activeTab === 'inventario')) {
+            requestInventory();
+        }
+    }, [connected, activeTab, requestInventory]);
 
     const handleSend = () => {
         if (inputText.trim()) {
@@ -169,6 +183,7 @@ export function GameplayHud({ onAction, onSendMessage, onLevelUp }: GameplayHudP
                             lastFactPacket={lastFactPacket}
                             onEquip={equipItem}
                             onUnequip={unequipItem}
+                            onInspect={getItemDetails}
                         />
                     </div>
                 )}
@@ -197,7 +212,16 @@ export function GameplayHud({ onAction, onSendMessage, onLevelUp }: GameplayHudP
                 {/* Mapa */}
                 {activeTab === 'mapa' && (
                     <div className="flex-1 h-full overflow-hidden">
-                        <WorldMap />
+                        {inCombat ? (
+                            <HexMap
+                                mode="combat"
+                                combatants={combatants}
+                                selectedCell={player?.position ?? null}
+                                onCellClick={moveTo}
+                            />
+                        ) : (
+                            <WorldMap />
+                        )}
                     </div>
                 )}
             </main>
@@ -9,7 +9,7 @@ export interface SpellbookProps {
 export function Spellbook({
     onNavigate
 }: SpellbookProps) {
-    const { spells, castSpell } = useAgentState() as any;
+    const { spells, castSpell, selectedTargetId } = useAgentState() as any;
     const [activeCircle, setActiveCircle] = useState(0); // 0 for Cantrips
     const [selectedSpellId, setSelectedSpellId] = useState<string | null>(null);
 
@@ -221,7 +221,7 @@ export function Spellbook({
                         {/* Cast Button */}
                         <div className="flex justify-end mt-4 shrink-0">
                             <button
-                                onClick={() => selectedSpell && castSpell("enemy", selectedSpell.id)}
+                                onClick={() => selectedSpell && castSpell(selectedTargetId ?? "enemy", selectedSpell.id)}
                                 className="relative group cursor-pointer overflow-hidden rounded-full p-[2px] focus:outline-none focus:ring-2 focus:ring-primary focus:ring-offset-2 focus:ring-offset-[#e3dac9]"
                             >
                                 <span className="absolute inset-[-1000%] animate-[spin_2s_linear_infinite] bg-[conic-gradient(from_90deg_at_50%_50%,#E2CBFF_0%,#393BB2_50%,#E2CBFF_100%)] opacity-0 group-hover:opacity-100 transition-opacity duration-300"></span>
@@ -1,4 +1,4 @@
-import { GameState, AgUiEvent, NarrativeChunk, NarrativeEvent, StatePatch, ShowWidget, SpellBookUpdate, DiceResult, InitiativeUpdate, InventoryUpdate, LogEvent, MapDataEvent, MonsterSearchEvent, GoldUpdate, ShopInventory } from "./useAgentState";
+import { GameState, AgUiEvent, NarrativeChunk, NarrativeEvent, StatePatch, ShowWidget, SpellBookUpdate, DiceResult, InitiativeUpdate, InventoryUpdate, ItemDetails, AssetReady, LogEvent, MapDataEvent, MonsterSearchEvent, GoldUpdate, ShopInventory } from "./useAgentState";
 import { asCombatantId } from "../domain/types";
 import { spawnFloatingText } from "../components/FloatingTextLayer";
 
@@ -154,13 +154,44 @@ const initiativeUpdateHandler: MessageHandler = (data: InitiativeUpdate) => (pre
     currentRound: data.round || prev.currentRound,
 });
 
+// Slim items arrive with empty stats: keep details already fetched for the same instance
 const inventoryUpdateHandler: MessageHandler = (data: InventoryUpdate) => (prev) => ({
     ...prev,
-    inventory: data.items,
+    inventory: data.items.map(item => {
+        if (Object.keys(item.stats ?? {}).length > 0) return item;
+        const known = prev.inventory.find(i => i.instance_id === item.instance_id);
+        return known ? { ...item, stats: known.stats } : item;
+    }),
+    inventoryVersion: data.version ?? prev.inventoryVersion,
+});
+
+// Server confirmed our known_version is current: nothing to re-render
+const inventoryUnchangedHandler: MessageHandler = () => (state) => state;
+
+const itemDetailsHandler: MessageHandler = (data: ItemDetails) => (prev) => ({
+    ...prev,
+    inventory: prev.inventory.map(item =>
+        item.instance_id === data.item.instance_id
+            ? { ...item, stats: data.item.stats }
+            : item
+    ),
+});
+
+const assetReadyHandler: MessageHandler = (data: AssetReady) => (prev) => ({
+    ...prev,
+    inventory: prev.inventory.map(item =>
+        item.instance_id === data.instance_id
+            ? { ...item, visual_asset_url: data.visual_asset_url }
+            : item
+    ),
 });
 
 const mapUpdateHandler: MessageHandler = (data: any) => (prev) => ({
     ...prev,
+    // Grid moves only arrive here; keep the mover's token in step until the next INITIATIVE_UPDATE
+    combatants: data.interaction_type === "move"
+        ? prev.combatants.map(c => c.id === data.character_id ? { ...c, position: data.cell_id } : c)
+        : prev.combatants,
     mapState: {
         ...prev.mapState,
         currentNodeId: data.node_id || prev.mapState.currentNodeId,
@@ -205,14 +236,19 @@ const monsterSearchResultsHandler: MessageHandler = (data: MonsterSearchEvent) =
     monsterSearchResults: data.results,
 });
 
-const goldUpdateHandler: MessageHandler = (data: GoldUpdate) => (prev) => ({
-    ...prev,
-    gold: data.gold,
-    toasts: [
-        ...prev.toasts,
-        { type: "LOG", message: `+${data.delta} gp (total: ${data.gold} gp)`, level: "info" } as LogEvent,
-    ],
-});
+const goldUpdateHandler: MessageHandler = (data: GoldUpdate) => (prev) => {
+    // Party splits report every member's wallet; only ours drives the gold display
+    const mine = prev.myCharacterId ?? prev.combatants.find(c => c.isPlayer)?.id;
+    if (mine && data.character_id !== mine) return prev;
+    return {
+        ...prev,
+        gold: data.gold,
+        toasts: [
+            ...prev.toasts,
+            { type: "LOG", message: `+${data.delta} gp (total: ${data.gold} gp)`, level: "info" } as LogEvent,
+        ],
+    };
+};
 
 const shopInventoryHandler: MessageHandler = (data: ShopInventory) => (prev) => ({
     ...prev,
@@ -238,6 +274,9 @@ const handlers: Record<string, MessageHandler> = {
     DICE_RESULT: diceResultHandler,
     INITIATIVE_UPDATE: initiativeUpdateHandler,
     INVENTORY_UPDATE: inventoryUpdateHandler,
+    INVENTORY_UNCHANGED: inventoryUnchangedHandler,
+    ITEM_DETAILS: itemDetailsHandler,
+    ASSET_READY: assetReadyHandler,
     MAP_UPDATE: mapUpdateHandler,
     MAP_DATA: mapDataHandler,
     SAVE_LIST: saveListHandler,
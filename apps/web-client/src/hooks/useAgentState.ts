@@ -95,6 +95,7 @@ export interface Spell {
     damage_dice_count: number;
     damage_type: string;
     aoe_radius: number;
+    aoe_shape?: string;
     // Localization
     name_es?: string;
     description_es?: string;
@@ -124,6 +125,21 @@ export interface InventoryUpdate {
     type: "INVENTORY_UPDATE";
     character_id: CharacterId;
     items: InventoryItem[];
+    version?: number;
+}
+
+/** Full SRD stats for one item; INVENTORY_UPDATE items carry empty `stats`. */
+export interface ItemDetails {
+    type: "ITEM_DETAILS";
+    item: InventoryItem;
+}
+
+export interface AssetReady {
+    type: "ASSET_READY";
+    character_id: CharacterId;
+    instance_id: string;
+    template_id: string;
+    visual_asset_url: string;
 }
 
 export interface SpellBookUpdate {
@@ -212,6 +228,7 @@ export interface GameState {
     combatants: Combatant[];
     currentRound: number;
     inventory: InventoryItem[];
+    inventoryVersion: number;
     spells: Spell[];
     monsterSearchResults: MonsterSearchResult[];
     activeWidgets: ShowWidget[];
@@ -247,6 +264,7 @@ export function useAgentState(wsUrl?: string) {
         combatants: [],
         currentRound: 0,
         inventory: [],
+        inventoryVersion: 0,
         spells: [],
         monsterSearchResults: [],
         activeWidgets: [],
@@ -284,6 +302,8 @@ export function useAgentState(wsUrl?: string) {
     const reconnectAttemptsRef = useRef<number>(0);
     const sessionIdRef = useRef<string>("default");
     const roleRef = useRef<string>("player");
+    const inventoryVersionRef = useRef<number>(0);
+    inventoryVersionRef.current = gameState.inventoryVersion;
 
     const onConnectionEstablished = useCallback((event: AgUiEvent) => {
         reconnectAttemptsRef.current = 0;
@@ -415,17 +435,27 @@ export function useAgentState(wsUrl?: string) {
 
     const triggerMapCapture = useCallback(async (nodeId: string) => {
         try {
-            const response = await fetch(`/api/world/map/capture/${nodeId}`, {
+            // Fogged with what the party has explored, not the DM's world view
+            const params = new URLSearchParams({ character_id: getMyCharacterId(), party: "true" });
+            const response = await fetch(`/api/world/map/capture/${nodeId}?${params}`, {
                 method: "POST"
             });
             if (!response.ok) throw new Error("Capture failed");
-            const data = await response.json();
+            let data = await response.json();
+            // Uncached captures run as a background job; poll until it settles
+            while (data.status === "queued" || data.status === "running") {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                const poll = await fetch(`/api/world/map/capture/jobs/${data.job_id}`);
+                if (!poll.ok) throw new Error("Capture job lost");
+                data = await poll.json();
+            }
+            if (data.status !== "done") throw new Error(data.error || "Capture failed");
             return data.image_url;
         } catch (error) {
             console.error("Map capture error:", error);
             return null;
         }
-    }, []);
+    }, [getMyCharacterId]);
 
     const clearScreenShake = useCallback(() => {
         setGameState((prev) => ({ ...prev, screenShake: false }));
@@ -448,6 +478,23 @@ export function useAgentState(wsUrl?: string) {
         }));
     }, [getMyCharacterId]);
 
+    // Sends the last seen version so an unchanged inventory costs one small frame
+    const requestInventory = useCallback(() => {
+        wsRef.current?.send(JSON.stringify({
+            action: "get_inventory",
+            character_id: getMyCharacterId(),
+            known_version: inventoryVersionRef.current || undefined,
+        }));
+    }, [getMyCharacterId]);
+
+    // INVENTORY_UPDATE carries a slim projection; full SRD stats are fetched per item
+    const getItemDetails = useCallback((itemId: string) => {
+        wsRef.current?.send(JSON.stringify({
+            action: "get_item_details",
+            item_id: itemId
+        }));
+    }, []);
+
     const openShop = useCallback((nodeId: string) => {
         wsRef.current?.send(JSON.stringify({
             action: "get_shop",
@@ -472,14 +519,27 @@ export function useAgentState(wsUrl?: string) {
         wsRef.current?.send(JSON.stringify(payload));
     }, [getMyCharacterId]);
 
-    const castSpell = useCallback((targetId: string, spellId: string) => {
+    // Battle grid move; the server checks reach against speed, terrain and hostiles
+    const moveTo = useCallback((cellId: number) => {
+        wsRef.current?.send(JSON.stringify({
+            action: "map_interaction",
+            character_id: getMyCharacterId(),
+            interaction_type: "move",
+            cell_id: cellId
+        }));
+    }, [getMyCharacterId]);
+
+    // AoE spells are aimed at a grid square: the target's own unless one is given
+    const castSpell = useCallback((targetId: string, spellId: string, targetCell?: number) => {
+        const cell = targetCell ?? gameState.combatants.find(c => c.id === targetId)?.position;
         wsRef.current?.send(JSON.stringify({
             action: "cast_spell",
             attacker_id: getMyCharacterId(),
             target_id: targetId,
+            target_cell: typeof cell === "number" ? cell : undefined,
             spell_id: spellId
         }));
-    }, [getMyCharacterId]);
+    }, [getMyCharacterId, gameState.combatants]);
 
     return {
         ...gameState,
@@ -494,8 +554,11 @@ export function useAgentState(wsUrl?: string) {
         clearScreenShake,
         equipItem,
         unequipItem,
+        requestInventory,
+        getItemDetails,
         setSelectedTarget,
         attackTarget,
+        moveTo,
         castSpell,
         openShop,
     };
@@ -8,7 +8,7 @@ Responsibility: Govern what happens when the party moves through the world.
 """
 
 import random
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from ..maps import MapNode
 from .narrative_hooks import NarrativeHooks, EncounterContext
@@ -69,6 +69,17 @@ class CartographerClient:
         chance = min(node.risk_level * 10, 80)
         return any(random.randint(1, 100) <= chance for _ in range(rolls))
 
+    def roll_route_encounters(self, legs: List[MapNode]) -> Optional[int]:
+        """
+        Encounter checks for a whole multi-hop journey in one batch.
+        Returns the index of the first leg (destination node) that triggers,
+        or None if the party arrives unmolested.
+        """
+        for i, node in enumerate(legs):
+            if self.should_trigger_encounter(node):
+                return i
+        return None
+
     # ------------------------------------------------------------------
     # FACT PACKET BUILDER
     # ------------------------------------------------------------------
@@ -78,10 +89,14 @@ class CartographerClient:
         node: MapNode,
         world_context: Optional[Dict[str, Any]] = None,
         force_encounter: bool = False,
+        check_encounter: bool = True,
+        route: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Build a Chronos-ready fact_packet for a travel event.
         Optionally injects EncounterContext if the encounter check passes.
+        Pass check_encounter=False when the roll was already made
+        (roll_route_encounters) and force_encounter carries its outcome.
         Logs the travel to MemoryKeeper session log.
         """
         biome = self.get_biome(node)
@@ -99,9 +114,11 @@ class CartographerClient:
 
         if world_context:
             packet["world_context"] = world_context
+        if route and len(route) > 2:
+            packet["route"] = route
 
         # Encounter injection
-        triggered = force_encounter or self.should_trigger_encounter(node)
+        triggered = force_encounter or (check_encounter and self.should_trigger_encounter(node))
         packet["encounter_triggered"] = triggered
         if triggered:
             ec: EncounterContext = NarrativeHooks.generate_encounter_context(biome=biome)
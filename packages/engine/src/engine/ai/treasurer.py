@@ -11,6 +11,7 @@ import random
 from typing import Dict, List, Optional, Any
 
 from ..dice import roll
+from ..loot_tables import cr_band
 
 
 # D&D 5e Individual Treasure (DMG Table, simplified)
@@ -41,16 +42,6 @@ _SHOP_RARITY_BY_TYPE: Dict[str, List[str]] = {
 }
 
 
-def _cr_band(cr: float) -> str:
-    if cr >= 17:
-        return "17+"
-    if cr >= 11:
-        return "11-16"
-    if cr >= 5:
-        return "5-10"
-    return "0-4"
-
-
 class TreasurerClient:
     """
     The Treasurer — governs the economy of the Abyss.
@@ -67,7 +58,7 @@ class TreasurerClient:
         Roll gold reward using DMG individual treasure tables.
         Returns gold pieces (int).
         """
-        band = _cr_band(cr)
+        band = cr_band(cr)
         count, sides, multiplier = _CR_GOLD_TABLE[band]
         return roll(count, sides).total * multiplier
 
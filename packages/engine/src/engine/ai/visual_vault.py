@@ -1,40 +1,141 @@
 import os
+import re
+import json
 import asyncio
+import hashlib
 import textwrap
+import threading
+from pathlib import Path
+from datetime import datetime
 from typing import Optional, Dict, Any
 from google import genai
 from .tokenomics import reporter as tokenomics_reporter
 
+# packages/engine/src/engine/ai/visual_vault.py -> repo root
+_REPO_ROOT = Path(__file__).resolve().parents[5]
+DEFAULT_OUTPUT_DIR = _REPO_ROOT / "apps" / "web-client" / "public" / "assets" / "generated"
+ASSET_URL_PREFIX = "/assets/generated"
+PLACEHOLDER_URL = "/assets/placeholder.png"
+
+
+def _normalize(text: str) -> str:
+    """Collapse case, separators and whitespace so 'Iron Sword' == 'iron_sword'."""
+    return " ".join(re.sub(r"[_\-]+", " ", text or "").lower().split())
+
+
+def is_placeholder_url(url: Optional[str]) -> bool:
+    """True for the fallback art (mock mode, failed or empty renders)."""
+    return not url or url == PLACEHOLDER_URL or url.startswith("/assets/placeholder_")
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", _normalize(text)).strip("_") or "asset"
+
+
 class VisualVaultClient:
     """
     The Visual Agent (Visual Vault).
     Responsibility: Generate consistent dark fantasy assets (icons, tokens).
     Adheres to the 'Diegetic UI' principle: Assets must feel like part of the world.
+
+    Generated images live in a content-addressed store: the key is a stable
+    hash of (item name, context, style prompt), recorded in ``index.json``
+    so repeat loot is served from disk across restarts.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, output_dir: Optional[str] = None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self.is_mock = not self.api_key
-        
+
         if not self.is_mock:
             self.client = genai.Client(api_key=self.api_key)
 
         self.style_prompt = textwrap.dedent("""
-            V6 VISUALS: Visceral, gritty dark fantasy. 
+            V6 VISUALS: Visceral, gritty dark fantasy.
             PALETTE: #1a1a1d, #c5a059, oxblood, iron, bone.
             KEYWORDS: Rusted steel, shadows, grit, high fidelity.
             FORMAT: Isometric icon/token, no text, alpha.
         """)
 
+        # Content-addressed asset store
+        self.output_dir = Path(output_dir or os.getenv("VISUAL_VAULT_OUTPUT_DIR") or DEFAULT_OUTPUT_DIR)
+        self.index_path = self.output_dir / "index.json"
+        self.index: Dict[str, Dict[str, Any]] = self._load_index()
+
+        # Single-flight: one generation per key, concurrent callers await it
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Index snapshots are written from worker threads; one writer at a time
+        self._index_write_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # ASSET STORE
+    # ------------------------------------------------------------------
+
+    def asset_key(self, item_name: str, context: str) -> str:
+        """Stable content hash for an asset request (independent of PYTHONHASHSEED)."""
+        material = "\x1f".join([_normalize(item_name), _normalize(context), self.style_prompt.strip()])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:20]
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"🎨 Visual Vault Warning: unreadable index ({e}), starting fresh.")
+        return {}
+
+    def _save_index(self, snapshot: Dict[str, Dict[str, Any]]):
+        """Atomically write an index snapshot (blocking: run via asyncio.to_thread)."""
+        with self._index_write_lock:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    def lookup(self, item_name: str, context: str) -> Optional[str]:
+        """Return the cached URL for an asset if it is already on disk."""
+        entry = self.index.get(self.asset_key(item_name, context))
+        if entry and (self.output_dir / entry["filename"]).exists():
+            return f"{ASSET_URL_PREFIX}/{entry['filename']}"
+        return None
+
+    def _write_image(self, filepath: Path, image_bytes: bytes):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "wb") as f:
+            f.write(image_bytes)
+
+    async def _store(self, key: str, item_name: str, context: str, image_bytes: bytes) -> str:
+        """Persist a rendered image and its index entry; disk writes run off the event loop."""
+        filename = f"{_slugify(item_name)}_{key}.png"
+        filepath = self.output_dir / filename
+        await asyncio.to_thread(self._write_image, filepath, image_bytes)
+
+        # The index is only mutated on the loop; threads serialize a copy
+        self.index[key] = {
+            "filename": filename,
+            "item_name": item_name,
+            "context": context,
+            "created_at": datetime.now().isoformat(),
+        }
+        await asyncio.to_thread(self._save_index, dict(self.index))
+        print(f"🎨 Asset Saved: {filepath}")
+        return f"{ASSET_URL_PREFIX}/{filename}"
+
+    # ------------------------------------------------------------------
+    # GENERATION
+    # ------------------------------------------------------------------
+
     async def generate_asset_description(self, item_name: str, context: str) -> str:
         """
         Generates a detailed prompt for image generation based on the item and context.
         """
         if self.is_mock:
             return f"Isometric icon of a {item_name} in a {context}, dark fantasy style."
-            
+
         prompt = f"Create a detailed image generation prompt for: {item_name}\nContext: {context}\n{self.style_prompt}"
-        
+
         # New google-genai logic
         response = await asyncio.to_thread(
             self.client.models.generate_content,
@@ -50,69 +151,81 @@ class VisualVaultClient:
                 completion_tokens=usage.candidates_token_count,
                 model="gemini-1.5-flash"
             )
-            
+
         return response.text
 
+    async def _render_image(self, item_name: str, context: str) -> Optional[bytes]:
+        """Prompt Gemini, then render with Imagen 3. Returns PNG bytes or None."""
+        # 1. Generate Prompt
+        visual_prompt = await self.generate_asset_description(item_name, context)
+        print(f"🎨 Visual Vault Prompt: {visual_prompt}")
+
+        # 2. Call Imagen 3
+        # We use asyncio.to_thread because the SDK might be synchronous or we want to offload
+        from google.genai import types
+
+        response = await asyncio.to_thread(
+            self.client.models.generate_images,
+            model='imagen-3.0-generate-001',
+            prompt=visual_prompt,
+            config=types.GenerateImagesConfig(
+                number_of_images=1,
+                aspect_ratio="1:1"
+            )
+        )
+
+        if not response.generated_images:
+            return None
+
+        # Tokenomics (Placeholder for Image Cost)
+        tokenomics_reporter.report_usage(
+            agent_id="VisualVault",
+            prompt_tokens=0, # Image models cost differently
+            completion_tokens=0,
+            model="imagen-3.0-generate-001"
+        )
+        return response.generated_images[0].image.image_bytes
+
+    async def _generate(self, key: str, item_name: str, context: str) -> str:
+        try:
+            image_bytes = await self._render_image(item_name, context)
+            if not image_bytes:
+                print("🎨 Visual Vault Warning: No image returned.")
+                return PLACEHOLDER_URL
+            return await self._store(key, item_name, context, image_bytes)
+
+        except Exception as e:
+            print(f"🎨 Visual Vault Error: {e}")
+            import traceback
+            traceback.print_exc()
+            return PLACEHOLDER_URL
+
     async def get_asset_url(self, item_name: str, context: str) -> str:
         """
         Retrieves or generates an asset URL for the given item using Imagen 3.
+        Cached assets are returned without any model call; concurrent requests
+        for the same key share a single generation.
         """
         # If mock mode, return placeholder
         if self.is_mock:
             return f"/assets/placeholder_{item_name.lower().replace(' ', '_')}.png"
 
-        try:
-            # 1. Generate Prompt
-            visual_prompt = await self.generate_asset_description(item_name, context)
-            print(f"🎨 Visual Vault Prompt: {visual_prompt}")
-
-            # 2. Call Imagen 3
-            # We use asyncio.to_thread because the SDK might be synchronous or we want to offload
-            from google.genai import types
-            
-            response = await asyncio.to_thread(
-                self.client.models.generate_images,
-                model='imagen-3.0-generate-001',
-                prompt=visual_prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=1,
-                    aspect_ratio="1:1"
-                )
-            )
+        cached = self.lookup(item_name, context)
+        if cached:
+            return cached
 
-            # 3. Process Response
-            if response.generated_images:
-                image_bytes = response.generated_images[0].image.image_bytes
-                
-                # Ensure directory exists (redundant check but safe)
-                output_dir = os.path.join("d:\\DM_antigravity", "apps", "web-client", "public", "assets", "generated")
-                os.makedirs(output_dir, exist_ok=True)
-                
-                # Sanitize filename
-                filename = f"{item_name.lower().replace(' ', '_')}_{hash(context)}.png"
-                filepath = os.path.join(output_dir, filename)
-                
-                with open(filepath, "wb") as f:
-                    f.write(image_bytes)
-                
-                print(f"🎨 Asset Saved: {filepath}")
-                
-                # Tokenomics (Placeholder for Image Cost)
-                tokenomics_reporter.report_usage(
-                    agent_id="VisualVault",
-                    prompt_tokens=0, # Image models cost differently
-                    completion_tokens=0,
-                    model="imagen-3.0-generate-001"
-                )
-
-                return f"/assets/generated/{filename}"
-            
-            else:
-                print("🎨 Visual Vault Warning: No image returned.")
-                return "/assets/placeholder.png"
+        key = self.asset_key(item_name, context)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
 
-        except Exception as e:
-            print(f"🎨 Visual Vault Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return "/assets/placeholder.png"
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            url = await self._generate(key, item_name, context)
+            future.set_result(url)
+            return url
+        finally:
+            if not future.done():
+                future.set_result(PLACEHOLDER_URL)
+            self._inflight.pop(key, None)
@@ -0,0 +1,80 @@
+"""
+Dungeon Cortex — Area of Effect Templates
+Server-side resolution of spell templates (sphere, cylinder, cube, cone, line)
+against the tactical grid, so clients never choose AoE targets themselves.
+
+Geometry works in grid squares with creatures at cell centres:
+  - sphere / cylinder: centred on the aim cell, radius = size.
+  - cube:  side = size, one face on the origin, extending toward the aim cell.
+  - cone:  from the origin toward the aim cell, length = size, width at any
+           distance equals that distance (PHB 5e cone).
+  - line:  from the origin toward the aim cell, length = size, 5 ft wide.
+All tokens are tested in one vectorized NumPy pass.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .tactical import TacticalGrid, Cell, FEET_PER_SQUARE
+
+AOE_SHAPES = {"sphere", "cylinder", "cube", "cone", "line"}
+LINE_WIDTH_FT = 5
+
+
+def _direction(origin: Cell, aim: Cell) -> Optional[np.ndarray]:
+    vec = np.array([aim[0] - origin[0], aim[1] - origin[1]], dtype=np.float64)
+    norm = np.hypot(*vec)
+    return vec / norm if norm else None
+
+
+def inside_template(points: np.ndarray, shape: str, size_ft: int,
+                    origin: Cell, aim: Cell) -> np.ndarray:
+    """
+    Boolean membership for an (N, 2) array of (x, y) cells.
+    `origin` is the caster's cell, `aim` the targeted cell.
+    """
+    if shape not in AOE_SHAPES:
+        raise ValueError(f"Unknown AoE shape: {shape}")
+    size = size_ft / FEET_PER_SQUARE
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    if shape in ("sphere", "cylinder"):
+        d = pts - np.asarray(aim, dtype=np.float64)
+        return np.einsum("ij,ij->i", d, d) <= size * size
+
+    direction = _direction(origin, aim)
+    if direction is None:
+        # Aimed at the caster's own square: nothing to project along
+        return np.zeros(len(pts), dtype=bool)
+
+    rel = pts - np.asarray(origin, dtype=np.float64)
+    along = rel @ direction                                # distance along the aim axis
+    across = rel @ np.array([-direction[1], direction[0]])  # signed lateral offset
+
+    if shape == "cone":
+        return (along > 0) & (along <= size) & (np.abs(across) <= along / 2)
+    if shape == "line":
+        half_width = LINE_WIDTH_FT / FEET_PER_SQUARE / 2
+        return (along > 0) & (along <= size) & (np.abs(across) <= half_width)
+    # cube: square of side `size` whose near face is centred on the origin
+    return (along > 0) & (along <= size) & (np.abs(across) <= size / 2)
+
+
+def template_mask(grid: TacticalGrid, shape: str, size_ft: int,
+                  origin: Cell, aim: Cell) -> np.ndarray:
+    """(height, width) boolean mask of covered squares, e.g. for UI highlighting."""
+    ys, xs = np.mgrid[0:grid.height, 0:grid.width]
+    points = np.column_stack([xs.ravel(), ys.ravel()])
+    return inside_template(points, shape, size_ft, origin, aim).reshape(grid.height, grid.width)
+
+
+def affected_tokens(grid: TacticalGrid, shape: str, size_ft: int,
+                    origin: Cell, aim: Cell, exclude: Tuple[str, ...] = ()) -> List[str]:
+    """Token ids caught in the template, in placement order."""
+    ids = [tid for tid in grid.positions if tid not in exclude]
+    if not ids:
+        return []
+    points = np.array([grid.positions[tid] for tid in ids])
+    hit = inside_template(points, shape, size_ft, origin, aim)
+    return [tid for tid, inside in zip(ids, hit) if inside]
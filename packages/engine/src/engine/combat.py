@@ -74,9 +74,11 @@ def resolve_attack(
     disadvantage: bool = False,
     environment_tags: Optional[list[str]] = None,
     narrative_hook: Optional[str] = None,
+    auto_crit: bool = False,
 ) -> AttackResult:
     """
     Resolve a melee or ranged weapon attack following SRD 5.1 rules.
+    `auto_crit` turns any hit into a critical (e.g. melee vs. Paralyzed).
     """
     if target_resistances is None: target_resistances = []
     if target_immunities is None: target_immunities = []
@@ -100,6 +102,7 @@ def resolve_attack(
     # --- Step 2: Hit Determination ---
     # Natural 20 always hits; Natural 1 always misses (SRD 5.1)
     hit = is_critical or (not is_fumble and attack_roll.total >= target_ac)
+    is_critical = is_critical or (hit and auto_crit)
 
     # --- Step 3: Damage Calculation ---
     total_damage = 0
@@ -200,6 +203,7 @@ def resolve_saving_throw(
     half_damage_on_success: bool = True,
     environment_tags: Optional[list[str]] = None,
     narrative_hook: Optional[str] = None,
+    auto_fail: bool = False,
 ) -> AttackResult:
     """
     Resolve a saving throw capability (e.g. Fireball, Poison Breath).
@@ -225,7 +229,8 @@ def resolve_saving_throw(
     else:
         save_roll = d20(target_save_bonus)
 
-    success = save_roll.total >= save_dc
+    # Conditions like Paralyzed fail STR/DEX saves outright
+    success = not auto_fail and save_roll.total >= save_dc
 
     # --- Step 2: Damage Calculation ---
     # Damage is rolled once by the attacker
@@ -328,6 +333,8 @@ def resolve_aoe_spell(
     targets_immunities: Optional[dict[str, list[str]]] = None,
     environment_tags: Optional[list[str]] = None,
     narrative_hook: Optional[str] = None,
+    targets_auto_fail: Optional[set[str]] = None,
+    targets_disadvantage: Optional[set[str]] = None,
 ) -> list[AttackResult]:
     """
     Resolve an Area of Effect spell against multiple targets.
@@ -335,6 +342,8 @@ def resolve_aoe_spell(
     """
     if targets_resistances is None: targets_resistances = {}
     if targets_immunities is None: targets_immunities = {}
+    if targets_auto_fail is None: targets_auto_fail = set()
+    if targets_disadvantage is None: targets_disadvantage = set()
 
     results = []
     
@@ -346,7 +355,9 @@ def resolve_aoe_spell(
         # 1. Resolve Save
         bonus = targets_save_bonuses.get(target_id, 0)
         save_roll = d20(bonus)
-        success = save_roll.total >= save_dc
+        if target_id in targets_disadvantage:
+            save_roll = min(save_roll, d20(bonus), key=lambda r: r.rolls[0])
+        success = target_id not in targets_auto_fail and save_roll.total >= save_dc
         
         # 2. Calculate Damage
         # EVASION logic could be injected here in future
@@ -1,11 +1,16 @@
 """
 Dungeon Cortex — Status Engine (§3.3)
 Manages conditions, effects, and their durations.
+
+Each ConditionDefinition's effect list is compiled once, at registration,
+into a ConditionFlag bitmask. Combatants keep the OR of their conditions'
+masks, so attack/save resolution answers "advantage? auto-fail? auto-crit?
+can act?" with a few bitwise ops instead of scanning effect lists.
 """
 
-from enum import Enum, auto
+from enum import Enum, IntFlag, auto
 from dataclasses import dataclass, field
-from typing import List, Optional, Set
+from typing import Iterable, List, Optional, Set, Tuple
 
 class EffectType(Enum):
     GRANT_ADVANTAGE = auto()      # Attacks AGAINST target have advantage
@@ -17,6 +22,37 @@ class EffectType(Enum):
     MODIFY_STAT = auto()          # Bonus/Penalty arrows
     GRANT_CRIT = auto()           # Hits against target are crits (e.g. Paralyzed)
 
+class ConditionFlag(IntFlag):
+    NONE = 0
+    CANT_ACT = auto()                   # No actions or reactions
+    SPEED_ZERO = auto()
+    ATTACK_ADVANTAGE = auto()           # Attacks BY the holder
+    ATTACK_DISADVANTAGE = auto()
+    ATTACKED_ADVANTAGE = auto()         # Attacks AGAINST the holder
+    ATTACKED_DISADVANTAGE = auto()
+    ATTACKED_ADVANTAGE_MELEE = auto()   # ...only from within 5 ft (Prone)
+    ATTACKED_DISADVANTAGE_RANGED = auto()  # ...only from beyond 5 ft (Prone)
+    CRIT_WITHIN_5FT = auto()            # Hits from within 5 ft are critical
+    CHECK_DISADVANTAGE = auto()
+    AUTO_FAIL_CHECK = auto()
+    AUTO_FAIL_STR_SAVE = auto()
+    AUTO_FAIL_DEX_SAVE = auto()
+    AUTO_FAIL_CON_SAVE = auto()
+    AUTO_FAIL_INT_SAVE = auto()
+    AUTO_FAIL_WIS_SAVE = auto()
+    AUTO_FAIL_CHA_SAVE = auto()
+    STR_SAVE_DISADVANTAGE = auto()
+    DEX_SAVE_DISADVANTAGE = auto()
+    CON_SAVE_DISADVANTAGE = auto()
+    INT_SAVE_DISADVANTAGE = auto()
+    WIS_SAVE_DISADVANTAGE = auto()
+    CHA_SAVE_DISADVANTAGE = auto()
+
+
+SAVE_STATS = ("str", "dex", "con", "int", "wis", "cha")
+_AUTO_FAIL_SAVE = {s: ConditionFlag[f"AUTO_FAIL_{s.upper()}_SAVE"] for s in SAVE_STATS}
+_SAVE_DISADVANTAGE = {s: ConditionFlag[f"{s.upper()}_SAVE_DISADVANTAGE"] for s in SAVE_STATS}
+
 @dataclass
 class ConditionEffect:
     type: EffectType
@@ -29,6 +65,10 @@ class ConditionDefinition:
     description: str
     video_effect: str = "default_status_aura" # For Visual Vault
     effects: List[ConditionEffect] = field(default_factory=list)
+    flags: ConditionFlag = field(default=ConditionFlag.NONE, init=False, repr=False)
+
+    def __post_init__(self):
+        self.flags = compile_effects(self.effects)
 
 @dataclass
 class ActiveCondition:
@@ -37,22 +77,114 @@ class ActiveCondition:
     duration_rounds: int = -1 # -1 = Infinite/Save Ends
     save_ends_dc: Optional[int] = None
     save_stat: Optional[str] = None
+    # Round whose start-of-turn ends the condition (set once initiative is rolled)
+    expires_round: Optional[int] = None
+
+def _stats(params: dict) -> List[str]:
+    stats = params.get("stats") or ([params["stat"]] if "stat" in params else list(SAVE_STATS))
+    return [s.lower()[:3] for s in stats]
+
+
+def compile_effects(effects: Iterable[ConditionEffect]) -> ConditionFlag:
+    """Fold an effect list into the flags the resolvers test."""
+    flags = ConditionFlag.NONE
+    for effect in effects:
+        params = effect.params
+        context = params.get("context")
+        if effect.type == EffectType.DISABLE_ACTION:
+            flags |= ConditionFlag.CANT_ACT
+        elif effect.type == EffectType.SPEED_ZERO:
+            flags |= ConditionFlag.SPEED_ZERO
+        elif effect.type == EffectType.GRANT_CRIT:
+            flags |= ConditionFlag.CRIT_WITHIN_5FT
+        elif effect.type == EffectType.AUTO_FAIL_CHECK:
+            flags |= ConditionFlag.AUTO_FAIL_CHECK
+        elif effect.type == EffectType.AUTO_FAIL_SAVE:
+            for stat in _stats(params):
+                flags |= _AUTO_FAIL_SAVE[stat]
+        elif effect.type == EffectType.GRANT_ADVANTAGE:
+            if context == "attack":
+                flags |= ConditionFlag.ATTACK_ADVANTAGE
+            elif context == "attacked_by":
+                melee_only = params.get("range") == "5"
+                flags |= ConditionFlag.ATTACKED_ADVANTAGE_MELEE if melee_only else ConditionFlag.ATTACKED_ADVANTAGE
+        elif effect.type == EffectType.IMPOSE_DISADVANTAGE:
+            if context == "attack":
+                flags |= ConditionFlag.ATTACK_DISADVANTAGE
+            elif context == "attacked_by":
+                ranged_only = params.get("range") == "ranged"
+                flags |= ConditionFlag.ATTACKED_DISADVANTAGE_RANGED if ranged_only else ConditionFlag.ATTACKED_DISADVANTAGE
+            elif context == "ability_check":
+                flags |= ConditionFlag.CHECK_DISADVANTAGE
+            elif context == "save":
+                for stat in _stats(params):
+                    flags |= _SAVE_DISADVANTAGE[stat]
+        # MODIFY_STAT carries numeric bonuses, not flags
+    return flags
+
 
 class ConditionRegistry:
     _definitions = {}
 
     @classmethod
     def register(cls, condition: ConditionDefinition):
-        cls._definitions[condition.id] = condition
+        cls._definitions[condition.id.lower()] = condition
 
     @classmethod
     def get(cls, condition_id: str) -> Optional[ConditionDefinition]:
-        return cls._definitions.get(condition_id)
+        # Ids are lowercase; callers historically used display names ("Stunned")
+        return cls._definitions.get(condition_id.lower())
+
+    @classmethod
+    def flags(cls, condition_id: str) -> ConditionFlag:
+        """Compiled flags for a condition id (NONE for untracked ids like "Concentrating")."""
+        definition = cls.get(condition_id)
+        return definition.flags if definition else ConditionFlag.NONE
 
     @classmethod
     def get_all(cls) -> List[ConditionDefinition]:
         return list(cls._definitions.values())
 
+
+# --- Mask Queries (aggregate masks from Combatant.condition_mask) ---
+
+def condition_mask(condition_ids: Iterable[str]) -> int:
+    mask = 0
+    for condition_id in condition_ids:
+        mask |= ConditionRegistry.flags(condition_id)
+    return mask
+
+
+def can_act(mask: int) -> bool:
+    return not mask & ConditionFlag.CANT_ACT
+
+
+def attack_roll_mode(attacker_mask: int, target_mask: int, within_5ft: bool = True) -> Tuple[bool, bool]:
+    """(advantage, disadvantage) an attack gets from both sides' conditions."""
+    advantage = bool(attacker_mask & ConditionFlag.ATTACK_ADVANTAGE or target_mask & ConditionFlag.ATTACKED_ADVANTAGE)
+    disadvantage = bool(attacker_mask & ConditionFlag.ATTACK_DISADVANTAGE or target_mask & ConditionFlag.ATTACKED_DISADVANTAGE)
+    if within_5ft:
+        advantage = advantage or bool(target_mask & ConditionFlag.ATTACKED_ADVANTAGE_MELEE)
+    else:
+        disadvantage = disadvantage or bool(target_mask & ConditionFlag.ATTACKED_DISADVANTAGE_RANGED)
+    return advantage, disadvantage
+
+
+def auto_crit(target_mask: int, within_5ft: bool = True) -> bool:
+    return within_5ft and bool(target_mask & ConditionFlag.CRIT_WITHIN_5FT)
+
+
+def save_mode(mask: int, stat: Optional[str]) -> Tuple[bool, bool]:
+    """(auto_fail, disadvantage) on a saving throw of `stat`."""
+    key = (stat or "").lower()[:3]
+    if key not in _AUTO_FAIL_SAVE:
+        return False, False
+    return bool(mask & _AUTO_FAIL_SAVE[key]), bool(mask & _SAVE_DISADVANTAGE[key])
+
+
+def speed_feet(mask: int, base_speed: int) -> int:
+    return 0 if mask & ConditionFlag.SPEED_ZERO else base_speed
+
 # --- SRD 5.1 Condition Definitions ---
 
 # Blinded
@@ -169,9 +301,10 @@ ConditionRegistry.register(ConditionDefinition(
     name="Prone",
     description="Crawl only. Melee attacks against you have Advantage. Ranged attacks against you have Disadvantage.",
     effects=[
-        # Contextual advantage logic will be handled in combat.py resolver 
-        # because it depends on range (melee vs ranged)
-        ConditionEffect(EffectType.IMPOSE_DISADVANTAGE, {"context": "attack"}) # Attacks made while prone are disadv
+        ConditionEffect(EffectType.IMPOSE_DISADVANTAGE, {"context": "attack"}), # Attacks made while prone are disadv
+        # Range-dependent: resolved with the attacker's distance
+        ConditionEffect(EffectType.GRANT_ADVANTAGE, {"context": "attacked_by", "range": "5"}),
+        ConditionEffect(EffectType.IMPOSE_DISADVANTAGE, {"context": "attacked_by", "range": "ranged"})
     ]
 ))
 
@@ -188,6 +321,17 @@ ConditionRegistry.register(ConditionDefinition(
     ]
 ))
 
+# Surprised (first round of an ambush)
+ConditionRegistry.register(ConditionDefinition(
+    id="surprised",
+    name="Surprised",
+    description="Can't move or take actions on the first turn of combat.",
+    effects=[
+        ConditionEffect(EffectType.DISABLE_ACTION),
+        ConditionEffect(EffectType.SPEED_ZERO)
+    ]
+))
+
 # Stunned
 ConditionRegistry.register(ConditionDefinition(
     id="stunned",
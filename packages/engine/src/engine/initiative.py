@@ -1,12 +1,24 @@
 """
 Dungeon Cortex — Initiative Engine (§3.2)
 Manages turn order, rounds, and initiative rolls.
+
+Timed and save-ends conditions sit in a min-heap keyed by
+(round, initiative slot, phase): durations expire at the start of the
+holder's turn, save-ends rolls happen at the end of it. Each turn boundary
+pops only the entries that are due, so the cost scales with expiring
+effects rather than with every active condition. Refreshed or removed
+conditions leave stale entries behind that are skipped when popped.
 """
 
+import heapq
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from .dice import d20
-from .conditions import ActiveCondition, ConditionRegistry, EffectType
+from .conditions import ActiveCondition, ConditionRegistry, EffectType, condition_mask, save_mode
+
+# Heap phases within one initiative slot
+PHASE_START = 0   # duration expiry
+PHASE_END = 1     # save-ends roll
 
 @dataclass
 class Combatant:
@@ -34,11 +46,20 @@ class Combatant:
     cr: float = 0
     type: str = "unknown"
     actions: List[dict] = field(default_factory=list)
+    template_id: Optional[str] = None  # SRD monster id (saves store actions by reference)
     
     # Changed from List[str] to List[ActiveCondition]
     conditions: List[ActiveCondition] = field(default_factory=list)
     resistances: List[str] = field(default_factory=list)
     immunities: List[str] = field(default_factory=list)
+    # OR of the active conditions' ConditionFlags; derived, recomputed on load
+    condition_mask: int = field(default=0, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.refresh_condition_mask()
+
+    def refresh_condition_mask(self):
+        self.condition_mask = condition_mask(c.condition_id for c in self.conditions)
 
     def has_condition(self, condition_id: str) -> bool:
         return any(c.condition_id == condition_id for c in self.conditions)
@@ -55,6 +76,18 @@ class InitiativeTracker:
     combatants: List[Combatant] = field(default_factory=list)
     has_started: bool = False
     active_widgets: List = field(default_factory=list)
+    # Expirations / save results since the last drain_condition_events()
+    condition_events: List[dict] = field(default_factory=list)
+    _schedule: List[tuple] = field(default_factory=list, repr=False)
+    _live: Dict[Tuple[int, int], int] = field(default_factory=dict, repr=False)
+    _seq: int = field(default=0, repr=False)
+    # Mutation hook, called as observer(kind, combatant) with kind in
+    # "combatant", "roster", "turn", "conditions" (state.py logs these as events)
+    observer: Optional[Callable[[str, Optional[Combatant]], None]] = field(default=None, repr=False, compare=False)
+
+    def _notify(self, kind: str, combatant: Optional[Combatant] = None):
+        if self.observer:
+            self.observer(kind, combatant)
 
     # ... (roll_initiative and add_combatant methods remain mostly same, just ensuring conditions init is correct)
 
@@ -67,7 +100,8 @@ class InitiativeTracker:
                      hp_max: int = 10, ac: int = 10, actions: Optional[List[dict]] = None,
                      resistances: List[str] = None, immunities: List[str] = None,
                      cr: float = 0, type: str = "unknown", 
-                     str_mod: int = 0, con_mod: int = 0, int_mod: int = 0, wis_mod: int = 0, cha_mod: int = 0):
+                     str_mod: int = 0, con_mod: int = 0, int_mod: int = 0, wis_mod: int = 0, cha_mod: int = 0,
+                     template_id: Optional[str] = None):
 
         if actions is None: actions = []
         if resistances is None: resistances = []
@@ -78,8 +112,10 @@ class InitiativeTracker:
                      resistances=resistances, immunities=immunities,
                      cr=cr, type=type, conditions=[],
                      str_mod=str_mod, dex_mod=dex_modifier, con_mod=con_mod, 
-                     int_mod=int_mod, wis_mod=wis_mod, cha_mod=cha_mod)
+                     int_mod=int_mod, wis_mod=wis_mod, cha_mod=cha_mod,
+                     template_id=template_id)
         self.combatants.append(c)
+        self._notify("combatant", c)
 
     def start_encounter(self):
         for c in self.combatants:
@@ -87,9 +123,17 @@ class InitiativeTracker:
                 self.roll_initiative(c)
         
         self.combatants.sort(key=lambda x: (x.initiative, x.dex_modifier), reverse=True)
+        # Conditions carried over from earlier play keep their remaining rounds
+        shift = 1 - self.round
+        for c in self.combatants:
+            for cond in c.conditions:
+                if cond.expires_round is not None:
+                    cond.expires_round += shift
         self.has_started = True
         self.round = 1
         self.turn_index = 0
+        self.rebuild_schedule()
+        self._notify("roster")
 
     def next_turn(self) -> Combatant:
         if not self.combatants:
@@ -115,30 +159,123 @@ class InitiativeTracker:
             if next_actor.is_active:
                 # 3. Start of Turn Processing for Next Actor
                 self._process_start_of_turn(next_actor)
+                self._notify("turn")
                 return next_actor
 
             if self.turn_index == start_index:
                 # Everyone dead/inactive?
+                self._notify("turn")
                 return next_actor
         
         return self.combatants[0]
 
+    # ------------------------------------------------------------------
+    # CONDITION SCHEDULER
+    # ------------------------------------------------------------------
+
+    def _index_of(self, combatant_id: str) -> int:
+        return next((i for i, c in enumerate(self.combatants) if c.id == combatant_id), -1)
+
+    def _expiry_round(self, index: int, duration: int) -> int:
+        """Round whose start-of-turn for slot `index` ends a `duration`-round condition."""
+        upcoming = index > self.turn_index  # holder's turn still to come this round
+        return self.round + duration - (1 if upcoming else 0)
+
+    def _push(self, round_: int, index: int, phase: int, combatant_id: str, cond: ActiveCondition):
+        self._seq += 1
+        self._live[(id(cond), phase)] = self._seq
+        heapq.heappush(self._schedule, (round_, index, phase, self._seq, combatant_id, cond))
+
+    def _unschedule(self, cond: ActiveCondition):
+        self._live.pop((id(cond), PHASE_START), None)
+        self._live.pop((id(cond), PHASE_END), None)
+
+    def _schedule_condition(self, index: int, combatant: Combatant, cond: ActiveCondition):
+        if not self.has_started:
+            return  # Slots are only known once initiative is rolled
+        if cond.duration_rounds > 0:
+            if cond.expires_round is None:
+                cond.expires_round = self._expiry_round(index, cond.duration_rounds)
+            self._push(cond.expires_round, index, PHASE_START, combatant.id, cond)
+        if cond.save_ends_dc is not None:
+            save_round = self.round if index >= self.turn_index else self.round + 1
+            self._push(save_round, index, PHASE_END, combatant.id, cond)
+
+    def rebuild_schedule(self):
+        """Re-key every condition (after sorting initiative or loading a save)."""
+        self._schedule.clear()
+        self._live.clear()
+        for index, c in enumerate(self.combatants):
+            for cond in c.conditions:
+                self._schedule_condition(index, c, cond)
+
+    def _pop_due(self, phase: int) -> List[Tuple[int, int, str, ActiveCondition]]:
+        due_key = (self.round, self.turn_index, phase)
+        due = []
+        while self._schedule and self._schedule[0][:3] <= due_key:
+            round_, index, entry_phase, seq, combatant_id, cond = heapq.heappop(self._schedule)
+            if self._live.get((id(cond), entry_phase)) != seq:
+                continue  # Refreshed or removed since it was scheduled
+            del self._live[(id(cond), entry_phase)]
+            due.append((index, entry_phase, combatant_id, cond))
+        return due
+
+    def _drop_condition(self, combatant: Combatant, cond: ActiveCondition, reason: str, **details):
+        self._unschedule(cond)
+        if any(c is cond for c in combatant.conditions):
+            combatant.conditions.remove(cond)
+            combatant.refresh_condition_mask()
+            self._notify("conditions", combatant)
+        self.condition_events.append({
+            "combatant_id": combatant.id, "condition_id": cond.condition_id, "reason": reason, **details,
+        })
+
     def _process_start_of_turn(self, combatant: Combatant):
-        # Decrement durations
-        expired = []
-        for cond in combatant.conditions:
-            if cond.duration_rounds > 0:
-                cond.duration_rounds -= 1
-                if cond.duration_rounds == 0:
-                    expired.append(cond)
-        
-        for e in expired:
-            combatant.conditions.remove(e)
-            print(f"Condition expired: {e.condition_id} on {combatant.name}")
+        self._process_due(PHASE_START)
 
     def _process_end_of_turn(self, combatant: Combatant):
-        # Allow save-ends rolls here? (Future feature)
-        pass
+        self._process_due(PHASE_END)
+
+    def _process_due(self, phase: int):
+        # Each entry runs by its own phase: a save left over from a skipped turn
+        # is still a save, not an expiry
+        due = self._pop_due(phase)
+        if not due:
+            return
+        by_id = {c.id: c for c in self.combatants}
+        for index, entry_phase, combatant_id, cond in due:
+            holder = by_id.get(combatant_id)
+            if not holder:
+                continue
+            if entry_phase == PHASE_START:
+                self._drop_condition(holder, cond, "expired")
+                print(f"Condition expired: {cond.condition_id} on {holder.name}")
+            else:
+                self._roll_save_ends(index, holder, cond, phase)
+
+    def _roll_save_ends(self, index: int, holder: Combatant, cond: ActiveCondition, phase: int):
+        # Save-ends: the holder repeats the save at the end of each of its turns
+        stat = (cond.save_stat or "con").lower()[:3]
+        bonus = getattr(holder, f"{stat}_mod", 0)
+        auto_fail, disadvantage = save_mode(holder.condition_mask, stat)
+        save_roll = d20(bonus)
+        if disadvantage:
+            save_roll = min(save_roll, d20(bonus), key=lambda r: r.rolls[0])
+        if not auto_fail and save_roll.total >= cond.save_ends_dc:
+            self._drop_condition(holder, cond, "saved", roll=save_roll.total, dc=cond.save_ends_dc)
+            print(f"{holder.name} saved against {cond.condition_id} ({save_roll.total} vs DC {cond.save_ends_dc})")
+        else:
+            self.condition_events.append({
+                "combatant_id": holder.id, "condition_id": cond.condition_id, "reason": "save_failed",
+                "roll": save_roll.total, "dc": cond.save_ends_dc,
+            })
+            # Next end of the holder's turn: later this round if it is still ahead
+            upcoming = (index, PHASE_END) > (self.turn_index, phase)
+            self._push(self.round if upcoming else self.round + 1, index, PHASE_END, holder.id, cond)
+
+    def drain_condition_events(self) -> List[dict]:
+        events, self.condition_events = self.condition_events, []
+        return events
 
     def get_current_actor(self) -> Optional[Combatant]:
         if not self.combatants:
@@ -156,21 +293,33 @@ class InitiativeTracker:
         # if not defined: return # Or handle unknown?
 
         # Check if already exists, refresh duration or stack?
+        index = self._index_of(combatant_id)
         existing = c.get_condition(condition_id)
         if existing:
             # Refresh duration if new is longer
-            if duration > existing.duration_rounds and duration != -1:
-                existing.duration_rounds = duration
-            elif duration == -1:
+            if duration == -1:
                 existing.duration_rounds = -1
+                existing.expires_round = None
+                self._live.pop((id(existing), PHASE_START), None)
+            elif existing.duration_rounds != -1:
+                if not self.has_started:
+                    existing.duration_rounds = max(existing.duration_rounds, duration)
+                elif existing.expires_round is None or self._expiry_round(index, duration) > existing.expires_round:
+                    existing.duration_rounds = duration
+                    existing.expires_round = self._expiry_round(index, duration)
+                    self._push(existing.expires_round, index, PHASE_START, c.id, existing)
         else:
-            c.conditions.append(ActiveCondition(
+            cond = ActiveCondition(
                 condition_id=condition_id,
                 source_id=source_id,
                 duration_rounds=duration,
                 save_ends_dc=save_ends_dc,
                 save_stat=save_stat
-            ))
+            )
+            c.conditions.append(cond)
+            c.condition_mask |= ConditionRegistry.flags(condition_id)
+            self._schedule_condition(index, c, cond)
+        self._notify("conditions", c)
 
     def remove_condition(self, combatant_id: str, condition_id: str):
         c = next((c for c in self.combatants if c.id == combatant_id), None)
@@ -178,4 +327,8 @@ class InitiativeTracker:
             to_remove = c.get_condition(condition_id)
             if to_remove:
                 c.conditions.remove(to_remove)
+                self._unschedule(to_remove)
+                # Other conditions may share flags, so rebuild rather than clear bits
+                c.refresh_condition_mask()
+                self._notify("conditions", c)
 
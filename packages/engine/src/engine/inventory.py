@@ -1,92 +1,205 @@
 import json
+import sqlite3
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 from uuid import uuid4
 from .db import get_db
 from .dice import roll
+from .loot_tables import loot_tables, cr_band, item_rarity
+from .migrations import migrate
+
+# ----------------------------------------------------------------------
+# SCHEMA
+# ----------------------------------------------------------------------
+
+# Display columns (name, rarity, attunement; migration 003) are copied from the
+# SRD template at creation, so listing an inventory never joins srd_mechanic
+_ITEM_COLUMNS = ("id, character_id, template_id, location, slot_type, grid_index, current_charges, "
+                 "visual_asset_url, name, rarity, attunement")
+
+_INSERT_ITEM_SQL = """
+INSERT INTO inventory_item (id, character_id, template_id, location, slot_type, grid_index, current_charges, is_identified, visual_asset_url, name, rarity, attunement)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _db() -> sqlite3.Connection:
+    db = get_db()
+    migrate(db)
+    return db
+
+
+def _bump_versions(db: sqlite3.Connection, character_ids: Iterable[str]) -> None:
+    """Advance the inventory version of every touched character (call inside the write transaction)."""
+    db.executemany("""
+        INSERT INTO inventory_version (character_id, version) VALUES (?, 1)
+        ON CONFLICT(character_id) DO UPDATE SET version = version + 1
+    """, [(c,) for c in set(character_ids)])
+
+
+def get_inventory_version(character_id: str) -> int:
+    """Changes whenever the character's inventory does; 0 if it was never written."""
+    row = _db().execute(
+        "SELECT version FROM inventory_version WHERE character_id = ?", (character_id,)
+    ).fetchone()
+    return row["version"] if row else 0
+
+
+_IN_CHUNK = 500  # Stay well under SQLITE_MAX_VARIABLE_NUMBER on older builds
+
+# Parsed SRD template data, valid for one connection + PRAGMA data_version
+_template_cache: Dict[str, dict] = {}
+_template_cache_key: Optional[tuple] = None
+
+
+def template_data(template_ids: Iterable[str], db: Optional[sqlite3.Connection] = None) -> Dict[str, dict]:
+    """
+    Parsed SRD data for the given templates, fetched with one IN (...) query
+    for the ids not cached yet. Missing templates are simply absent.
+    """
+    global _template_cache_key
+    db = db or get_db()
+    version = db.execute("PRAGMA data_version").fetchone()[0]
+    if _template_cache_key is None or _template_cache_key[0] is not db or _template_cache_key[1] != version:
+        _template_cache.clear()
+        _template_cache_key = (db, version)
+
+    wanted = list(dict.fromkeys(template_ids))
+    missing = [t for t in wanted if t not in _template_cache]
+    for i in range(0, len(missing), _IN_CHUNK):
+        chunk = missing[i:i + _IN_CHUNK]
+        rows = db.execute(
+            f"SELECT id, data_json FROM srd_mechanic WHERE id IN ({','.join('?' * len(chunk))})", chunk
+        ).fetchall()
+        for row in rows:
+            _template_cache[row["id"]] = json.loads(row["data_json"]) if row["data_json"] else {}
+    return {t: _template_cache[t] for t in wanted if t in _template_cache}
+
+
+def invalidate_template_cache():
+    """Call after writing srd_mechanic on the shared connection."""
+    global _template_cache_key
+    _template_cache.clear()
+    _template_cache_key = None
+
+
+def _display_values(srd_data: dict) -> tuple:
+    """(name, rarity, attunement) for the denormalized display columns."""
+    return (
+        srd_data.get("name", "Unknown Item"),
+        item_rarity(srd_data) or "Common",
+        1 if srd_data.get("requires_attunement") else 0,
+    )
+
+
+def _item_view(item: dict, stats: Optional[dict] = None) -> dict:
+    """
+    Client-facing shape of an inventory row (see InventoryItemModel).
+    The slim projection leaves `stats` empty; full SRD data is on demand.
+    """
+    return {
+        "instance_id": item["id"],
+        "template_id": item["template_id"],
+        "name": item.get("name") or "Unknown Item",
+        "location": item["location"],
+        "slot_type": item.get("slot_type"),
+        "grid_index": item.get("grid_index", 0),
+        "charges": item.get("current_charges", 0),
+        "stats": stats or {},
+        "visual_asset_url": item.get("visual_asset_url", ""),
+        "rarity": item.get("rarity") or "Common",
+        "attunement": bool(item.get("attunement"))
+    }
+
+
+def create_inventory_items(assignments: Iterable[Tuple[str, str]], location: str = "backpack",
+                           visual_asset_urls: Optional[Sequence[str]] = None) -> list[dict]:
+    """
+    Create item instances for (character_id, template_id) pairs with one
+    executemany in a single transaction. Returns the inserted rows.
+    """
+    db = _db()
+    assignments = list(assignments)
+    urls = list(visual_asset_urls) if visual_asset_urls is not None else [""] * len(assignments)
+    if len(urls) != len(assignments):
+        raise ValueError("visual_asset_urls must match the number of items")
+
+    templates = template_data((t for _, t in assignments), db)
+    for template_id in sorted({t for _, t in assignments} - set(templates)):
+        # Placeholder fallback if template missing (shouldn't happen with full DB)
+        print(f"Warning: Template {template_id} not found.")
+
+    # Defaults: no slot, grid handled by UI, no charges, auto-identified for now
+    items = [dict(zip(("name", "rarity", "attunement"), _display_values(templates.get(template_id, {}))), **{
+        "id": str(uuid4()),
+        "character_id": character_id,
+        "template_id": template_id,
+        "location": location,
+        "slot_type": None,
+        "grid_index": 0,
+        "current_charges": 0,
+        "is_identified": True,
+        "visual_asset_url": url,
+    }) for (character_id, template_id), url in zip(assignments, urls)]
+
+    with db:
+        db.executemany(_INSERT_ITEM_SQL, [(
+            i["id"], i["character_id"], i["template_id"], i["location"], i["slot_type"],
+            i["grid_index"], i["current_charges"], i["is_identified"], i["visual_asset_url"],
+            i["name"], i["rarity"], i["attunement"]
+        ) for i in items])
+        _bump_versions(db, (i["character_id"] for i in items))
+    return items
+
 
 def create_inventory_item(character_id: str, template_id: str, location: str = "backpack", visual_asset_url: str = "") -> dict:
     """
     Create a new inventory item instance from an SRD template.
     """
-    db = get_db()
-    item_id = str(uuid4())
-    
-    # Verify template exists and get default name/data if needed
-    row = db.execute("SELECT data_json FROM srd_mechanic WHERE id = ?", (template_id,)).fetchone()
-    if not row:
-         # Placeholder fallback if template missing (shouldn't happen with full DB)
-         print(f"Warning: Template {template_id} not found.")
-         
-    # Insert new item
-    sql = """
-    INSERT INTO inventory_item (id, character_id, template_id, location, slot_type, grid_index, current_charges, is_identified, visual_asset_url)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    # Defaults
-    slot_type = None
-    grid_index = 0 # Simple auto-increment logic could go here, or handled by UI
-    current_charges = 0
-    is_identified = True # Auto-identify for now
-
-    db.execute(sql, (
-        item_id, 
-        character_id, 
-        template_id, 
-        location,
-        slot_type,
-        grid_index,
-        current_charges,
-        is_identified,
-        visual_asset_url
-    ))
-    db.commit()
-    
+    item = create_inventory_items([(character_id, template_id)], location, [visual_asset_url])[0]
     return {
-        "id": item_id,
+        "id": item["id"],
         "character_id": character_id,
         "template_id": template_id,
         "location": location
     }
 
-def get_inventory(character_id: str) -> list[dict]:
+def set_visual_asset_url(item_id: str, visual_asset_url: str) -> None:
     """
-    Get all items for a character, joined with SRD data for display.
+    Attach a generated Visual Vault asset to an existing inventory item.
     """
-    db = get_db()
-    
-    sql = """
-    SELECT 
-        i.id, i.character_id, i.template_id, i.location, i.slot_type, i.grid_index, i.current_charges, i.visual_asset_url,
-        s.data_json
-    FROM inventory_item i
-    LEFT JOIN srd_mechanic s ON i.template_id = s.id
-    WHERE i.character_id = ?
+    db = _db()
+    with db:
+        row = db.execute("SELECT character_id FROM inventory_item WHERE id = ?", (item_id,)).fetchone()
+        if row is None:
+            return
+        db.execute(
+            "UPDATE inventory_item SET visual_asset_url = ? WHERE id = ?",
+            (visual_asset_url, item_id)
+        )
+        _bump_versions(db, [row["character_id"]])
+
+def get_inventory(character_id: str, full: bool = False) -> list[dict]:
     """
-    
-    rows = db.execute(sql, (character_id,)).fetchall()
-    results = []
-    
-    for row in rows:
-        # row is a sqlite3.Row object
-        srd_data = json.loads(row["data_json"]) if row["data_json"] else {}
-        rarity_raw = srd_data.get("rarity", "Common")
-        rarity_value = rarity_raw.get("name", "Common") if isinstance(rarity_raw, dict) else rarity_raw
-
-        item = {
-            "instance_id": row["id"],
-            "template_id": row["template_id"],
-            "name": srd_data.get("name", "Unknown Item"),
-            "location": row["location"],
-            "slot_type": row["slot_type"],
-            "grid_index": row["grid_index"],
-            "charges": row["current_charges"],
-            "stats": srd_data,
-            "visual_asset_url": row["visual_asset_url"],
-            "rarity": rarity_value or "Common",
-            "attunement": True if srd_data.get("requires_attunement") else False
-        }
-        results.append(item)
-        
-    return results
+    Get all items for a character from the indexed, denormalized rows.
+    `full=True` also attaches each item's SRD record as `stats`.
+    """
+    db = _db()
+    rows = db.execute(
+        f"SELECT {_ITEM_COLUMNS} FROM inventory_item WHERE character_id = ?", (character_id,)
+    ).fetchall()
+
+    if not full:
+        return [_item_view(dict(row)) for row in rows]
+    templates = template_data((row["template_id"] for row in rows), db)
+    return [_item_view(dict(row), templates.get(row["template_id"], {})) for row in rows]
+
+
+def get_item_details(item_id: str) -> Optional[dict]:
+    """One item with its full SRD stats (the on-demand half of the slim projection)."""
+    db = _db()
+    row = db.execute(f"SELECT {_ITEM_COLUMNS} FROM inventory_item WHERE id = ?", (item_id,)).fetchone()
+    if row is None:
+        return None
+    return _item_view(dict(row), template_data([row["template_id"]], db).get(row["template_id"], {}))
 
 
 def generate_loot(cr: int = 1) -> list[str]:
@@ -94,107 +207,56 @@ def generate_loot(cr: int = 1) -> list[str]:
     Generate random loot based on Challenge Rating.
     Returns a list of template_ids.
     """
-    db = get_db()
-    import random
-    
-    # Fetch all items to filter in python (dataset is small)
-    rows = db.execute("SELECT id, data_json FROM srd_mechanic WHERE type IN ('item', 'magic_item')").fetchall()
-    
-    candidates = []
-    for row in rows:
-        data = json.loads(row["data_json"])
-        rarity_raw = data.get("rarity", "Common")
-        rarity = rarity_raw.get("name", "Common") if isinstance(rarity_raw, dict) else rarity_raw
-        candidates.append({"id": row["id"], "rarity": rarity})
-    
-    if not candidates:
+    # Rarity buckets + alias tables are precomputed; each draw is O(1)
+    tables = loot_tables(get_db())
+    if not tables.size:
         return []
 
-    # Simple Tier Logic
-    # CR 0-4: Common
-    # CR 5-10: Uncommon
-    # CR 11-16: Rare
-    # CR 17+: Very Rare / Legendary
-    target_rarity = "Common"
-    if cr >= 17: target_rarity = "Very Rare"
-    elif cr >= 11: target_rarity = "Rare"
-    elif cr >= 5: target_rarity = "Uncommon"
-    
-    # Filter (allow lower tiers too)
-    possible = [c for c in candidates if c["rarity"] == target_rarity or c["rarity"] == "Common"]
-    if not possible:
-        possible = candidates # Fallback
-        
+    # Tiers: CR 0-4 Common, 5-10 Uncommon, 11-16 Rare, 17+ Very Rare (lower tiers allowed)
     # Count: 1d4 + CR/5
     count = max(1, roll(1, 4).total + (cr // 5))
-    
-    selected = random.choices(possible, k=count)
-    return [s["id"] for s in selected]
+    return tables.draw(cr_band(cr), count)
 
 def distribute_loot(target_character_id: str, item_ids: list[str]) -> list[dict]:
     """
     Add list of items to character's inventory and return the full item objects.
     """
-    db = get_db()
-    created_items = []
-    
-    for template_id in item_ids:
-        # Create
-        new_item = create_inventory_item(target_character_id, template_id)
-        
-        # Hydrate with SRD data for the event
-        row = db.execute("SELECT data_json FROM srd_mechanic WHERE id = ?", (template_id,)).fetchone()
-        srd_data = json.loads(row["data_json"]) if row and row["data_json"] else {}
-        rarity_raw = srd_data.get("rarity", "Common")
-        rarity_value = rarity_raw.get("name", "Common") if isinstance(rarity_raw, dict) else rarity_raw
-        
-        full_item = {
-            "instance_id": new_item["id"],
-            "template_id": template_id,
-            "name": srd_data.get("name", "Unknown Item"),
-            "location": new_item["location"],
-            "slot_type": None, # Default
-            "charges": 0,
-            "stats": srd_data,
-            "visual_asset_url": "",
-            "rarity": rarity_value,
-            "attunement": True if srd_data.get("requires_attunement") else False
-        }
-        created_items.append(full_item)
-        
-    return created_items
-
-def _ensure_gold_table():
-    db = get_db()
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS character_gold (
-            character_id TEXT PRIMARY KEY,
-            gold INTEGER NOT NULL DEFAULT 0
-        )
-    """)
-    db.commit()
+    return distribute_loot_many({target_character_id: item_ids})[target_character_id]
 
 
-def add_gold(character_id: str, amount: int) -> int:
-    """Add gold to a character's wallet. Returns new total."""
-    _ensure_gold_table()
-    db = get_db()
-    db.execute("""
-        INSERT INTO character_gold (character_id, gold) VALUES (?, ?)
-        ON CONFLICT(character_id) DO UPDATE SET gold = gold + excluded.gold
-    """, (character_id, max(0, amount)))
-    db.commit()
-    row = db.execute("SELECT gold FROM character_gold WHERE character_id = ?", (character_id,)).fetchone()
-    return row["gold"] if row else 0
-
-
-def get_gold(character_id: str) -> int:
-    """Return current gold balance for a character (0 if none recorded)."""
-    _ensure_gold_table()
-    row = get_db().execute(
-        "SELECT gold FROM character_gold WHERE character_id = ?", (character_id,)
-    ).fetchone()
-    return row["gold"] if row else 0
+def distribute_loot_many(assignments: Dict[str, list[str]]) -> Dict[str, list[dict]]:
+    """
+    Hand out a whole hoard (character_id -> template_ids) in one transaction
+    and one template lookup. Returns character_id -> full item objects.
+    """
+    pairs = [(character_id, t) for character_id, templates in assignments.items() for t in templates]
+    created = create_inventory_items(pairs)
+    templates = template_data((t for _, t in pairs))
+
+    result: Dict[str, list[dict]] = {character_id: [] for character_id in assignments}
+    for item in created:
+        result[item["character_id"]].append(_item_view(item, templates.get(item["template_id"], {})))
+    return result
+
+
+def transfer_items(from_character_id: str, to_character_id: str, item_ids: Sequence[str]) -> int:
+    """
+    Move item instances between characters in one statement. Equipped items
+    go to the recipient's backpack. Returns the number of items moved.
+    """
+    if not item_ids:
+        return 0
+    db = _db()
+    placeholders = ",".join("?" * len(item_ids))
+    with db:
+        cursor = db.execute(f"""
+            UPDATE inventory_item
+            SET character_id = ?, location = 'BACKPACK', slot_type = NULL, grid_index = 0
+            WHERE character_id = ? AND id IN ({placeholders})
+        """, (to_character_id, from_character_id, *item_ids))
+        if cursor.rowcount:
+            _bump_versions(db, [from_character_id, to_character_id])
+    return cursor.rowcount
 
 
 def equip_item(character_id: str, item_id: str, slot: str) -> dict:
@@ -202,46 +264,39 @@ def equip_item(character_id: str, item_id: str, slot: str) -> dict:
     Equip an item to a specific slot (e.g. 'main_hand', 'armor').
     If slot is occupied, unequip the current item first.
     """
-    db = get_db()
-    
-    # 1. Check if item exists and belongs to character
-    item = db.execute("SELECT id, location FROM inventory_item WHERE id = ? AND character_id = ?", (item_id, character_id)).fetchone()
-    if not item:
+    db = _db()
+
+    # One statement: equip the item and bump whatever held the slot back to the backpack.
+    # The EXISTS guard keeps the slot untouched if the item isn't this character's.
+    with db:
+        cursor = db.execute("""
+            UPDATE inventory_item
+            SET location   = CASE WHEN id = :item THEN 'EQUIPPED' ELSE 'BACKPACK' END,
+                slot_type  = CASE WHEN id = :item THEN :slot ELSE NULL END,
+                grid_index = CASE WHEN id = :item THEN NULL ELSE 0 END
+            WHERE character_id = :char
+              AND (id = :item OR (location = 'EQUIPPED' AND slot_type = :slot))
+              AND EXISTS (SELECT 1 FROM inventory_item WHERE id = :item AND character_id = :char)
+        """, {"item": item_id, "slot": slot, "char": character_id})
+        if cursor.rowcount:
+            _bump_versions(db, [character_id])
+    if cursor.rowcount == 0:
         raise ValueError("Item not found or does not belong to character.")
-        
-    # 2. Check if specific slot is occupied
-    existing = db.execute(
-        "SELECT id FROM inventory_item WHERE character_id = ? AND location = 'EQUIPPED' AND slot_type = ?", 
-        (character_id, slot)
-    ).fetchone()
-    
-    if existing:
-        # Move existing item to backpack
-        db.execute(
-            "UPDATE inventory_item SET location = 'BACKPACK', slot_type = NULL, grid_index = 0 WHERE id = ?", 
-            (existing["id"],)
-        )
-        
-    # 3. Equip new item
-    db.execute(
-        "UPDATE inventory_item SET location = 'EQUIPPED', slot_type = ?, grid_index = NULL WHERE id = ?", 
-        (slot, item_id)
-    )
-    db.commit()
-    
+
     return {"message": f"Equipped item {item_id} to {slot}"}
 
 def unequip_item(character_id: str, item_id: str) -> dict:
     """
     Unequip an item, moving it back to 'backpack'.
     """
-    db = get_db()
-    
-    db.execute(
-        "UPDATE inventory_item SET location = 'BACKPACK', slot_type = NULL, grid_index = 0 WHERE id = ? AND character_id = ?", 
-        (item_id, character_id)
-    )
-    db.commit()
+    db = _db()
+    with db:
+        cursor = db.execute(
+            "UPDATE inventory_item SET location = 'BACKPACK', slot_type = NULL, grid_index = 0 WHERE id = ? AND character_id = ?",
+            (item_id, character_id)
+        )
+        if cursor.rowcount:
+            _bump_versions(db, [character_id])
     
     return {"message": f"Unequipped item {item_id}"}
 
@@ -0,0 +1,121 @@
+"""
+Dungeon Cortex — Gold Ledger
+Append-only currency ledger with a cached running balance per character.
+
+  - Tables come from migration 004.
+  - gold_ledger: one row per leg, grouped by txn_id, with the balance after
+    the leg so any wallet can be audited from its history.
+  - character_gold: the running balance, updated in the same transaction;
+    reads are a single primary-key lookup.
+  - post() applies any number of legs atomically. Rewards mint gold (positive
+    legs only), transfers and purchases are balanced, and a debit never
+    overdraws: the whole transaction rolls back instead.
+"""
+
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+from uuid import uuid4
+
+from .db import get_db
+from .migrations import migrate
+
+
+class InsufficientFunds(ValueError):
+    pass
+
+
+def _db() -> sqlite3.Connection:
+    db = get_db()
+    migrate(db)
+    return db
+
+
+def post(legs: Iterable[Tuple[str, int]], reason: str = "") -> Dict[str, int]:
+    """
+    Apply (character_id, delta) legs in one transaction and return the new
+    balance of every character touched. Legs for the same character are
+    netted first. Raises InsufficientFunds (nothing applied) on overdraft.
+    """
+    net: Dict[str, int] = defaultdict(int)
+    for character_id, delta in legs:
+        net[character_id] += int(delta)
+    net = {c: d for c, d in net.items() if d}
+    if not net:
+        return {}
+
+    db = _db()
+    txn_id = uuid4().hex
+    balances: Dict[str, int] = {}
+    with db:
+        # Debits first so an overdraft aborts before anything is credited
+        for character_id, delta in sorted(net.items(), key=lambda leg: leg[1]):
+            if delta < 0:
+                row = db.execute("""
+                    UPDATE character_gold SET gold = gold + ?
+                    WHERE character_id = ? AND gold + ? >= 0
+                    RETURNING gold
+                """, (delta, character_id, delta)).fetchone()
+                if row is None:
+                    raise InsufficientFunds(f"{character_id} cannot pay {-delta} gp")
+            else:
+                row = db.execute("""
+                    INSERT INTO character_gold (character_id, gold) VALUES (?, ?)
+                    ON CONFLICT(character_id) DO UPDATE SET gold = gold + excluded.gold
+                    RETURNING gold
+                """, (character_id, delta)).fetchone()
+            balances[character_id] = row[0]
+        db.executemany(
+            "INSERT INTO gold_ledger (txn_id, character_id, delta, balance_after, reason) VALUES (?, ?, ?, ?, ?)",
+            [(txn_id, c, net[c], balances[c], reason) for c in balances]
+        )
+    return balances
+
+
+def add_gold(character_id: str, amount: int, reason: str = "reward") -> int:
+    """Add gold to a character's wallet. Returns new total."""
+    amount = max(0, amount)
+    if not amount:
+        return get_gold(character_id)
+    return post([(character_id, amount)], reason)[character_id]
+
+
+def get_gold(character_id: str) -> int:
+    """Return current gold balance for a character (0 if none recorded)."""
+    row = _db().execute(
+        "SELECT gold FROM character_gold WHERE character_id = ?", (character_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def transfer(from_character_id: str, to_character_id: str, amount: int, reason: str = "transfer") -> Dict[str, int]:
+    """Move gold between wallets (shop purchases, payments). Atomic; never overdraws."""
+    if amount <= 0:
+        raise ValueError("Transfer amount must be positive")
+    return post([(from_character_id, -amount), (to_character_id, amount)], reason)
+
+
+def split_shares(amount: int, character_ids: List[str]) -> List[Tuple[str, int]]:
+    """Even split as ledger legs; the remainder goes to the first characters."""
+    if not character_ids:
+        return []
+    share, remainder = divmod(amount, len(character_ids))
+    return [(c, share + (1 if i < remainder else 0)) for i, c in enumerate(character_ids)]
+
+
+def settle(awards: Dict[str, int], reason: str = "settlement") -> Dict[str, int]:
+    """Credit a batch of rewards (e.g. a party's share at combat end) in one transaction."""
+    return post(((c, max(0, a)) for c, a in awards.items()), reason)
+
+
+def history(character_id: str, limit: int = 50) -> List[dict]:
+    """Most recent ledger entries for a character, newest first."""
+    rows = _db().execute("""
+        SELECT txn_id, delta, balance_after, reason, created_at
+        FROM gold_ledger WHERE character_id = ?
+        ORDER BY id DESC LIMIT ?
+    """, (character_id, limit)).fetchall()
+    return [
+        {"txn_id": r[0], "delta": r[1], "balance_after": r[2], "reason": r[3], "created_at": r[4]}
+        for r in rows
+    ]
@@ -0,0 +1,118 @@
+"""
+Dungeon Cortex — Precomputed Loot Tables
+Item templates from srd_mechanic bucketed by rarity once, with O(1) draws.
+
+  - CR bands (shared with the Treasurer) map to a target rarity; a band's
+    pool is its rarity plus Common items, as before.
+  - Each band holds an alias table (Vose) over its rarities, weighted by
+    item count, so a draw is: pick rarity in O(1), then a uniform index.
+    That is exactly a uniform draw over the band's pool.
+  - Tables are rebuilt only when the SRD changes: a different connection,
+    a commit from another connection (PRAGMA data_version, e.g. an SRD
+    import script) or an explicit invalidate_loot_tables().
+"""
+
+import json
+import random
+import sqlite3
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+# CR band thresholds: 0-4, 5-10, 11-16, 17+
+CR_BAND_THRESHOLDS = (5, 11, 17)
+CR_BANDS = ("0-4", "5-10", "11-16", "17+")
+BAND_RARITY = {"0-4": "Common", "5-10": "Uncommon", "11-16": "Rare", "17+": "Very Rare"}
+
+
+def cr_band(cr: float) -> str:
+    return CR_BANDS[bisect_right(CR_BAND_THRESHOLDS, cr)]
+
+
+def item_rarity(data: dict) -> str:
+    rarity_raw = data.get("rarity", "Common")
+    return rarity_raw.get("name", "Common") if isinstance(rarity_raw, dict) else rarity_raw
+
+
+class AliasTable:
+    """Walker/Vose alias method: O(n) build, O(1) weighted sampling."""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("AliasTable needs at least one weight")
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Leftovers are 1.0 up to float error
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, rng: random.Random = random) -> int:
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class LootTables:
+    def __init__(self, items: Dict[str, str]):
+        """`items` maps template_id -> rarity."""
+        self.by_rarity: Dict[str, List[str]] = {}
+        for template_id, rarity in items.items():
+            self.by_rarity.setdefault(rarity, []).append(template_id)
+        self.size = len(items)
+
+        all_rarities = list(self.by_rarity)
+        self._bands: Dict[str, tuple] = {}
+        for band, target in BAND_RARITY.items():
+            rarities = [r for r in dict.fromkeys((target, "Common")) if r in self.by_rarity]
+            if not rarities:
+                rarities = all_rarities  # Fallback: anything
+            if rarities:
+                weights = [len(self.by_rarity[r]) for r in rarities]
+                self._bands[band] = ([self.by_rarity[r] for r in rarities], AliasTable(weights))
+
+    @classmethod
+    def from_db(cls, db: sqlite3.Connection) -> "LootTables":
+        rows = db.execute("SELECT id, data_json FROM srd_mechanic WHERE type IN ('item', 'magic_item')").fetchall()
+        return cls({row["id"]: item_rarity(json.loads(row["data_json"] or "{}")) for row in rows})
+
+    def draw(self, band: str, count: int, rng: random.Random = random) -> List[str]:
+        entry = self._bands.get(band)
+        if entry is None:
+            return []
+        buckets, table = entry
+        picks = []
+        for _ in range(count):
+            bucket = buckets[table.sample(rng)]
+            picks.append(bucket[int(rng.random() * len(bucket))])
+        return picks
+
+
+_cached: Optional[LootTables] = None
+_cached_conn: Optional[sqlite3.Connection] = None
+_cached_version: Optional[int] = None
+
+
+def loot_tables(db: sqlite3.Connection) -> LootTables:
+    """Tables for `db`, rebuilt only when the SRD may have changed."""
+    global _cached, _cached_conn, _cached_version
+    version = db.execute("PRAGMA data_version").fetchone()[0]
+    if _cached is None or _cached_conn is not db or _cached_version != version:
+        _cached = LootTables.from_db(db)
+        _cached_conn, _cached_version = db, version
+    return _cached
+
+
+def invalidate_loot_tables():
+    """Call after writing srd_mechanic on the shared connection."""
+    global _cached
+    _cached = None
@@ -0,0 +1,268 @@
+"""
+Dungeon Cortex — Line of Sight & Cover
+Grid visibility for the tactical map (obstacle layer of TacticalGrid).
+
+  - Visibility fields use symmetric recursive shadowcasting: if A sees B,
+    B sees A. Fields are cached per origin cell and terrain revision, and
+    per token so a token's field is only recomputed after it moves.
+  - Cover follows the DMG grid rule: from the attacker corner that gives the
+    least cover, trace lines to the four corners of the target's square.
+    1-2 blocked = half cover (+2 AC), 3 = three-quarters (+5 AC),
+    4 = total cover (cannot be targeted).
+  - Attacks by an unseen attacker have advantage; attacks against an unseen
+    target have disadvantage. Only one-sided concealment counts: a blocked
+    sight line hides both sides and the two cancel.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fractions import Fraction
+from math import ceil, floor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .tactical import TacticalGrid, Cell
+
+FIELD_CACHE_SIZE = 256
+
+COVER_NONE = "none"
+COVER_HALF = "half"
+COVER_THREE_QUARTERS = "three_quarters"
+COVER_TOTAL = "total"
+COVER_AC_BONUS = {COVER_NONE: 0, COVER_HALF: 2, COVER_THREE_QUARTERS: 5, COVER_TOTAL: 0}
+
+
+# ----------------------------------------------------------------------
+# SHADOWCASTING
+# ----------------------------------------------------------------------
+
+def _round_ties_up(n: Fraction) -> int:
+    return floor(n + Fraction(1, 2))
+
+
+def _round_ties_down(n: Fraction) -> int:
+    return ceil(n - Fraction(1, 2))
+
+
+def _transform(quadrant: int, origin: Cell, depth: int, col: int) -> Cell:
+    ox, oy = origin
+    if quadrant == 0:    # north
+        return ox + col, oy - depth
+    if quadrant == 1:    # south
+        return ox + col, oy + depth
+    if quadrant == 2:    # east
+        return ox + depth, oy + col
+    return ox - depth, oy + col  # west
+
+
+def compute_field(grid: TacticalGrid, origin: Cell, radius: Optional[int] = None) -> bytearray:
+    """Visible cells from `origin` as a flat width*height bytearray (1 = visible)."""
+    width, height = grid.width, grid.height
+    visible = bytearray(width * height)
+    visible[origin[1] * width + origin[0]] = 1
+    max_depth = radius if radius is not None else max(width, height)
+
+    def blocking(cell: Cell) -> bool:
+        x, y = cell
+        return not (0 <= x < width and 0 <= y < height) or bool(grid.blocked[y * width + x])
+
+    def reveal(cell: Cell):
+        x, y = cell
+        if 0 <= x < width and 0 <= y < height:
+            visible[y * width + x] = 1
+
+    for quadrant in range(4):
+        # Rows as (depth, start_slope, end_slope); iterative to avoid recursion limits
+        rows = [(1, Fraction(-1), Fraction(1))]
+        while rows:
+            depth, start_slope, end_slope = rows.pop()
+            if depth > max_depth:
+                continue
+            prev_wall: Optional[bool] = None
+            min_col = _round_ties_up(depth * start_slope)
+            max_col = _round_ties_down(depth * end_slope)
+            for col in range(min_col, max_col + 1):
+                cell = _transform(quadrant, origin, depth, col)
+                wall = blocking(cell)
+                if wall or (depth * start_slope <= col <= depth * end_slope):
+                    reveal(cell)
+                if prev_wall and not wall:
+                    start_slope = Fraction(2 * col - 1, 2 * depth)
+                if prev_wall is False and wall:
+                    rows.append((depth + 1, start_slope, Fraction(2 * col - 1, 2 * depth)))
+                prev_wall = wall
+            if prev_wall is False:
+                rows.append((depth + 1, start_slope, end_slope))
+    return visible
+
+
+# ----------------------------------------------------------------------
+# COVER
+# ----------------------------------------------------------------------
+
+def _blocked_segments(grid: TacticalGrid, starts: np.ndarray, ends: np.ndarray,
+                      ignore: Tuple[Cell, ...]) -> np.ndarray:
+    """
+    For each segment (start[i] -> end[i], grid-corner coordinates) report whether
+    it passes through an obstacle (Liang-Barsky, vectorized over the obstacles in
+    the segments' bounding box). Grazing a lone pillar's edge or corner does not
+    block, but the seam between two adjacent obstacles does, so walls are solid.
+    """
+    lo = np.floor(np.minimum(starts.min(axis=0), ends.min(axis=0))).astype(int) - 1
+    hi = np.ceil(np.maximum(starts.max(axis=0), ends.max(axis=0))).astype(int) + 1
+    x0, y0 = max(lo[0], 0), max(lo[1], 0)
+    x1, y1 = min(hi[0], grid.width), min(hi[1], grid.height)
+    if x0 >= x1 or y0 >= y1:
+        return np.zeros(len(starts), dtype=bool)
+
+    window = np.frombuffer(bytes(grid.blocked), dtype=np.uint8).reshape(grid.height, grid.width)[y0:y1, x0:x1].copy()
+    for cx, cy in ignore:
+        if x0 <= cx < x1 and y0 <= cy < y1:
+            window[cy - y0, cx - x0] = 0
+    ys, xs = np.nonzero(window)
+    if not len(xs):
+        return np.zeros(len(starts), dtype=bool)
+
+    # Obstacle squares, plus thin boxes straddling every shared edge between two obstacles
+    hy, hx = np.nonzero(window[:, :-1] & window[:, 1:])
+    vy, vx = np.nonzero(window[:-1, :] & window[1:, :])
+    rx0 = np.concatenate([xs, hx + 0.5, vx]) + x0
+    ry0 = np.concatenate([ys, hy, vy + 0.5]) + y0
+    rx1 = rx0 + 1
+    ry1 = ry0 + 1
+
+    # Open rectangles: touching a boundary is not passing through
+    eps = 1e-6
+    bx0, bx1 = rx0[None, :] + eps, rx1[None, :] - eps
+    by0, by1 = ry0[None, :] + eps, ry1[None, :] - eps
+    px, py = starts[:, 0:1], starts[:, 1:2]
+    dx, dy = ends[:, 0:1] - px, ends[:, 1:2] - py
+
+    shape = (len(starts), len(rx0))
+    t_enter = np.zeros(shape)
+    t_exit = np.ones(shape)
+    ok = np.ones(shape, dtype=bool)
+    for p, q0, q1 in ((dx, px - bx0, bx1 - px), (dy, py - by0, by1 - py)):
+        p = np.broadcast_to(p, shape)
+        parallel = np.abs(p) < 1e-12
+        ok &= ~(parallel & ((q0 < 0) | (q1 < 0)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ta = np.where(parallel, -np.inf, -q0 / p)
+            tb = np.where(parallel, np.inf, q1 / p)
+        t_enter = np.maximum(t_enter, np.minimum(ta, tb))
+        t_exit = np.minimum(t_exit, np.maximum(ta, tb))
+    return (ok & (t_enter < t_exit)).any(axis=1)
+
+
+def cover_between(grid: TacticalGrid, attacker: Cell, target: Cell) -> str:
+    """Cover the target has against the attacker (DMG corner-to-corner rule)."""
+    if attacker == target:
+        return COVER_NONE
+    corners = np.array([(0, 0), (1, 0), (0, 1), (1, 1)], dtype=np.float64)
+    attacker_corners = corners + attacker
+    target_corners = corners + target
+
+    starts = np.repeat(attacker_corners, 4, axis=0)
+    ends = np.tile(target_corners, (4, 1))
+    blocked = _blocked_segments(grid, starts, ends, ignore=(attacker, target)).reshape(4, 4)
+    fewest = int(blocked.sum(axis=1).min())
+    if fewest == 0:
+        return COVER_NONE
+    if fewest <= 2:
+        return COVER_HALF
+    if fewest == 3:
+        return COVER_THREE_QUARTERS
+    return COVER_TOTAL
+
+
+# ----------------------------------------------------------------------
+# CACHED LOS ENGINE
+# ----------------------------------------------------------------------
+
+@dataclass
+class AttackModifiers:
+    cover: str = COVER_NONE
+    ac_bonus: int = 0
+    advantage: bool = False
+    disadvantage: bool = False
+    can_target: bool = True
+    auto_crit: bool = False  # set from the target's conditions, not by LOS
+    tags: List[str] = field(default_factory=list)
+
+
+class LineOfSight:
+    def __init__(self, grid: TacticalGrid):
+        self.grid = grid
+        self._fields: "OrderedDict[tuple, bytearray]" = OrderedDict()
+        self._token_fields: Dict[str, Tuple[Cell, int, bytearray]] = {}
+
+    def field_from(self, cell: Cell) -> bytearray:
+        key = (cell, self.grid.terrain_revision, self.grid.width, self.grid.height)
+        cached = self._fields.get(key)
+        if cached is not None:
+            self._fields.move_to_end(key)
+            return cached
+        result = compute_field(self.grid, cell)
+        self._fields[key] = result
+        if len(self._fields) > FIELD_CACHE_SIZE:
+            self._fields.popitem(last=False)
+        return result
+
+    def field_for(self, token_id: str) -> Optional[bytearray]:
+        """A token's visibility field, recomputed only after it moves or terrain changes."""
+        cell = self.grid.cell_of(token_id)
+        if cell is None:
+            self._token_fields.pop(token_id, None)
+            return None
+        cached = self._token_fields.get(token_id)
+        if cached and cached[0] == cell and cached[1] == self.grid.terrain_revision:
+            return cached[2]
+        result = self.field_from(cell)
+        self._token_fields[token_id] = (cell, self.grid.terrain_revision, result)
+        return result
+
+    def can_see(self, viewer_id: str, target_id: str) -> bool:
+        """True if either token is off the grid (no positional information)."""
+        vis = self.field_for(viewer_id)
+        target = self.grid.cell_of(target_id)
+        if vis is None or target is None:
+            return True
+        return bool(vis[target[1] * self.grid.width + target[0]])
+
+    def visible_tokens(self, viewer_id: str) -> List[str]:
+        vis = self.field_for(viewer_id)
+        if vis is None:
+            return []
+        w = self.grid.width
+        return [tid for tid, (x, y) in self.grid.positions.items() if tid != viewer_id and vis[y * w + x]]
+
+    def attack_modifiers(
+        self, attacker_id: str, target_id: str, attacker_hidden: bool = False, target_hidden: bool = False
+    ) -> AttackModifiers:
+        """
+        Cover plus unseen-side advantage/disadvantage. Sight lines are
+        symmetric, so a blocked line hides both sides and the two cancel;
+        `attacker_hidden` / `target_hidden` (Invisible, heavily obscured, the
+        other side Blinded) are what make only one side unseen.
+        """
+        mods = AttackModifiers()
+        a_cell, t_cell = self.grid.cell_of(attacker_id), self.grid.cell_of(target_id)
+        blocked = False
+        if a_cell is not None and t_cell is not None:
+            mods.cover = cover_between(self.grid, a_cell, t_cell)
+            mods.ac_bonus = COVER_AC_BONUS[mods.cover]
+            mods.can_target = mods.cover != COVER_TOTAL
+            if mods.cover != COVER_NONE:
+                mods.tags.append(f"{mods.cover}_cover")
+            blocked = not self.can_see(attacker_id, target_id)
+
+        attacker_unseen = blocked or attacker_hidden
+        target_unseen = blocked or target_hidden
+        if attacker_unseen and not target_unseen:
+            mods.advantage = True
+            mods.tags.append("unseen_attacker")
+        elif target_unseen and not attacker_unseen:
+            mods.disadvantage = True
+            mods.tags.append("unseen_target")
+        return mods
@@ -1,10 +1,15 @@
 import os
-import subprocess
-from typing import List, Dict, Optional
+import re
+import uuid
+import asyncio
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, List, Dict, Optional, Tuple
 from pydantic import BaseModel
 import logging
 from pathlib import Path
-from .visibility import VisibilityManager
+from .visibility import VisibilityManager, VisibilityRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -79,78 +84,364 @@ WORLD_GRAPH = {
     )
 }
 
+# Bounded pool for browser captures; each one launches a Playwright browser
+CAPTURE_WORKERS = 2
+CAPTURE_TIMEOUT = 120.0
+CAPTURE_JOB_TTL = 3600.0  # finished jobs stay queryable this long
+
+
+@dataclass
+class CaptureJob:
+    job_id: str
+    node_id: str
+    seed: str
+    viewers: Tuple[str, ...] = ()  # Fog of these characters; () = world fog
+    status: str = "queued"  # queued | running | done | failed
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    cached: bool = False
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.job_id,
+            "node_id": self.node_id,
+            "seed": self.seed,
+            "viewers": list(self.viewers),
+            "status": self.status,
+            "cached": self.cached,
+            "error": self.error,
+        }
+        if self.result:
+            data.update(self.result)
+        return data
+
+
 class MapManager:
-    def __init__(self, external_sources_path: str):
+    def __init__(
+        self,
+        external_sources_path: str,
+        registry: Optional[VisibilityRegistry] = None,
+        output_dir: Optional[str] = None,
+    ):
         self.fmg_path = os.path.join(external_sources_path, "fantasy-map-generator")
-        self.output_base_path = os.path.join(os.getcwd(), "apps", "web-client", "public", "generated")
+        # Served by the web client as /generated; MAP_OUTPUT_DIR moves it (tests, deployments)
+        self.output_base_path = str(
+            output_dir or os.getenv("MAP_OUTPUT_DIR")
+            or os.path.join(os.getcwd(), "apps", "web-client", "public", "generated")
+        )
         os.makedirs(self.output_base_path, exist_ok=True)
-        
-        # Initialize Visibility Manager
-        self.mask_path = os.path.join(self.output_base_path, "world_mask.png")
+
+        # Fog of War is persisted as mask tiles; masked maps are served as tiles too
+        self.mask_path = os.path.join(self.output_base_path, "world_mask.png")  # legacy single-file mask
+        self.mask_tile_dir = Path(self.output_base_path) / "fog"
+        self.map_tile_dir = Path(self.output_base_path) / "tiles"
+        # Raw (unmasked) captures, keyed by (azgaar cell id, seed); fog changes never invalidate them
+        self.raw_cache_dir = Path(self.output_base_path) / "raw"
+        # (node_id, viewers) -> (raw capture path, raw mtime, mask revision) at last composition
+        self._composed: Dict[Tuple[str, Tuple[str, ...]], Tuple[Path, float, int]] = {}
+
+        # Capture job queue
+        self.jobs: Dict[str, CaptureJob] = {}
+        self._active_jobs: Dict[Tuple[str, str, Tuple[str, ...]], CaptureJob] = {}  # (node_id, seed, viewers) -> pending job
+        self._inflight: Dict[Path, asyncio.Task] = {}  # raw path -> running browser capture
+        self._job_tasks: set[asyncio.Task] = set()  # Strong refs so queued jobs aren't garbage-collected
+        self._capture_semaphore: Optional[asyncio.Semaphore] = None
+        # Masking runs in worker threads as well as inline on reveal
+        self._compose_lock = threading.RLock()
+
+        # Initialize Visibility Manager (world fog) and per-viewer masks
         self.visibility = VisibilityManager()
-        if os.path.exists(self.mask_path):
+        self.registry = registry
+        if self.visibility.load_mask_tiles(self.mask_tile_dir):
+            pass
+        elif os.path.exists(self.mask_path):
             self.visibility.load_mask(Path(self.mask_path))
+            self.visibility.save_mask_tiles(self.mask_tile_dir)
         else:
             # Initial reveal: start_town
-            from .maps import WORLD_GRAPH # Local import to avoid circular dependency if needed
             start_node = WORLD_GRAPH.get("start_town")
             if start_node:
                 self.visibility.reveal_area(start_node.coordinates["x"], start_node.coordinates["y"])
-            self.visibility.save_mask(Path(self.mask_path))
+            self.visibility.save_mask_tiles(self.mask_tile_dir)
 
-    def capture_node(self, node_id: str, seed: str = "antigravity_v1") -> Optional[str]:
-        node = WORLD_GRAPH.get(node_id)
-        if not node or node.azgaar_cell_id is None:
-            logger.error(f"Node {node_id} has no Azgaar mapping.")
-            return None
+    def _viewers(self, viewer_ids: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        """Canonical viewer key; without a registry every capture uses the world fog."""
+        if self.registry is None or not viewer_ids:
+            return ()
+        return tuple(sorted(set(viewer_ids)))
 
-        # Ensure the current node is revealed
-        self.visibility.reveal_area(node.coordinates["x"], node.coordinates["y"])
-        self.visibility.save_mask(Path(self.mask_path))
-
-        raw_filename = f"raw_{node_id}.png"
-        masked_filename = f"map_{node_id}.png"
-        raw_path = os.path.join(self.output_base_path, raw_filename)
-        masked_path = os.path.join(self.output_base_path, masked_filename)
-        
-        # Prepare environment for Playwright
-        env = os.environ.copy()
-        env["CELL_ID"] = str(node.azgaar_cell_id)
-        env["MAP_SEED"] = seed
-        env["OUTPUT_PATH"] = raw_path
-
-        logger.info(f"Triggering map capture for {node_id} (Cell: {node.azgaar_cell_id})")
-        
-        try:
-            # Run the playwright test to get raw capture
-            subprocess.run(
-                ["npx", "playwright", "test", "tests/e2e/capture.spec.ts"],
+    @staticmethod
+    def _output_name(node_id: str, viewers: Tuple[str, ...]) -> str:
+        if not viewers:
+            return f"map_{node_id}"
+        return f"map_{node_id}__" + re.sub(r"[^A-Za-z0-9_+-]+", "_", "+".join(viewers))
+
+    def _compose(self, node_id: str, raw_path: Path, viewers: Tuple[str, ...] = ()) -> dict:
+        """
+        Re-mask a node's raw capture with the fog of `viewers` (their party
+        view in the registry) or, without viewers, the world fog. A new
+        capture is composed in full; otherwise only tiles touched by reveals
+        since the last pass are redrawn.
+        """
+        with self._compose_lock:
+            return self._compose_locked(node_id, raw_path, viewers)
+
+    def _compose_locked(self, node_id: str, raw_path: Path, viewers: Tuple[str, ...]) -> dict:
+        name = self._output_name(node_id, viewers)
+        masked_filename = f"{name}.png"
+        view = self.registry.view(list(viewers)) if viewers else None
+        revision = (view or self.visibility).revision
+        raw_mtime = raw_path.stat().st_mtime
+        previous = self._composed.get((node_id, viewers))
+        full = previous is None or previous[:2] != (raw_path, raw_mtime)
+
+        if full:
+            # Whole-image output kept for clients that don't assemble tiles
+            self.visibility.apply_mask(raw_path, Path(self.output_base_path) / masked_filename, view=view)
+        diffs = self.visibility.apply_mask_tiles(
+            raw_path, self.map_tile_dir, name,
+            since_revision=None if full else previous[2], view=view,
+        )
+        self._composed[(node_id, viewers)] = (raw_path, raw_mtime, revision)
+        self._trim_reveal_logs()
+
+        return {
+            "image_url": f"/generated/{masked_filename}",
+            "tile_base_url": "/generated/tiles",
+            "manifest_url": f"/generated/tiles/{name}.json",
+            "revision": revision,
+            "full": full,
+            "tiles": diffs,
+        }
+
+    def _trim_reveal_logs(self):
+        """Keep only the reveals some composed map has not been redrawn with yet."""
+        world = [rev for (_, viewers), (_, _, rev) in self._composed.items() if not viewers]
+        self.visibility.trim_reveal_log(min(world, default=self.visibility.revision))
+        if self.registry is not None:
+            views = [rev for (_, viewers), (_, _, rev) in self._composed.items() if viewers]
+            self.registry.reveal_log.trim(min(views, default=self.registry.revision))
+
+    def reveal_node(self, node_id: str, viewer_id: Optional[str] = None) -> Dict[str, List[dict]]:
+        """
+        Reveal the fog around a node and recomposite the touched tiles of every
+        map already rendered (world and per-viewer). With `viewer_id` (and a
+        registry) only that viewer's own mask is revealed; otherwise the shared
+        world fog is, and its touched mask tiles are persisted.
+        Runs in worker threads: all fog state changes under the compose lock.
+        Returns {map name: tile diffs}.
+        """
+        node = get_node(node_id)
+        if not node:
+            return {}
+        x, y = node.coordinates["x"], node.coordinates["y"]
+
+        with self._compose_lock:
+            if viewer_id and self.registry is not None:
+                self.registry.reveal(viewer_id, x, y)
+            else:
+                self.visibility.reveal_area(x, y)
+                self.visibility.save_mask_tiles(self.mask_tile_dir)
+
+            updates = {}
+            for (composed_id, viewers), (raw_path, _, _) in list(self._composed.items()):
+                if raw_path.exists():
+                    tiles = self._compose(composed_id, raw_path, viewers)["tiles"]
+                    updates[self._output_name(composed_id, viewers)] = tiles
+            return updates
+
+    def raw_capture_path(self, cell_id: int, seed: str) -> Path:
+        seed_slug = re.sub(r"[^A-Za-z0-9_-]+", "_", seed) or "default"
+        return self.raw_cache_dir / f"cell_{cell_id}_{seed_slug}.png"
+
+    async def _run_browser_capture(self, cell_id: int, seed: str, raw_path: Path):
+        """Run the Playwright capture without blocking the event loop."""
+        if self._capture_semaphore is None:
+            self._capture_semaphore = asyncio.Semaphore(CAPTURE_WORKERS)
+
+        async with self._capture_semaphore:
+            if raw_path.exists():
+                return
+            raw_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = raw_path.with_suffix(".tmp.png")
+
+            # Prepare environment for Playwright
+            env = os.environ.copy()
+            env["CELL_ID"] = str(cell_id)
+            env["MAP_SEED"] = seed
+            env["OUTPUT_PATH"] = str(tmp_path)
+
+            proc = await asyncio.create_subprocess_exec(
+                "npx", "playwright", "test", "tests/e2e/capture.spec.ts",
                 cwd=self.fmg_path,
                 env=env,
-                capture_output=True,
-                text=True,
-                check=True
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
-            
-            # Apply Fog of War mask
-            self.visibility.apply_mask(Path(raw_path), Path(masked_path))
-            
-            logger.info("Map capture and masking successful.")
-            return f"/generated/{masked_filename}"
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Map capture failed: {e.stderr}")
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=CAPTURE_TIMEOUT)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise RuntimeError(f"capture timed out after {CAPTURE_TIMEOUT:.0f}s")
+            if proc.returncode != 0 or not tmp_path.exists():
+                raise RuntimeError(stderr.decode(errors="replace").strip() or f"exit code {proc.returncode}")
+            # Publish atomically so a half-written PNG is never cached
+            os.replace(tmp_path, raw_path)
+
+    async def _run_job(self, job: CaptureJob, raw_path: Path):
+        try:
+            capture = self._inflight.get(raw_path)
+            if capture is None and not raw_path.exists():
+                node = get_node(job.node_id)
+                capture = asyncio.create_task(self._run_browser_capture(node.azgaar_cell_id, job.seed, raw_path))
+                self._inflight[raw_path] = capture
+                capture.add_done_callback(lambda _t: self._inflight.pop(raw_path, None))
+            if capture is not None:
+                job.status = "running"
+                await capture
+
+            # Apply Fog of War mask (tiled, incremental) off the event loop
+            job.result = await asyncio.to_thread(self._compose, job.node_id, raw_path, job.viewers)
+            job.status = "done"
+            logger.info(f"Map capture and masking successful for {job.node_id}.")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Map capture failed for {job.node_id}: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._active_jobs.pop((job.node_id, job.seed, job.viewers), None)
+
+    async def capture_node(self, node_id: str, seed: str = "antigravity_v1",
+                           viewer_id: Optional[str] = None,
+                           party_ids: Optional[Iterable[str]] = None) -> Optional[CaptureJob]:
+        """
+        Queue a map capture for a node and return its job.
+        The map is masked with what `party_ids` (or else `viewer_id`) have
+        explored; with neither it gets the world fog.
+        A cached raw capture is only re-masked (the job completes immediately);
+        a repeated request for a pending (node, seed, viewers) returns the same job.
+        """
+        node = get_node(node_id)
+        if not node or node.azgaar_cell_id is None:
+            logger.error(f"Node {node_id} has no Azgaar mapping.")
             return None
 
+        # Ensure the current node is revealed (recompositing takes the compose lock: off the loop)
+        await asyncio.to_thread(self.reveal_node, node_id, viewer_id)
+
+        viewers = self._viewers(party_ids or ([viewer_id] if viewer_id else None))
+        self._prune_jobs()
+        pending = self._active_jobs.get((node_id, seed, viewers))
+        if pending is not None:
+            return pending
+
+        raw_path = self.raw_capture_path(node.azgaar_cell_id, seed)
+        job = CaptureJob(job_id=uuid.uuid4().hex[:12], node_id=node_id, seed=seed, viewers=viewers)
+        self.jobs[job.job_id] = job
+
+        if raw_path.exists() and raw_path not in self._inflight:
+            job.cached = True
+            await self._run_job(job, raw_path)
+            return job
+
+        logger.info(f"Queueing map capture for {node_id} (Cell: {node.azgaar_cell_id})")
+        self._active_jobs[(node_id, seed, viewers)] = job
+        task = asyncio.create_task(self._run_job(job, raw_path))
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+        return job
+
+    def _prune_jobs(self):
+        cutoff = time.time() - CAPTURE_JOB_TTL
+        for job_id in [j.job_id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[CaptureJob]:
+        return self.jobs.get(job_id)
+
+# Bumped on every topology change so derived data (route tables) can invalidate
+_graph_revision = 0
+
+# WORLD_GRAPH doubles as the in-memory node cache; the DB (world_store) is the source of truth
+_world_store = None
+
+def get_world_store():
+    """Lazily open the world store, seeding it with the built-in Known World."""
+    global _world_store
+    if _world_store is None:
+        from .world_store import WorldStore
+        _world_store = WorldStore()
+        _world_store.seed(WORLD_GRAPH.values())
+    return _world_store
+
+def graph_revision() -> int:
+    return _graph_revision
+
+def upsert_node(node: MapNode):
+    """Add or replace a node (connections are taken as given, not mirrored)."""
+    global _graph_revision
+    get_world_store().upsert(node)
+    WORLD_GRAPH[node.id] = node
+    _graph_revision += 1
+
+def link_nodes(a_id: str, b_id: str):
+    """Connect two existing nodes in both directions (KeyError if either is unknown)."""
+    global _graph_revision
+    a, b = get_node(a_id), get_node(b_id)
+    if a is None or b is None:
+        raise KeyError(a_id if a is None else b_id)
+    if b_id not in a.connections:
+        a.connections.append(b_id)
+    if a_id not in b.connections:
+        b.connections.append(a_id)
+    get_world_store().link(a_id, b_id)
+    _graph_revision += 1
+
+def remove_node(node_id: str):
+    """Drop a node and every connection pointing at it."""
+    global _graph_revision
+    get_world_store().remove(node_id)
+    WORLD_GRAPH.pop(node_id, None)
+    for node in WORLD_GRAPH.values():
+        if node_id in node.connections:
+            node.connections.remove(node_id)
+    _graph_revision += 1
+
 def get_node(node_id: str) -> Optional[MapNode]:
-    return WORLD_GRAPH.get(node_id)
+    node = WORLD_GRAPH.get(node_id)
+    if node is None:
+        node = get_world_store().get(node_id)
+        if node is not None:
+            WORLD_GRAPH[node_id] = node
+    return node
+
+def get_node_by_cell(cell_id: int) -> Optional[MapNode]:
+    """Resolve an Azgaar cell id to its world node (indexed lookup)."""
+    node = get_world_store().get_by_cell(cell_id)
+    if node is not None:
+        node = WORLD_GRAPH.setdefault(node.id, node)
+    return node
+
+def get_nodes_in_viewport(min_x: float, min_y: float, max_x: float, max_y: float,
+                          limit: Optional[int] = None) -> List[MapNode]:
+    """Nodes inside a bounding box (map percent), via the spatial index."""
+    store = get_world_store()
+    if limit is None:
+        return store.in_bbox(min_x, min_y, max_x, max_y)
+    return store.in_bbox(min_x, min_y, max_x, max_y, limit=limit)
 
 def get_all_nodes() -> List[MapNode]:
-    return list(WORLD_GRAPH.values())
+    return get_world_store().all()
 
-def calculate_h_cost(start_id: str, end_id: str) -> float:
+def calculate_h_cost(start_id: str, end_id: str, graph: Optional[Dict[str, MapNode]] = None) -> float:
     """Heuristic for pathfinding (Euclidean distance)."""
-    start = WORLD_GRAPH.get(start_id)
-    end = WORLD_GRAPH.get(end_id)
+    graph = WORLD_GRAPH if graph is None else graph
+    start = graph.get(start_id)
+    end = graph.get(end_id)
     if not start or not end:
         return float('inf')
     
@@ -0,0 +1,378 @@
+"""
+Dungeon Cortex — Schema Migrations
+Ordered, versioned schema changes for the engine database.
+
+  - schema_version records each applied migration (version, name, applied_at).
+  - migrate(db) applies only the pending ones, each inside its own savepoint,
+    and costs a single SELECT once a connection is current.
+  - Migrations adopt databases created before versioning existed: tables use
+    IF NOT EXISTS and columns are only added when missing.
+  - Secondary indexes live here, not in runtime DDL.
+
+The SRD tables (srd_mechanic, ...) are produced by the import pipeline and
+are not created here. The SRD's
+materialized filter columns and its search index are shared with the
+pipeline: see ensure_srd_columns() and srd_search.rebuild_search_index().
+"""
+
+import json
+import sqlite3
+from typing import Callable, List, NamedTuple, Optional
+
+from .db_utils import get_json_extract_sql
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _columns(db: sqlite3.Connection, table: str) -> set:
+    # table_xinfo, unlike table_info, also lists generated columns
+    return {row[1] for row in db.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def _add_columns(db: sqlite3.Connection, table: str, columns: dict) -> bool:
+    existing = _columns(db, table)
+    missing = [(c, ddl) for c, ddl in columns.items() if c not in existing]
+    for column, ddl in missing:
+        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return bool(missing)
+
+
+def _has_table(db: sqlite3.Connection, name: str) -> bool:
+    return db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+# ----------------------------------------------------------------------
+# MIGRATIONS
+# ----------------------------------------------------------------------
+
+def _001_core_tables(db: sqlite3.Connection):
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS game_saves (
+            save_id TEXT PRIMARY KEY,
+            data_json TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS game_events (
+            save_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            data_json TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (save_id, seq)
+        ) WITHOUT ROWID
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS actors (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL, -- person, monster, object
+            location_node_id TEXT, -- Added for map positioning
+            data_json TEXT NOT NULL DEFAULT '{}',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS items (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            actor_id TEXT, -- Owner ID
+            data_json TEXT NOT NULL DEFAULT '{}',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (actor_id) REFERENCES actors(id)
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_item (
+            id TEXT PRIMARY KEY,
+            character_id TEXT,
+            template_id TEXT,
+            location TEXT DEFAULT 'backpack',
+            slot_type TEXT,
+            grid_index INTEGER DEFAULT 0,
+            current_charges INTEGER DEFAULT 0,
+            is_identified INTEGER DEFAULT 1,
+            visual_asset_url TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _002_save_metadata(db: sqlite3.Connection):
+    """Blob + listing columns on game_saves, backfilled from legacy JSON saves."""
+    added = _add_columns(db, "game_saves", {
+        "data_blob": "BLOB",
+        "character_name": "TEXT",
+        "character_class": "TEXT",
+        "level": "INTEGER",
+        "location": "TEXT",
+    })
+    if not added:
+        return
+    rows = db.execute("SELECT save_id, data_json FROM game_saves WHERE data_json IS NOT NULL").fetchall()
+    for row in rows:
+        data = json.loads(row[1])
+        old_char = data.get("character", {})
+        db.execute(
+            "UPDATE game_saves SET character_name = ?, character_class = ?, level = ?, location = ? WHERE save_id = ?",
+            (
+                data.get("character_name") or old_char.get("name"),
+                data.get("character_class") or old_char.get("class_id", "adventurer").replace("class_", "").capitalize(),
+                data.get("level", 1),
+                data.get("location"),
+                row[0],
+            ),
+        )
+
+
+def _003_inventory_display(db: sqlite3.Connection):
+    """Denormalized display columns on inventory_item, plus per-character versions."""
+    from .loot_tables import item_rarity
+
+    _add_columns(db, "inventory_item", {"name": "TEXT", "rarity": "TEXT", "attunement": "INTEGER DEFAULT 0"})
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_version (
+            character_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    if not _has_table(db, "srd_mechanic"):
+        return
+    stale = db.execute("""
+        SELECT i.id, s.data_json FROM inventory_item i
+        LEFT JOIN srd_mechanic s ON s.id = i.template_id
+        WHERE i.name IS NULL
+    """).fetchall()
+    updates = []
+    for item_id, data_json in stale:
+        srd_data = json.loads(data_json) if data_json else {}
+        updates.append((
+            srd_data.get("name", "Unknown Item"),
+            item_rarity(srd_data) or "Common",
+            1 if srd_data.get("requires_attunement") else 0,
+            item_id,
+        ))
+    db.executemany("UPDATE inventory_item SET name = ?, rarity = ?, attunement = ? WHERE id = ?", updates)
+
+
+def _004_gold_ledger(db: sqlite3.Connection):
+    """Append-only gold ledger; wallets from the old balance-only table get an opening entry."""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS character_gold (
+            character_id TEXT PRIMARY KEY,
+            gold INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS gold_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            txn_id TEXT NOT NULL,
+            character_id TEXT NOT NULL,
+            delta INTEGER NOT NULL,
+            balance_after INTEGER NOT NULL,
+            reason TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.execute("""
+        INSERT INTO gold_ledger (txn_id, character_id, delta, balance_after, reason)
+        SELECT 'opening', g.character_id, g.gold, g.gold, 'opening balance'
+        FROM character_gold g
+        WHERE g.gold != 0
+          AND NOT EXISTS (SELECT 1 FROM gold_ledger l WHERE l.character_id = g.character_id)
+    """)
+
+
+def _005_indexes(db: sqlite3.Connection):
+    db.execute("CREATE INDEX IF NOT EXISTS idx_actors_location ON actors(location_node_id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_items_actor ON items(actor_id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_inventory_character ON inventory_item(character_id, location)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_game_saves_created ON game_saves(created_at)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_game_saves_name ON game_saves(character_name)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_gold_ledger_character ON gold_ledger(character_id, id)")
+
+
+# Typed SRD filter columns, generated from data_json so they can never drift
+# from it. VIRTUAL columns cost nothing to store; the indexes materialize them.
+# Each set is frozen as its migration shipped it: a later change gets a new
+# dict and a new migration, never an edit to an older one.
+_name = get_json_extract_sql("data_json", "$.name")
+SRD_COLUMNS_006 = {
+    "name": f"TEXT GENERATED ALWAYS AS ({_name}) VIRTUAL",
+    "name_lower": f"TEXT GENERATED ALWAYS AS (lower({_name})) VIRTUAL",
+    "cr": f"REAL GENERATED ALWAYS AS (CAST({get_json_extract_sql('data_json', '$.challenge_rating')} AS REAL)) VIRTUAL",
+    "level": f"INTEGER GENERATED ALWAYS AS ({get_json_extract_sql('data_json', '$.level')}) VIRTUAL",
+    "rarity": f"""TEXT GENERATED ALWAYS AS (COALESCE(
+        {get_json_extract_sql('data_json', '$.rarity.name')}, {get_json_extract_sql('data_json', '$.rarity')})) VIRTUAL""",
+    "school": f"""TEXT GENERATED ALWAYS AS (COALESCE(
+        {get_json_extract_sql('data_json', '$.school.index')}, lower({get_json_extract_sql('data_json', '$.school')}))) VIRTUAL""",
+}
+SRD_INDEXES_006 = {
+    "idx_srd_mechanic_type": "srd_mechanic(type)",
+    "idx_srd_mechanic_name_lower": "srd_mechanic(name_lower)",
+    "idx_srd_mechanic_type_cr": "srd_mechanic(type, cr)",
+    "idx_srd_mechanic_type_level": "srd_mechanic(type, level)",
+    "idx_srd_mechanic_type_rarity": "srd_mechanic(type, rarity)",
+    "idx_srd_mechanic_school": "srd_mechanic(school, level)",
+}
+
+# 007: monster display columns for search results
+SRD_COLUMNS_007 = {
+    "hp": f"INTEGER GENERATED ALWAYS AS ({get_json_extract_sql('data_json', '$.hit_points')}) VIRTUAL",
+    "ac": f"""INTEGER GENERATED ALWAYS AS (COALESCE(
+        {get_json_extract_sql('data_json', '$.armor_class[0].value')}, {get_json_extract_sql('data_json', '$.armor_class')})) VIRTUAL""",
+    "creature_type": f"TEXT GENERATED ALWAYS AS (CASE WHEN type = 'monster' THEN {get_json_extract_sql('data_json', '$.type')} END) VIRTUAL",
+}
+
+# 008: type listings page by id; (type) alone is a prefix of it
+SRD_INDEXES_008 = {"idx_srd_mechanic_type_id": "srd_mechanic(type, id)"}
+SRD_DROPPED_INDEXES_008 = ("idx_srd_mechanic_type",)
+
+# Current shape (every migration above applied), for tables the pipeline creates
+SRD_COLUMNS = {**SRD_COLUMNS_006, **SRD_COLUMNS_007}
+SRD_INDEXES = {
+    index: target for index, target in {**SRD_INDEXES_006, **SRD_INDEXES_008}.items()
+    if index not in SRD_DROPPED_INDEXES_008
+}
+
+
+def _apply_srd_schema(db: sqlite3.Connection, columns: dict, indexes: dict, dropped: tuple = ()) -> None:
+    _add_columns(db, "srd_mechanic", columns)
+    for index, target in indexes.items():
+        db.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {target}")
+    for index in dropped:
+        db.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+def ensure_srd_columns(db: sqlite3.Connection) -> None:
+    """
+    Bring srd_mechanic to the current generated columns and indexes.
+    Used by the ingest pipeline when it creates the table; idempotent, so
+    re-running it on a migrated database is a no-op.
+    """
+    _apply_srd_schema(db, SRD_COLUMNS, SRD_INDEXES, SRD_DROPPED_INDEXES_008)
+
+
+def _006_srd_filter_columns(db: sqlite3.Connection):
+    # Databases without an SRD yet get the columns when the pipeline creates it
+    if _has_table(db, "srd_mechanic"):
+        _apply_srd_schema(db, SRD_COLUMNS_006, SRD_INDEXES_006)
+
+
+def _007_srd_search_index(db: sqlite3.Connection):
+    """Monster display columns, and the FTS index split into weighted name/description columns."""
+    from .srd_search import rebuild_search_index
+
+    if _has_table(db, "srd_mechanic"):
+        _apply_srd_schema(db, SRD_COLUMNS_007, {})
+        rebuild_search_index(db)
+
+
+def _008_srd_type_id_index(db: sqlite3.Connection):
+    if _has_table(db, "srd_mechanic"):
+        _apply_srd_schema(db, {}, SRD_INDEXES_008, SRD_DROPPED_INDEXES_008)
+
+
+def _009_world_graph(db: sqlite3.Connection):
+    """World map graph read by WorldStore: nodes, directed edges, spatial index."""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS world_node (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            x REAL NOT NULL,
+            y REAL NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            risk_level INTEGER NOT NULL DEFAULT 1,
+            azgaar_cell_id INTEGER
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS world_edge (
+            src_id TEXT NOT NULL,
+            dst_id TEXT NOT NULL,
+            PRIMARY KEY (src_id, dst_id)
+        ) WITHOUT ROWID
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_world_edge_dst ON world_edge(dst_id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_world_node_cell ON world_node(azgaar_cell_id)")
+    try:
+        db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS world_node_rtree
+            USING rtree(rid, min_x, max_x, min_y, max_y)
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without rtree: viewport queries use a B-tree instead
+        db.execute("CREATE INDEX IF NOT EXISTS idx_world_node_xy ON world_node(x, y)")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "core tables", _001_core_tables),
+    Migration(2, "save blob and metadata columns", _002_save_metadata),
+    Migration(3, "inventory display columns and versions", _003_inventory_display),
+    Migration(4, "gold ledger", _004_gold_ledger),
+    Migration(5, "secondary indexes", _005_indexes),
+    Migration(6, "SRD filter columns", _006_srd_filter_columns),
+    Migration(7, "SRD search index", _007_srd_search_index),
+    Migration(8, "SRD type listing index", _008_srd_type_id_index),
+    Migration(9, "world graph tables", _009_world_graph),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ----------------------------------------------------------------------
+# RUNNER
+# ----------------------------------------------------------------------
+
+# Connection (and version) last brought fully up to date
+_current: Optional[tuple] = None
+
+
+def schema_version(db: sqlite3.Connection) -> int:
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(db: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """
+    Apply pending migrations up to `target` (default: latest), each in its
+    own savepoint. Returns the versions applied.
+    """
+    global _current
+    target = LATEST_VERSION if target is None else target
+    if _current is not None and _current[0] is db and _current[1] == target:
+        return []
+
+    current = schema_version(db)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current or migration.version > target:
+            continue
+        db.execute("SAVEPOINT migration")
+        try:
+            migration.apply(db)
+            db.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (migration.version, migration.name))
+        except Exception:
+            db.execute("ROLLBACK TO migration")
+            db.execute("RELEASE migration")
+            raise
+        db.execute("RELEASE migration")
+        applied.append(migration.version)
+        print(f"🗄️ Applied migration {migration.version:03d}: {migration.name}")
+    db.commit()
+
+    if target == LATEST_VERSION:
+        _current = (db, target)
+    return applied
@@ -1,31 +1,38 @@
-
 import math
+from typing import Optional
+
+from .tactical import TacticalGrid, FEET_PER_SQUARE
 
-# Grid configuration matching HexMap.tsx (5x5 grid)
+# Grid configuration matching HexMap.tsx (5x5 grid); the default TacticalGrid size
 GRID_WIDTH = 5
 GRID_HEIGHT = 5
 
-def get_coordinates(cell_id: int) -> tuple[int, int]:
+def get_coordinates(cell_id: int, width: int = GRID_WIDTH) -> tuple[int, int]:
     """Convert 1-based cell ID to (row, col) coordinates."""
     index = cell_id - 1
-    row = index // GRID_WIDTH
-    col = index % GRID_WIDTH
+    row = index // width
+    col = index % width
     return row, col
 
-def calculate_distance(start_cell: int, end_cell: int) -> int:
+def calculate_distance(start_cell: int, end_cell: int, width: int = GRID_WIDTH) -> int:
     """
     Calculate distance between two cells using Chebyshev distance.
     (Diagonals count as 1 square, common in grid combat variants or simple approximations).
     """
-    r1, c1 = get_coordinates(start_cell)
-    r2, c2 = get_coordinates(end_cell)
+    r1, c1 = get_coordinates(start_cell, width)
+    r2, c2 = get_coordinates(end_cell, width)
     
     return max(abs(r1 - r2), abs(c1 - c2))
 
-def validate_movement_range(start_cell: int, end_cell: int, speed: int = 6) -> bool:
+def validate_movement_range(start_cell: int, end_cell: int, speed: int = 6,
+                            grid: Optional[TacticalGrid] = None) -> bool:
     """
     Validate if the move is within the character's speed.
     Default speed is 6 squares (30ft).
+    With a TacticalGrid, obstacles and difficult terrain are honoured.
     """
+    if grid is not None:
+        reachable = grid.reachable(grid.from_cell_id(start_cell), speed * FEET_PER_SQUARE)
+        return grid.from_cell_id(end_cell) in reachable
     distance = calculate_distance(start_cell, end_cell)
     return distance <= speed
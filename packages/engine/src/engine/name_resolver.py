@@ -0,0 +1,175 @@
+"""
+Dungeon Cortex — SRD Name Resolver
+In-memory index for turning LLM/user-supplied names into SRD ids.
+
+  - Keys are normalized (lowercase, accents stripped, '_'/'-' as spaces):
+    English name, Spanish name, full id and bare index ("monster_goblin"
+    is also reachable as "goblin").
+  - Misses on the exact maps fall back to trigram candidates (spaces
+    ignored) ranked by Dice similarity, optionally restricted to one type.
+  - resolve_partial is the last resort: first id (in id order) containing
+    the query, case-insensitively.
+  - Results, including misses, are memoized until the SRD changes; the
+    index is rebuilt per connection + PRAGMA data_version, like the loot tables.
+"""
+
+import re
+import sqlite3
+import unicodedata
+from math import ceil
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+MIN_FUZZY_SCORE = 0.6
+RESULT_CACHE_SIZE = 4096
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+class NameMatch(NamedTuple):
+    id: str
+    type: str
+    name: str
+    score: float  # 1.0 = exact (normalized) match
+
+
+def normalize_name(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def _trigrams(key: str) -> Set[str]:
+    # Word breaks are ignored so "fire bal" still lands on "fireball"
+    padded = f"  {key.replace(' ', '')} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameResolver:
+    def __init__(self, rows: List[Tuple[str, str, Optional[str], Optional[str]]]):
+        """`rows` are (id, type, english_name, spanish_name)."""
+        self.entries: Dict[str, Tuple[str, str]] = {}    # id -> (type, display name)
+        self.exact: Dict[str, List[str]] = {}           # normalized key -> ids
+        for mechanic_id, kind, name_en, name_es in rows:
+            self.entries[mechanic_id] = (kind, name_en or mechanic_id)
+            bare = mechanic_id[len(kind) + 1:] if mechanic_id.startswith(f"{kind}_") else mechanic_id
+            for alias in (name_en, name_es, mechanic_id, bare):
+                key = normalize_name(alias) if alias else ""
+                if key:
+                    ids = self.exact.setdefault(key, [])
+                    if mechanic_id not in ids:
+                        ids.append(mechanic_id)
+
+        self._keys = list(self.exact)
+        self._key_grams = [frozenset(_trigrams(k)) for k in self._keys]
+        self._postings: Dict[str, List[int]] = {}
+        for i, grams in enumerate(self._key_grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+        self._results: Dict[Tuple[str, Optional[str], int], List[NameMatch]] = {}
+        self._ids = sorted(self.entries)
+        self._partials: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+
+    @classmethod
+    def from_db(cls, db: sqlite3.Connection) -> "NameResolver":
+        columns = {row[1] for row in db.execute("PRAGMA table_info(srd_mechanic)")}
+        name_es = "json_extract(data_es, '$.name')" if "data_es" in columns else "NULL"
+        rows = db.execute(
+            f"SELECT id, type, json_extract(data_json, '$.name'), {name_es} FROM srd_mechanic"
+        ).fetchall()
+        return cls([tuple(row) for row in rows])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _match(self, mechanic_id: str, score: float) -> NameMatch:
+        kind, name = self.entries[mechanic_id]
+        return NameMatch(mechanic_id, kind, name, score)
+
+    def resolve(self, query: str, kind: Optional[str] = None, limit: int = 5) -> List[NameMatch]:
+        """Ranked matches for `query` (best first); empty if nothing is similar."""
+        key = normalize_name(query)
+        cache_key = (key, kind, limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        matches: List[NameMatch] = []
+        seen: Set[str] = set()
+        for mechanic_id in self.exact.get(key, ()):
+            if kind is None or self.entries[mechanic_id][0] == kind:
+                matches.append(self._match(mechanic_id, 1.0))
+                seen.add(mechanic_id)
+
+        if len(matches) < limit and key:
+            grams = _trigrams(key)
+            # Prefix filter: a key scoring >= MIN_FUZZY_SCORE shares at least `need`
+            # trigrams, so it must appear among the postings of the rarest
+            # len(grams) - need + 1 of them; common trigrams are never scanned.
+            need = ceil(len(grams) * MIN_FUZZY_SCORE / (2 - MIN_FUZZY_SCORE))
+            rarest = sorted(grams, key=lambda g: len(self._postings.get(g, ())))
+            candidates: Set[int] = set()
+            for gram in rarest[:len(grams) - need + 1]:
+                candidates.update(self._postings.get(gram, ()))
+
+            # Length filter: Dice >= t is impossible outside this size band
+            lo, hi = len(grams) * MIN_FUZZY_SCORE / (2 - MIN_FUZZY_SCORE), len(grams) * (2 - MIN_FUZZY_SCORE) / MIN_FUZZY_SCORE
+            scored: Dict[str, float] = {}
+            for i in candidates:
+                key_grams = self._key_grams[i]
+                if not lo <= len(key_grams) <= hi:
+                    continue
+                score = 2 * len(grams & key_grams) / (len(grams) + len(key_grams))
+                if score < MIN_FUZZY_SCORE:
+                    continue
+                for mechanic_id in self.exact[self._keys[i]]:
+                    if mechanic_id in seen or (kind is not None and self.entries[mechanic_id][0] != kind):
+                        continue
+                    scored[mechanic_id] = max(score, scored.get(mechanic_id, 0.0))
+            ranked = sorted(scored.items(), key=lambda item: (-item[1], item[0]))
+            matches.extend(self._match(mid, round(score, 3)) for mid, score in ranked[:limit - len(matches)])
+
+        if len(self._results) >= RESULT_CACHE_SIZE:
+            self._results.clear()
+        self._results[cache_key] = matches  # Misses are cached too
+        return matches
+
+    def resolve_one(self, query: str, kind: Optional[str] = None) -> Optional[str]:
+        matches = self.resolve(query, kind, limit=1)
+        return matches[0].id if matches else None
+
+    def resolve_partial(self, query: str, kind: Optional[str] = None) -> Optional[str]:
+        """First id containing `query` (case-insensitive), or None; misses are cached too."""
+        cache_key = ((query or "").lower(), kind)
+        if cache_key in self._partials:
+            return self._partials[cache_key]
+        needle = cache_key[0]
+        found = next(
+            (mid for mid in self._ids
+             if needle in mid.lower() and (kind is None or self.entries[mid][0] == kind)),
+            None,
+        )
+        if len(self._partials) >= RESULT_CACHE_SIZE:
+            self._partials.clear()
+        self._partials[cache_key] = found
+        return found
+
+
+_cached: Optional[NameResolver] = None
+_cached_conn: Optional[sqlite3.Connection] = None
+_cached_version: Optional[int] = None
+
+
+def name_resolver(db: sqlite3.Connection) -> NameResolver:
+    """Resolver for `db`, rebuilt only when the SRD may have changed."""
+    global _cached, _cached_conn, _cached_version
+    version = db.execute("PRAGMA data_version").fetchone()[0]
+    if _cached is None or _cached_conn is not db or _cached_version != version:
+        _cached = NameResolver.from_db(db)
+        _cached_conn, _cached_version = db, version
+    return _cached
+
+
+def invalidate_name_resolver():
+    """Call after writing srd_mechanic on the shared connection."""
+    global _cached
+    _cached = None
@@ -0,0 +1,125 @@
+"""
+Dungeon Cortex — World Routing
+Shortest paths over the world graph (MapNode.connections).
+
+Edge cost = Euclidean distance between node coordinates, inflated by the
+destination's risk level, so safe roads are preferred over short dangerous ones.
+`find_path` is an A* query using `maps.calculate_h_cost` as the (admissible)
+heuristic; over the stored world it loads only the nodes the search reaches.
+`RouteTable` memoizes find_path per (src, dst) until `maps.graph_revision()`
+changes, so no all-pairs table or whole-graph load is ever built.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from . import maps
+from .maps import MapNode, calculate_h_cost
+
+# Each risk level above 1 adds 15% to the cost of entering a node
+RISK_WEIGHT = 0.15
+ROUTE_CACHE_SIZE = 4096
+
+
+def edge_cost(src: MapNode, dst: MapNode) -> float:
+    dx = src.coordinates["x"] - dst.coordinates["x"]
+    dy = src.coordinates["y"] - dst.coordinates["y"]
+    distance = (dx ** 2 + dy ** 2) ** 0.5
+    return distance * (1.0 + RISK_WEIGHT * max(0, dst.risk_level - 1))
+
+
+def _neighbours(graph: Dict[str, MapNode], node_id: str):
+    node = graph[node_id]
+    for next_id in node.connections:
+        nxt = graph.get(next_id)
+        if nxt is not None:
+            yield next_id, edge_cost(node, nxt)
+
+
+def find_path(start_id: str, goal_id: str,
+              graph: Optional[Dict[str, MapNode]] = None) -> Optional[Tuple[List[str], float]]:
+    """A* search. Returns (node ids from start to goal, total cost) or None if unreachable."""
+    graph = world_graph if graph is None else graph
+    if start_id not in graph or goal_id not in graph:
+        return None
+
+    open_heap = [(calculate_h_cost(start_id, goal_id, graph), 0.0, start_id)]
+    came_from: Dict[str, str] = {}
+    g_cost = {start_id: 0.0}
+    while open_heap:
+        _, g, current = heapq.heappop(open_heap)
+        if current == goal_id:
+            path = [current]
+            while current in came_from:
+                current = came_from[current]
+                path.append(current)
+            return path[::-1], g
+        if g > g_cost[current]:
+            continue  # stale heap entry
+        for next_id, cost in _neighbours(graph, current):
+            candidate = g + cost
+            if candidate < g_cost.get(next_id, float("inf")):
+                g_cost[next_id] = candidate
+                came_from[next_id] = current
+                heapq.heappush(open_heap, (candidate + calculate_h_cost(next_id, goal_id, graph), candidate, next_id))
+    return None
+
+
+class _WorldGraph:
+    """
+    Read-only view of the stored world graph for A*: nodes are fetched via
+    maps.get_node (and cached in WORLD_GRAPH) only as the search reaches them.
+    """
+
+    def get(self, node_id: str, default: Optional[MapNode] = None) -> Optional[MapNode]:
+        node = maps.get_node(node_id)
+        return default if node is None else node
+
+    def __getitem__(self, node_id: str) -> MapNode:
+        node = maps.get_node(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+    def __contains__(self, node_id: str) -> bool:
+        return maps.get_node(node_id) is not None
+
+
+world_graph = _WorldGraph()
+
+
+class RouteTable:
+    """
+    Route cache: each (src, dst) is solved with find_path the first time it
+    is asked for and memoized until the world graph revision changes.
+    """
+
+    def __init__(self, graph: Optional[Dict[str, MapNode]] = None, max_routes: int = ROUTE_CACHE_SIZE):
+        self.graph = world_graph if graph is None else graph
+        self.max_routes = max_routes
+        self.revision: Optional[int] = None
+        self._routes: Dict[Tuple[str, str], Optional[Tuple[List[str], float]]] = {}
+
+    def _lookup(self, start_id: str, goal_id: str) -> Optional[Tuple[List[str], float]]:
+        revision = maps.graph_revision()
+        if self.revision != revision:
+            self._routes.clear()
+            self.revision = revision
+        key = (start_id, goal_id)
+        if key not in self._routes:
+            if len(self._routes) >= self.max_routes:
+                self._routes.clear()
+            self._routes[key] = find_path(start_id, goal_id, graph=self.graph)  # None caches "unreachable"
+        return self._routes[key]
+
+    def route(self, start_id: str, goal_id: str) -> Optional[List[str]]:
+        """Node ids from start to goal inclusive, or None if unreachable."""
+        found = self._lookup(start_id, goal_id)
+        return list(found[0]) if found else None
+
+    def distance(self, start_id: str, goal_id: str) -> float:
+        found = self._lookup(start_id, goal_id)
+        return found[1] if found else float("inf")
+
+
+route_table = RouteTable()
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 import uuid
-import json
-from dataclasses import asdict
 from datetime import datetime
 
-from ..db import get_db
 from ..schemas import CharacterCreationRequest, GameSession, SaveInfo, CombatantState
-from ..state import tracker, tracker_lock, combatant_positions, load_game as restore_tracker
+from ..state import (
+    tracker, tracker_lock, combatant_positions, visibility_registry, tactical_grid,
+    combat_log, write_snapshot, get_save_metadata, list_saves as list_save_rows, load_game as restore_tracker,
+)
+from ..maps import get_node
 from ..dice import roll
 
 router = APIRouter(
@@ -44,29 +45,37 @@ async def new_game(request: CharacterCreationRequest):
     save_id = str(uuid.uuid4())
 
     # 2. Populate tracker (single-session prototype: reset first)
+    # Muted: none of this belongs in the previous save's event log
     async with tracker_lock:
-        tracker.combatants.clear()
-        tracker.round = 1
-        tracker.turn_index = 0
-        tracker.has_started = False
-        tracker.add_combatant(
-            id=character_id,
-            name=request.name,
-            dex_modifier=_stat_mod(stats["dex"]),
-            is_player=True,
-            hp_max=base_hp,
-            ac=ac,
-            str_mod=_stat_mod(stats["str"]),
-            con_mod=_stat_mod(stats["con"]),
-            int_mod=_stat_mod(stats["int"]),
-            wis_mod=_stat_mod(stats["wis"]),
-            cha_mod=_stat_mod(stats["cha"]),
-        )
-        combatant_positions[character_id] = "start_town"
-
-    # 3. Persist — unified format understood by both state.load_game() and /list
-    save_data = {
-        # Metadata (for /list and session display)
+        with combat_log.muted():
+            tracker.combatants.clear()
+            tracker.round = 1
+            tracker.turn_index = 0
+            tracker.has_started = False
+            tracker.rebuild_schedule()
+            tracker.add_combatant(
+                id=character_id,
+                name=request.name,
+                dex_modifier=_stat_mod(stats["dex"]),
+                is_player=True,
+                hp_max=base_hp,
+                ac=ac,
+                str_mod=_stat_mod(stats["str"]),
+                con_mod=_stat_mod(stats["con"]),
+                int_mod=_stat_mod(stats["int"]),
+                wis_mod=_stat_mod(stats["wis"]),
+                cha_mod=_stat_mod(stats["cha"]),
+            )
+            combatant_positions[character_id] = "start_town"
+            visibility_registry.clear()
+            tactical_grid.reset(tactical_grid.width, tactical_grid.height)
+            start_node = get_node("start_town")
+            if start_node:
+                visibility_registry.reveal(character_id, start_node.coordinates["x"], start_node.coordinates["y"])
+
+    # 3. Persist — initial snapshot (metadata for /list + session display);
+    #    later changes are appended to this save's event log
+    write_snapshot(save_id, metadata={
         "save_id": save_id,
         "created_at": datetime.now().isoformat(),
         "character_name": request.name,
@@ -74,20 +83,7 @@ async def new_game(request: CharacterCreationRequest):
         "race_id": request.race_id,
         "level": 1,
         "location": "The Crossroads",
-        # Tracker state (for state.load_game())
-        "round": tracker.round,
-        "turn_index": tracker.turn_index,
-        "has_started": tracker.has_started,
-        "combatants": [asdict(c) for c in tracker.combatants],
-        "positions": dict(combatant_positions),
-    }
-
-    db = get_db()
-    db.execute(
-        "INSERT INTO game_saves (save_id, data_json) VALUES (?, ?)",
-        (save_id, json.dumps(save_data))
-    )
-    db.commit()
+    })
 
     return GameSession(
         save_id=save_id,
@@ -107,27 +103,18 @@ async def new_game(request: CharacterCreationRequest):
 
 @router.get("/list", response_model=List[SaveInfo])
 async def list_saves():
-    """List all available save games. Handles both old and new save formats."""
-    db = get_db()
-    rows = db.execute(
-        "SELECT save_id, created_at, data_json FROM game_saves ORDER BY created_at DESC"
-    ).fetchall()
-
-    saves = []
-    for row in rows:
-        data = json.loads(row["data_json"])
-
-        # New unified format has top-level keys; old format nested under "character"
-        old_char = data.get("character", {})
-        saves.append(SaveInfo(
+    """List all available save games from the indexed metadata columns."""
+    return [
+        SaveInfo(
             save_id=row["save_id"],
             created_at=row["created_at"],
-            character_name=data.get("character_name") or old_char.get("name", "Unknown"),
-            character_class=data.get("character_class") or old_char.get("class_id", "adventurer").replace("class_", "").capitalize(),
-            level=data.get("level", 1),
-            location=data.get("location", "Unknown Lands"),
-        ))
-    return saves
+            character_name=row["character_name"] or "Unknown",
+            character_class=row["character_class"] or "Adventurer",
+            level=row["level"] or 1,
+            location=row["location"] or "Unknown Lands",
+        )
+        for row in list_save_rows()
+    ]
 
 
 @router.post("/load/{save_id}")
@@ -136,16 +123,10 @@ async def load_game(save_id: str):
     Load a save. Restores the in-memory tracker so the WebSocket connection
     finds the player immediately after the client calls connect(save_id).
     """
-    db = get_db()
-    row = db.execute(
-        "SELECT data_json FROM game_saves WHERE save_id = ?", (save_id,)
-    ).fetchone()
-
-    if not row:
+    meta = get_save_metadata(save_id)
+    if not meta:
         raise HTTPException(status_code=404, detail="Save not found")
 
-    data = json.loads(row["data_json"])
-
     # Restore tracker from the combatants array in the save
     success = restore_tracker(save_id)
     if not success:
@@ -167,6 +148,6 @@ async def load_game(save_id: str):
             initiative=player.initiative,
             active=player.is_active,
         ),
-        location=data.get("location", "Unknown Lands"),
-        scene=data.get("scene", "Your adventure continues..."),
+        location=meta["location"] or "Unknown Lands",
+        scene="Your adventure continues...",
     )
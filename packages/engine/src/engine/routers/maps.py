@@ -1,18 +1,36 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from ..maps import MapNode, get_all_nodes, get_node, MapManager
+from typing import List, Optional
+from ..maps import MapNode, get_all_nodes, get_node, get_node_by_cell, get_nodes_in_viewport, MapManager
+from ..state import tracker, visibility_registry
 import os
 
 router = APIRouter(prefix="/api/world/map", tags=["map"])
 
 # Initialize MapManager with the root external-sources path
 EXTERNAL_SOURCES_PATH = os.path.abspath(os.path.join(os.getcwd(), "external-sources"))
-map_manager = MapManager(EXTERNAL_SOURCES_PATH)
+map_manager = MapManager(EXTERNAL_SOURCES_PATH, registry=visibility_registry)
 
 @router.get("/nodes", response_model=List[MapNode])
-async def list_nodes():
-    """List all available world map nodes."""
-    return get_all_nodes()
+async def list_nodes(
+    min_x: Optional[float] = None, min_y: Optional[float] = None,
+    max_x: Optional[float] = None, max_y: Optional[float] = None,
+    limit: int = Query(500, ge=1, le=2000),
+):
+    """List world map nodes; pass a bounding box (map percent) to fetch a viewport."""
+    bbox = (min_x, min_y, max_x, max_y)
+    if all(v is None for v in bbox):
+        return get_all_nodes()
+    if any(v is None for v in bbox):
+        raise HTTPException(status_code=400, detail="Viewport needs min_x, min_y, max_x and max_y")
+    return get_nodes_in_viewport(min_x, min_y, max_x, max_y, limit=limit)
+
+@router.get("/nodes/by-cell/{cell_id}", response_model=MapNode)
+async def get_node_for_cell(cell_id: int):
+    """Resolve an Azgaar cell id to its world node."""
+    node = get_node_by_cell(cell_id)
+    if not node:
+        raise HTTPException(status_code=404, detail="No node mapped to this cell")
+    return node
 
 @router.get("/nodes/{node_id}", response_model=MapNode)
 async def get_node_details(node_id: str):
@@ -23,19 +41,38 @@ async def get_node_details(node_id: str):
     return node
 
 @router.post("/capture/{node_id}")
-async def capture_node_map(node_id: str, seed: str = Query("antigravity_v1")):
+async def capture_node_map(node_id: str, seed: str = Query("antigravity_v1"), character_id: Optional[str] = None,
+                           party: bool = False):
     """
-    Trigger a map capture for a specific node in Azgaar's FMG.
-    Returns the relative URL to the generated image.
+    Queue a map capture for a specific node in Azgaar's FMG.
+    The map is fogged with what `character_id` has explored, or with `party`
+    what any player character has; otherwise with the world fog.
+    Returns the capture job; cached captures come back already "done" with the
+    image URL and fog tile diff, otherwise poll /capture/jobs/{job_id}.
     """
     node = get_node(node_id)
     if not node:
         raise HTTPException(status_code=404, detail="Node not found")
-    
-    image_url = map_manager.capture_node(node_id, seed=seed)
-    if not image_url:
+
+    party_ids = None
+    if party:
+        party_ids = [c.id for c in tracker.combatants if c.is_player]
+        if character_id:
+            party_ids.append(character_id)
+    job = await map_manager.capture_node(node_id, seed=seed, viewer_id=character_id, party_ids=party_ids)
+    if not job:
         raise HTTPException(status_code=500, detail="Map capture failed")
-    
+    return job.to_dict()
+
+@router.get("/capture/jobs/{job_id}")
+async def get_capture_job(job_id: str):
+    """Status of a queued map capture (queued | running | done | failed)."""
+    job = map_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Capture job not found")
+    return job.to_dict()
+
+
 @router.get("/nodes/{node_id}/actors")
 async def get_node_actors(node_id: str):
     """Fetch all actors currently located at this node."""
@@ -1,13 +1,52 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 import json
+from typing import List, Optional
 from ..db import get_db
-from ..srd_queries import get_srd_mechanic
+from ..schemas import SrdBatchRequest
+from ..srd_queries import get_many, get_srd_mechanic, list_mechanics
+from ..srd_search import search
 
 router = APIRouter(
     prefix="/api/srd",
     tags=["srd"]
 )
 
+@router.get("/search")
+async def search_srd(
+    q: str,
+    types: List[str] = Query(default=[], alias="type"),
+    cr_min: Optional[float] = None,
+    cr_max: Optional[float] = None,
+    lang: str = "en",
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+):
+    """
+    Ranked search over monsters, spells and items.
+    `type` may repeat (monster, spell, item or a raw SRD type); results
+    carry a highlighted snippet, and facets count matches per type and CR band.
+    """
+    return search(q, types=types, cr_min=cr_min, cr_max=cr_max, lang=lang, limit=limit, offset=offset)
+
+
+MAX_BATCH_IDS = 1000
+
+
+@router.post("/batch")
+async def get_srd_batch(request: SrdBatchRequest):
+    """
+    Fetch many SRD mechanics in one request (an encounter's monsters, a spellbook).
+    Unknown ids are listed under `missing` instead of failing the batch.
+    """
+    if len(request.ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per batch")
+    items = get_many(request.ids, request.lang, request.fields)
+    return {
+        "items": items,
+        "missing": [i for i in dict.fromkeys(request.ids) if i not in items],
+    }
+
+
 @router.get("/{mechanic_id}")
 async def get_srd_mechanic_endpoint(mechanic_id: str, lang: str = "en"):
     """
@@ -40,36 +79,22 @@ async def get_srd_mechanic_endpoint(mechanic_id: str, lang: str = "en"):
 
 
 @router.get("/type/{mechanic_type}")
-async def list_srd_by_type(mechanic_type: str, lang: str = "en", limit: int = 50, offset: int = 0):
+async def list_srd_by_type(
+    mechanic_type: str,
+    lang: str = "en",
+    limit: int = Query(default=50, ge=1, le=500),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """
     List SRD mechanics by type (spell, monster, equipment, etc).
+    Pass the previous page's `next_cursor` as `after` to continue, and a
+    comma-separated `fields` (e.g. "name,cr,hp") to choose the columns.
     """
-    db = get_db()
-    rows = db.execute(
-        "SELECT id, data_json, data_es FROM srd_mechanic WHERE type = ? LIMIT ? OFFSET ?",
-        (mechanic_type, limit, offset)
-    ).fetchall()
-
-    total = db.execute(
-        "SELECT COUNT(*) FROM srd_mechanic WHERE type = ?",
-        (mechanic_type,)
-    ).fetchone()[0]
-
-    items = []
-    for row in rows:
-        data_str = row["data_es"] if lang == "es" else row["data_json"]
-        if not data_str:
-             data_str = row["data_json"] # Fallback
-
-        data = json.loads(data_str)
-        items.append({
-            "id": row["id"],
-            "name": data.get("name", "Unknown"),
-            "index": data.get("index", ""),
-        })
-
-    return {
-        "type": mechanic_type,
-        "total": total,
-        "items": items,
-    }
+    return list_mechanics(
+        mechanic_type,
+        after=after,
+        limit=limit,
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        lang=lang,
+    )
@@ -7,11 +7,15 @@ import uuid
 from pydantic import ValidationError
 from ..dice import roll
 from ..srd_queries import get_weapon_stats, get_monster_stats, search_monsters, get_spell_mechanics, get_random_monster_by_cr
-from ..inventory import get_inventory, generate_loot, create_inventory_item, equip_item, unequip_item, distribute_loot, add_gold, get_gold
-from ..state import tracker, tracker_lock, save_game, load_game, list_saves, combatant_positions
+from ..inventory import get_inventory, get_inventory_version, get_item_details, generate_loot, create_inventory_items, equip_item, unequip_item, distribute_loot, set_visual_asset_url
+from ..ledger import add_gold, settle, split_shares
+from ..state import (
+    tracker, tracker_lock, save_game, load_game, list_saves, combatant_positions, visibility_registry,
+    tactical_grid, line_of_sight, autosave, record_hp, record_move, record_position, record_roster, sync_grid,
+)
 from ..rules import validate_concentration
 from ..schemas import (
-    GetInventoryAction, GenerateLootAction, SearchMonstersAction, AddCombatantAction,
+    GetInventoryAction, GetItemDetailsAction, GenerateLootAction, SearchMonstersAction, AddCombatantAction,
     EquipItemAction, UnequipItemAction, AttackAction, MonsterAttackAction, CastSpellAction,
     RollInitiativeAction, StartCombatAction, NextTurnAction, RollAction, GetSpellsAction,
     DistributeLootAction, CloseWidgetAction, MapInteractionAction, NarrativeActionAction,
@@ -21,12 +25,17 @@ from ..schemas import (
     InventoryItemModel, CombatantState, LogEvent, SpellBookUpdateEvent, SpellData,
     LootDistributedEvent, MapUpdateEvent, ListSavesAction, MapDataEvent, MapNode,
     NarrativeEvent, GetShopAction, GoldUpdateEvent, ShopInventoryEvent, ShopItemModel,
+    AssetReadyEvent, InventoryUnchangedEvent, ItemDetailsEvent,
 )
-from ..maps import get_node, get_all_nodes
+from ..maps import get_node, get_all_nodes, get_nodes_in_viewport
+from ..pathfinding import route_table
 from ..combat import resolve_attack, resolve_saving_throw, resolve_aoe_spell, AttackResult
+from ..aoe import AOE_SHAPES, affected_tokens
+from ..conditions import ConditionRegistry, attack_roll_mode, auto_crit, can_act, save_mode, speed_feet
+from ..los import AttackModifiers
 from ..spells import get_all_spells, get_spell
 from ..ai.chronos import ChronosClient
-from ..ai.visual_vault import VisualVaultClient
+from ..ai.visual_vault import VisualVaultClient, is_placeholder_url
 from ..ai.cartographer import CartographerClient
 from ..ai.treasurer import TreasurerClient
 
@@ -77,11 +86,16 @@ def build_combatant_states():
             cr=c.cr, type=c.type, resistances=c.resistances, immunities=c.immunities,
             conditions=[cond.condition_id for cond in c.conditions],
             current=(c.id == current_id),
-            position=combatant_positions.get(c.id)
+            position=_grid_cell_id(c.id) or combatant_positions.get(c.id)
         ) for c in tracker.combatants
     ]
 
 
+def _grid_cell_id(entity_id: str):
+    cell = tactical_grid.cell_of(entity_id)
+    return tactical_grid.to_cell_id(cell) if cell else None
+
+
 async def stream_narrative(websocket: WebSocket, fact_packet: dict):
     """Refactored Narrative Streaming Helper with Indexing (§ Track A.2)"""
     chunk_index = 0
@@ -105,6 +119,188 @@ def _risk_to_cr(risk_level: int) -> tuple:
     else:                 return (10.0, 20.0)
 
 
+# Default walking speed on the tactical grid (feet per turn)
+COMBAT_SPEED_FT = 30
+
+
+def _disabling_condition(combatant) -> str | None:
+    """The condition that stops a combatant from acting, if any."""
+    if can_act(combatant.condition_mask):
+        return None
+    return next((c.condition_id for c in combatant.conditions
+                 if not can_act(ConditionRegistry.flags(c.condition_id))), None)
+
+
+def _attack_modifiers(attacker_id: str, target, ranged: bool = False) -> AttackModifiers:
+    """Cover/visibility from the grid combined with both sides' condition flags."""
+    attacker = next((c for c in tracker.combatants if c.id == attacker_id), None)
+    # One-sided concealment (Invisible holder, or a Blinded opponent)
+    mods = line_of_sight.attack_modifiers(
+        attacker_id, target.id,
+        attacker_hidden=bool(attacker and attacker.has_condition("invisible")) or target.has_condition("blinded"),
+        target_hidden=target.has_condition("invisible") or bool(attacker and attacker.has_condition("blinded")),
+    )
+    a_cell, t_cell = tactical_grid.cell_of(attacker_id), tactical_grid.cell_of(target.id)
+    if a_cell is not None and t_cell is not None:
+        within_5ft = tactical_grid.distance(a_cell, t_cell) <= 1
+    else:
+        within_5ft = not ranged
+    advantage, disadvantage = attack_roll_mode(
+        attacker.condition_mask if attacker else 0, target.condition_mask, within_5ft
+    )
+    mods.advantage = mods.advantage or advantage
+    mods.disadvantage = mods.disadvantage or disadvantage
+    mods.auto_crit = auto_crit(target.condition_mask, within_5ft)
+    return mods
+
+
+async def _send_condition_events(websocket: WebSocket):
+    """Patch condition lists for combatants whose conditions expired or were saved against."""
+    events = tracker.drain_condition_events()
+    if not events:
+        return
+    patches = []
+    for combatant_id in dict.fromkeys(e["combatant_id"] for e in events if e["reason"] != "save_failed"):
+        combatant = next((c for c in tracker.combatants if c.id == combatant_id), None)
+        if combatant:
+            patches.append({
+                "op": "replace",
+                "path": f"/targets/{combatant_id}/conditions",
+                "value": [cond.condition_id for cond in combatant.conditions],
+            })
+    names = {c.id: c.name for c in tracker.combatants}
+    for e in events:
+        name = names.get(e["combatant_id"], e["combatant_id"])
+        if e["reason"] == "expired":
+            message = f"{e['condition_id']} wore off {name}"
+        else:
+            outcome = "shook off" if e["reason"] == "saved" else "failed to shake off"
+            message = f"{name} {outcome} {e['condition_id']} ({e['roll']} vs DC {e['dc']})"
+        await manager.send_event(websocket, LogEvent(type="LOG", message=message, level="info").model_dump(mode='json'))
+    if patches:
+        await manager.send_event(websocket, StatePatchEvent(
+            type="STATE_PATCH", patches=patches
+        ).model_dump(mode='json'))
+
+
+def _resolve_aoe_targets(spell_def, payload):
+    """
+    Combatants caught in an AoE template, or None if nobody can be targeted.
+    The aim point is `target_cell`, else the primary target's square; cones
+    and lines originate from the caster's square. Without grid positions to
+    place the template, the listed `target_ids` (or `target_id`) are used.
+    """
+    in_combat = {c.id for c in tracker.combatants if c.is_active}
+    aim = None
+    if payload.target_cell is not None:
+        try:
+            aim = tactical_grid.from_cell_id(payload.target_cell)
+        except ValueError:
+            return None
+    elif payload.target_id:
+        aim = tactical_grid.cell_of(payload.target_id)
+
+    origin = tactical_grid.cell_of(payload.attacker_id)
+    if origin is None and aim is not None and spell_def.aoe_shape in ("sphere", "cylinder"):
+        origin = aim
+    if aim is None or origin is None:
+        listed = payload.target_ids or [payload.target_id]
+        return [tid for tid in dict.fromkeys(listed) if tid in in_combat] or None
+
+    caught = affected_tokens(tactical_grid, spell_def.aoe_shape, spell_def.aoe_radius, origin, aim)
+    return [tid for tid in caught if tid in in_combat]
+
+
+# --- Loot Asset Fan-out (§8.3 Visual Vault) ---
+ASSET_CONCURRENCY = 4    # Max simultaneous Gemini/Imagen round-trips
+ASSET_TIMEOUT = 30.0     # Seconds before an asset keeps its placeholder
+_asset_semaphore = asyncio.Semaphore(ASSET_CONCURRENCY)
+_asset_tasks: set[asyncio.Task] = set()
+
+
+def _create_loot_items(character_id: str, template_ids: list[str], context: str) -> list[dict]:
+    """
+    Persist loot immediately with placeholder art (or cached art if the Visual
+    Vault already has it). Returns [{id, template_id, url, pending}] per created item.
+    """
+    cached = [visual_vault.lookup(template_id, context) for template_id in template_ids]
+    urls = [url or f"/assets/items/{t}.png" for t, url in zip(template_ids, cached)]
+    try:
+        # One transaction for the whole hoard
+        items = create_inventory_items(
+            [(character_id, template_id) for template_id in template_ids],
+            visual_asset_urls=urls,
+        )
+    except Exception as e:
+        print(f"Item creation failed for {template_ids}: {e}")
+        return []
+    return [
+        {"id": item["id"], "template_id": item["template_id"], "url": url, "pending": hit is None}
+        for item, url, hit in zip(items, urls, cached)
+    ]
+
+
+async def _send_inventory(websocket: WebSocket, character_id: str, items: list[dict] | None = None,
+                          known_version: int | None = None, full: bool = False):
+    """INVENTORY_UPDATE with the inventory version, or INVENTORY_UNCHANGED if the client is current."""
+    version = get_inventory_version(character_id)
+    if known_version is not None and known_version == version:
+        await manager.send_event(websocket, InventoryUnchangedEvent(
+            character_id=character_id, version=version,
+        ).model_dump(mode='json'))
+        return
+    if items is None:
+        items = get_inventory(character_id, full=full)
+    await manager.send_event(websocket, InventoryUpdateEvent(
+        type="INVENTORY_UPDATE", character_id=character_id,
+        items=[InventoryItemModel(**i) for i in items], version=version,
+    ).model_dump(mode='json'))
+
+
+async def _generate_loot_asset(item: dict, context: str) -> tuple[dict, str | None]:
+    async with _asset_semaphore:
+        try:
+            url = await asyncio.wait_for(
+                visual_vault.get_asset_url(item["template_id"], context), timeout=ASSET_TIMEOUT
+            )
+        except Exception as e:
+            print(f"🎨 Visual Vault Error: {e}. Keeping placeholder for {item['template_id']}.")
+            url = None
+    return item, url
+
+
+async def _stream_loot_assets(websocket: WebSocket, character_id: str, created: list[dict], context: str):
+    """
+    Generate art concurrently and push an ASSET_READY patch as each image lands.
+    Placeholder results (mock mode, failed renders) keep the stored art and send nothing.
+    """
+    jobs = [_generate_loot_asset(item, context) for item in created if item["pending"]]
+    for next_done in asyncio.as_completed(jobs):
+        item, url = await next_done
+        if is_placeholder_url(url) or url == item.get("url"):
+            continue
+        set_visual_asset_url(item["id"], url)
+        try:
+            await manager.send_event(websocket, AssetReadyEvent(
+                type="ASSET_READY",
+                character_id=character_id,
+                instance_id=item["id"],
+                template_id=item["template_id"],
+                visual_asset_url=url,
+            ).model_dump(mode='json'))
+        except Exception as e:
+            print(f"ASSET_READY delivery failed: {e}")
+
+
+def _schedule_loot_assets(websocket: WebSocket, character_id: str, created: list[dict], context: str):
+    """Fire-and-forget asset generation so inventory events are not blocked on image models."""
+    if visual_vault.is_mock or not any(item["pending"] for item in created):
+        return  # Mock mode only ever yields placeholders
+    task = asyncio.create_task(_stream_loot_assets(websocket, character_id, created, context))
+    _asset_tasks.add(task)
+    task.add_done_callback(_asset_tasks.discard)
+
+
 async def _resolve_combat_end(websocket: WebSocket, defeated_enemies: list):
     """Award loot and gold after all enemies are defeated, then reset tracker."""
     player = next((c for c in tracker.combatants if c.is_player), None)
@@ -112,6 +308,7 @@ async def _resolve_combat_end(websocket: WebSocket, defeated_enemies: list):
         return
 
     character_id = player.id
+    party_ids = [c.id for c in tracker.combatants if c.is_player]
     avg_cr = (sum(e.cr for e in defeated_enemies) / len(defeated_enemies)) if defeated_enemies else 1.0
 
     # Reset tracker to exploration mode
@@ -119,6 +316,9 @@ async def _resolve_combat_end(websocket: WebSocket, defeated_enemies: list):
         tracker.has_started = False
         tracker.combatants = [c for c in tracker.combatants if c.is_player]
         tracker.turn_index = 0
+        tracker.rebuild_schedule()
+        record_roster()
+        sync_grid()
 
     # Loot generation
     loot_ids = []
@@ -127,17 +327,8 @@ async def _resolve_combat_end(websocket: WebSocket, defeated_enemies: list):
     except Exception as e:
         print(f"Loot generation failed: {e}")
 
-    created_ids = []
-    for template_id in loot_ids:
-        try:
-            asset_url = await visual_vault.get_asset_url(template_id, "combat trophy")
-        except Exception:
-            asset_url = f"/assets/items/{template_id}.png"
-        try:
-            new_item = create_inventory_item(character_id, template_id, visual_asset_url=asset_url)
-            created_ids.append(new_item["id"])
-        except Exception as e:
-            print(f"Item creation failed for {template_id}: {e}")
+    created = _create_loot_items(character_id, loot_ids, "combat trophy")
+    created_ids = [item["id"] for item in created]
 
     # Gold via Treasurer
     world_rep = cartographer.memory.lore.get("world_state", {}).get("reputation", 0)
@@ -149,10 +340,12 @@ async def _resolve_combat_end(websocket: WebSocket, defeated_enemies: list):
     )
     gold_delta = enriched.get("gold_reward", 0)
     if gold_delta > 0:
-        new_total = add_gold(character_id, gold_delta)
-        await manager.send_event(websocket, GoldUpdateEvent(
-            type="GOLD_UPDATE", character_id=character_id, gold=new_total, delta=gold_delta,
-        ).model_dump(mode='json'))
+        # Party split, settled in one ledger transaction
+        shares = dict(split_shares(gold_delta, party_ids))
+        for member_id, new_total in settle(shares, reason="combat victory").items():
+            await manager.send_event(websocket, GoldUpdateEvent(
+                type="GOLD_UPDATE", character_id=member_id, gold=new_total, delta=shares[member_id],
+            ).model_dump(mode='json'))
 
     # Send inventory + loot events
     all_items = get_inventory(character_id)
@@ -162,10 +355,8 @@ async def _resolve_combat_end(websocket: WebSocket, defeated_enemies: list):
         items=[InventoryItemModel(**i) for i in new_items],
         message=f"Victory! Found {len(loot_ids)} item(s).",
     ).model_dump(mode='json'))
-    await manager.send_event(websocket, InventoryUpdateEvent(
-        type="INVENTORY_UPDATE", character_id=character_id,
-        items=[InventoryItemModel(**i) for i in all_items],
-    ).model_dump(mode='json'))
+    await _send_inventory(websocket, character_id, all_items)
+    _schedule_loot_assets(websocket, character_id, created, "combat trophy")
 
     # Victory narrative
     victory_fact = {
@@ -216,6 +407,7 @@ async def _run_combat_loop(websocket: WebSocket, advance_first: bool = True):
         if advance_first or not first:
             async with tracker_lock:
                 current = tracker.next_turn()
+            await _send_condition_events(websocket)
         else:
             current = tracker.get_current_actor()
         first = False
@@ -227,26 +419,34 @@ async def _run_combat_loop(websocket: WebSocket, advance_first: bool = True):
         if not current or current.is_player:
             return  # Player's turn — stop and wait for input
 
-        if not current.is_active or not current.actions:
-            continue  # Skip dead/actionless monster
+        if not current.is_active or not current.actions or not can_act(current.condition_mask):
+            continue  # Skip dead/actionless/incapacitated monster
 
         # --- Auto-resolve monster attack ---
         act = current.actions[0]
+        mods = _attack_modifiers(current.id, player)
+        if not mods.can_target:
+            continue  # Player is behind total cover — the monster holds
         result = resolve_attack(
             attacker_id=current.id,
             target_id=player.id,
             attack_bonus=act.get("attack_bonus", 0),
-            target_ac=player.ac,
+            target_ac=player.ac + mods.ac_bonus,
             damage_dice_sides=act.get("damage_dice_sides", 6),
             damage_dice_count=act.get("damage_dice_count", 1),
             damage_modifier=act.get("damage_modifier", 0),
             damage_type=act.get("damage_type", "slashing"),
             target_current_hp=player.hp_current,
+            advantage=mods.advantage,
+            disadvantage=mods.disadvantage,
+            environment_tags=mods.tags,
+            auto_crit=mods.auto_crit,
         )
         async with tracker_lock:
             player.hp_current = result.target_remaining_hp
             if result.target_status == "dead":
                 player.is_active = False
+            record_hp(player)
 
         fp = result.to_fact_packet()
         fp.update({"attacker_name": current.name, "action_name": act.get("name", "attack"), "is_player": False})
@@ -339,14 +539,20 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
 
                 if action_type == "get_inventory":
                     payload = GetInventoryAction(**data)
-                    items = get_inventory(payload.character_id)
-                    
-                    event = InventoryUpdateEvent(
-                        type="INVENTORY_UPDATE",
-                        character_id=payload.character_id,
-                        items=[InventoryItemModel(**i) for i in items]
-                    )
-                    await manager.send_event(websocket, event.model_dump(mode='json'))
+                    await _send_inventory(websocket, payload.character_id,
+                                          known_version=payload.known_version, full=payload.full)
+
+                elif action_type == "get_item_details":
+                    payload = GetItemDetailsAction(**data)
+                    item = get_item_details(payload.item_id)
+                    if item is None:
+                        await manager.send_event(websocket, AckEvent(
+                            type="ACK", status="error", message=f"Item {payload.item_id} not found."
+                        ).model_dump(mode='json'))
+                    else:
+                        await manager.send_event(websocket, ItemDetailsEvent(
+                            item=InventoryItemModel(**item)
+                        ).model_dump(mode='json'))
 
                 elif action_type == "generate_loot":
                     payload = GenerateLootAction(**data)
@@ -355,19 +561,11 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
 
                     if target_id:
                         # Implementation of §8.3 Skill: The Treasurer
-                        created_instance_ids = []
-                        for template_id in loot_ids:
-                            try:
-                                # Asset Generation Proxy with V6 Robustness
-                                asset_url = await visual_vault.get_asset_url(template_id, "looted from a dungeon chest")
-                            except Exception as e:
-                                print(f"🎨 Visual Vault Error: {e}. Falling back to default.")
-                                asset_url = f"/assets/items/{template_id}.png"
-                            
-                            # Create item with asset
-                            new_item = create_inventory_item(target_id, template_id, visual_asset_url=asset_url)
-                            created_instance_ids.append(new_item["id"])
-                        
+                        # Items land with placeholder art; Visual Vault streams ASSET_READY later
+                        loot_context = "looted from a dungeon chest"
+                        created = _create_loot_items(target_id, loot_ids, loot_context)
+                        created_instance_ids = [item["id"] for item in created]
+
                         all_items = get_inventory(target_id)
                         
                         # Identify the new items for the notification specifically by instance ID
@@ -382,13 +580,9 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                         ).model_dump(mode='json'))
 
                         # Update Inventory UI
-                        inventory_event = InventoryUpdateEvent(
-                            type="INVENTORY_UPDATE",
-                            character_id=target_id,
-                            items=[InventoryItemModel(**i) for i in all_items]
-                        )
-                        await manager.send_event(websocket, inventory_event.model_dump(mode='json'))
-                    
+                        await _send_inventory(websocket, target_id, all_items)
+                        _schedule_loot_assets(websocket, target_id, created, loot_context)
+
                     # Treasurer enriches fact_packet with gold and appraisal data
                     world_rep = cartographer.memory.lore.get("world_state", {}).get("reputation", 0)
                     hydrated_items = []
@@ -409,7 +603,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     # Persist gold reward (Iron Law §2 — State is Truth)
                     if target_id and fact_packet.get("gold_reward", 0) > 0:
                         gold_delta = fact_packet["gold_reward"]
-                        new_total = add_gold(target_id, gold_delta)
+                        new_total = add_gold(target_id, gold_delta, reason="loot")
                         await manager.send_event(websocket, GoldUpdateEvent(
                             type="GOLD_UPDATE",
                             character_id=target_id,
@@ -424,20 +618,9 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     payload = DistributeLootAction(**data)
                     target_id = payload.target_character_id
                     
-                    for template_id in payload.item_ids:
-                         try:
-                            asset_url = await visual_vault.get_asset_url(template_id, "looted item")
-                         except Exception:
-                            asset_url = ""
-                         create_inventory_item(target_id, template_id, visual_asset_url=asset_url)
-
-                    all_items = get_inventory(target_id)
-                    inventory_event = InventoryUpdateEvent(
-                        type="INVENTORY_UPDATE",
-                        character_id=target_id,
-                        items=[InventoryItemModel(**i) for i in all_items]
-                    )
-                    await manager.send_event(websocket, inventory_event.model_dump(mode='json'))
+                    created = _create_loot_items(target_id, payload.item_ids, "looted item")
+
+                    await _send_inventory(websocket, target_id)
                     
                     await manager.send_event(websocket, LootDistributedEvent(
                             type="LOOT_DISTRIBUTED",
@@ -445,6 +628,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             items=[], # sending empty or full logic triggers refresh
                             message=f"Received {len(payload.item_ids)} items."
                         ).model_dump(mode='json'))
+                    _schedule_loot_assets(websocket, target_id, created, "looted item")
 
 
 
@@ -452,14 +636,23 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     payload = MapInteractionAction(**data)
                     
                     if payload.interaction_type == "request_data":
-                        # Send the full graph
-                        nodes = get_all_nodes()
                         current_pos = combatant_positions.get(payload.character_id, "start_town")
+                        if payload.viewport:
+                            # Only the visible slice (spatial index), plus the party's own node
+                            vp = payload.viewport
+                            nodes = get_nodes_in_viewport(vp.min_x, vp.min_y, vp.max_x, vp.max_y)
+                            current_node = get_node(str(current_pos))
+                            if current_node and all(n.id != current_node.id for n in nodes):
+                                nodes.append(current_node)
+                        else:
+                            # Send the full graph
+                            nodes = get_all_nodes()
                         
                         await manager.send_event(websocket, MapDataEvent(
                             type="MAP_DATA",
                             nodes=nodes,
-                            current_node_id=str(current_pos)
+                            current_node_id=str(current_pos),
+                            viewport=payload.viewport,
                         ).model_dump(mode='json'))
                         continue
 
@@ -472,25 +665,44 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
 
                         current_pos = combatant_positions.get(payload.character_id, "start_town")
                         
-                        # Validate connection
+                        # Validate position
                         current_node = get_node(str(current_pos))
                         if not current_node:
                              # Fallback if lost
                              current_node = get_node("start_town")
                              combatant_positions[payload.character_id] = "start_town"
+                             record_position(payload.character_id)
 
-                        if payload.target_node_id not in current_node.connections:
+                        # Resolve a route (direct hop or multi-hop) from the precomputed table
+                        route = route_table.route(current_node.id, payload.target_node_id)
+                        if not route or len(route) < 2:
                              await manager.send_event(websocket, LogEvent(
-                                type="LOG", message=f"Cannot travel directly to {payload.target_node_id} from {current_node.id}!", level="warning"
+                                type="LOG", message=f"No known route to {payload.target_node_id} from {current_node.id}!", level="warning"
                             ).model_dump(mode='json'))
                              continue
 
+                        # Encounter checks for every leg in one batch; the journey halts at the first ambush
+                        legs = [get_node(node_id) for node_id in route[1:]]
+                        ambush_index = cartographer.roll_route_encounters(legs)
+                        if ambush_index is not None:
+                            legs = legs[:ambush_index + 1]
+                            route = route[:ambush_index + 2]
+                        target_node = legs[-1]
+
                         async with tracker_lock:
-                            combatant_positions[payload.character_id] = payload.target_node_id
-                        target_node = get_node(payload.target_node_id)
+                            combatant_positions[payload.character_id] = target_node.id
+                            record_position(payload.character_id)
+                        for leg in legs:
+                            visibility_registry.reveal(
+                                payload.character_id, leg.coordinates["x"], leg.coordinates["y"]
+                            )
                         
                         # Narrative
                         msg = f"Travelled to {target_node.name}"
+                        if len(legs) > 1:
+                            msg += " via " + ", ".join(leg.name for leg in legs[:-1])
+                        if ambush_index is not None and target_node.id != payload.target_node_id:
+                            msg += " (journey interrupted)"
                         await manager.send_event(websocket, LogEvent(
                             type="LOG", message=msg, level="success"
                         ).model_dump(mode='json'))
@@ -499,7 +711,8 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                         await manager.broadcast(MapUpdateEvent(
                             type="MAP_UPDATE",
                             character_id=payload.character_id,
-                            node_id=payload.target_node_id,
+                            node_id=target_node.id,
+                            path=route,
                             interaction_type="travel",
                             message=msg
                         ).model_dump(mode='json'))
@@ -509,6 +722,9 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                         fact_packet = cartographer.build_travel_fact_packet(
                             node=target_node,
                             world_context=world_ctx,
+                            force_encounter=ambush_index is not None,
+                            check_encounter=False,
+                            route=route,
                         )
                         await stream_narrative(websocket, fact_packet)
 
@@ -540,8 +756,10 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                                         immunities=stats.get("immunities", []),
                                         cr=stats.get("cr", 0),
                                         type=stats.get("type", "unknown"),
+                                        template_id=monster_raw["id"],
                                     )
                                     tracker.start_encounter()
+                                    sync_grid()
 
                                 await manager.send_event(websocket, LogEvent(
                                     type="LOG",
@@ -556,9 +774,38 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                                 await _run_combat_loop(websocket, advance_first=False)
 
                     elif payload.interaction_type == "move":
-                        # Legacy Grid Movement
-                        old_pos = combatant_positions.get(payload.character_id, 0)
-                        combatant_positions[payload.character_id] = payload.cell_id
+                        # Tactical Grid Movement
+                        try:
+                            target_cell = tactical_grid.from_cell_id(payload.cell_id or 0)
+                        except ValueError as e:
+                            await manager.send_event(websocket, LogEvent(
+                                type="LOG", message=str(e), level="error"
+                            ).model_dump(mode='json'))
+                            continue
+
+                        old_cell = tactical_grid.cell_of(payload.character_id)
+                        if old_cell is not None and tracker.has_started:
+                            # In combat, the move must fit the mover's speed around terrain and hostiles
+                            mover = next((c for c in tracker.combatants if c.id == payload.character_id), None)
+                            hostile_ids = [
+                                c.id for c in tracker.combatants
+                                if mover and c.is_player != mover.is_player and c.hp_current > 0
+                            ]
+                            speed = speed_feet(mover.condition_mask, COMBAT_SPEED_FT) if mover else COMBAT_SPEED_FT
+                            reachable = tactical_grid.reachable_for(payload.character_id, speed, hostile_ids)
+                            if target_cell not in reachable:
+                                await manager.send_event(websocket, LogEvent(
+                                    type="LOG", message=f"Cell {payload.cell_id} is out of reach!", level="warning"
+                                ).model_dump(mode='json'))
+                                continue
+                        elif tactical_grid.is_blocked(target_cell):
+                            await manager.send_event(websocket, LogEvent(
+                                type="LOG", message=f"Cell {payload.cell_id} is blocked!", level="warning"
+                            ).model_dump(mode='json'))
+                            continue
+
+                        tactical_grid.place(payload.character_id, target_cell)
+                        record_move(payload.character_id)
                         
                         await manager.broadcast(MapUpdateEvent(
                             type="MAP_UPDATE",
@@ -611,6 +858,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     ac = payload.ac
                     dex = 0
                     actions = []
+                    template_id = None
 
                     if payload.template_id:
                         try:
@@ -625,14 +873,17 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             payload.type = stats.get("type", payload.type)
                             payload.resistances = stats.get("resistances", payload.resistances)
                             payload.immunities = stats.get("immunities", payload.immunities)
+                            template_id = payload.template_id
                         except Exception as e:
                             print(f"Error fetching stats for {payload.template_id}: {e}")
 
                     async with tracker_lock:
                         tracker.add_combatant(
                             payload.instance_id, name, dex, payload.is_player, hp_max, ac, actions,
-                            payload.resistances, payload.immunities, payload.cr, payload.type
+                            payload.resistances, payload.immunities, payload.cr, payload.type,
+                            template_id=template_id,
                         )
+                        sync_grid()
 
                     event = InitiativeUpdateEvent(
                         type="INITIATIVE_UPDATE",
@@ -644,15 +895,8 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     payload = EquipItemAction(**data)
                     try:
                         # Use character_id from payload (frontend now sends dynamic ID)
-                        success = tracker.equip_item(payload.character_id, payload.item_id, payload.slot)
-                        if success:
-                            items = get_inventory(payload.character_id)
-                            event = InventoryUpdateEvent(
-                                type="INVENTORY_UPDATE",
-                                character_id=payload.character_id,
-                                items=[InventoryItemModel(**i) for i in items]
-                            )
-                            await manager.send_event(websocket, event.model_dump(mode='json'))
+                        equip_item(payload.character_id, payload.item_id, payload.slot)
+                        await _send_inventory(websocket, payload.character_id)
                     except Exception as e:
                         print(f"Equip error: {e}")
 
@@ -660,15 +904,8 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     payload = UnequipItemAction(**data)
                     try:
                         # Use character_id from payload
-                        success = tracker.unequip_item(payload.character_id, payload.item_id)
-                        if success:
-                            items = get_inventory(payload.character_id)
-                            event = InventoryUpdateEvent(
-                                type="INVENTORY_UPDATE",
-                                character_id=payload.character_id,
-                                items=[InventoryItemModel(**i) for i in items]
-                            )
-                            await manager.send_event(websocket, event.model_dump(mode='json'))
+                        unequip_item(payload.character_id, payload.item_id)
+                        await _send_inventory(websocket, payload.character_id)
                     except Exception as e:
                         print(f"Unequip error: {e}")
 
@@ -686,14 +923,12 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                          continue
 
                     # 2. Check Conditions
-                    if attacker:
-                        disabling_conditions = {"Surprised", "Unconscious", "Paralyzed", "Petrified", "Stunned", "Incapacitated"}
-                        active_disablers = [c for c in attacker.conditions if c.condition_id in disabling_conditions]
-                        if active_disablers:
-                             await manager.send_event(websocket, LogEvent(
-                                type="LOG", message=f"Cannot act: You are {active_disablers[0].condition_id}!", level="warning"
-                            ).model_dump(mode='json'))
-                             continue
+                    disabler = _disabling_condition(attacker) if attacker else None
+                    if disabler:
+                         await manager.send_event(websocket, LogEvent(
+                            type="LOG", message=f"Cannot act: You are {disabler}!", level="warning"
+                        ).model_dump(mode='json'))
+                         continue
 
                     # 3. Resolve Attack Stats Server-Side
                     # Default to basic unarmed strike or similar if no weapon/action
@@ -707,6 +942,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     count = 1
                     dmg_type = "bludgeoning"
                     dmg_modifier = atk_bonus
+                    ranged = False
 
                     # Weapon Lookup (Enforce SRD stats)
                     if payload.weapon_id:
@@ -715,6 +951,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             sides = w_stats.get("damage_dice_sides", sides)
                             count = w_stats.get("damage_dice_count", count)
                             dmg_type = w_stats.get("damage_type", dmg_type)
+                            ranged = w_stats.get("ranged", False)
                             # modifier is usually STR/DEX, we calculate it here
                             if attacker:
                                 if w_stats.get("finesse", False) or w_stats.get("ranged", False):
@@ -736,22 +973,35 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                                 dmg_modifier = act.get("damage_modifier", dmg_modifier)
                                 dmg_type = act.get("damage_type", dmg_type)
 
+                    # Positional and condition modifiers: cover, unseen attacker/target, Prone, Paralyzed...
+                    mods = _attack_modifiers(payload.attacker_id, target, ranged=ranged)
+                    if not mods.can_target:
+                        await manager.send_event(websocket, LogEvent(
+                            type="LOG", message=f"{target.name} has total cover!", level="warning"
+                        ).model_dump(mode='json'))
+                        continue
+
                     result = resolve_attack(
                         attacker_id=payload.attacker_id,
                         target_id=payload.target_id,
                         attack_bonus=atk_bonus,
-                        target_ac=target.ac, # Server-side AC
+                        target_ac=target.ac + mods.ac_bonus, # Server-side AC
                         damage_dice_sides=sides,
                         damage_dice_count=count,
                         damage_modifier=dmg_modifier,
                         damage_type=dmg_type,
                         target_current_hp=target.hp_current, # Server-side HP
+                        advantage=mods.advantage,
+                        disadvantage=mods.disadvantage,
+                        environment_tags=mods.tags,
+                        auto_crit=mods.auto_crit,
                     )
 
                     async with tracker_lock:
                         target.hp_current = result.target_remaining_hp
                         if result.target_status == "dead":
                             target.is_active = False
+                        record_hp(target)
 
                     fact_packet = result.to_fact_packet()
                     fact_packet.update({
@@ -797,11 +1047,10 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                         continue
 
                     # Check Conditions
-                    disabling_conditions = {"Surprised", "Unconscious", "Paralyzed", "Petrified", "Stunned", "Incapacitated"}
-                    active_disablers = [c for c in attacker.conditions if c.condition_id in disabling_conditions]
-                    if active_disablers:
+                    disabler = _disabling_condition(attacker)
+                    if disabler:
                             await manager.send_event(websocket, LogEvent(
-                            type="LOG", message=f"{attacker.name} is {active_disablers[0].condition_id} and cannot act!", level="warning"
+                            type="LOG", message=f"{attacker.name} is {disabler} and cannot act!", level="warning"
                         ).model_dump(mode='json'))
                             continue
 
@@ -811,22 +1060,34 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                         print(f"Invalid action index {payload.action_index}")
                         continue
 
+                    mods = _attack_modifiers(payload.attacker_id, target)
+                    if not mods.can_target:
+                        await manager.send_event(websocket, LogEvent(
+                            type="LOG", message=f"{target.name} has total cover!", level="warning"
+                        ).model_dump(mode='json'))
+                        continue
+
                     result = resolve_attack(
                         attacker_id=payload.attacker_id,
                         target_id=payload.target_id,
                         attack_bonus=monster_action.get("attack_bonus", 0),
-                        target_ac=target.ac, # Server-side AC
+                        target_ac=target.ac + mods.ac_bonus, # Server-side AC
                         damage_dice_sides=monster_action.get("damage_dice_sides", 6),
                         damage_dice_count=monster_action.get("damage_dice_count", 1),
                         damage_modifier=monster_action.get("damage_modifier", 0),
                         damage_type=monster_action.get("damage_type", "slashing"),
                         target_current_hp=target.hp_current, # Server-side HP
+                        advantage=mods.advantage,
+                        disadvantage=mods.disadvantage,
+                        environment_tags=mods.tags,
+                        auto_crit=mods.auto_crit,
                     )
 
                     async with tracker_lock:
                         target.hp_current = result.target_remaining_hp
                         if result.target_status == "dead":
                             target.is_active = False
+                        record_hp(target)
 
                     fact_packet = result.to_fact_packet()
                     fact_packet.update({
@@ -863,7 +1124,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             duration=s.duration, description=s.description,
                             is_attack=s.is_attack, is_save=s.is_save, save_stat=s.save_stat,
                             damage_dice_sides=s.damage_dice_sides, damage_dice_count=s.damage_dice_count,
-                            damage_type=s.damage_type, aoe_radius=s.aoe_radius,
+                            damage_type=s.damage_type, aoe_radius=s.aoe_radius, aoe_shape=s.aoe_shape,
                             name_es=s.name_es, description_es=s.description_es
                         ) for s in spells_list
                     ]
@@ -879,14 +1140,12 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
 
                     # 1. Fetch Attacker from Tracker
                     attacker = next((c for c in tracker.combatants if c.id == payload.attacker_id), None)
-                    if attacker:
-                        disabling_conditions = {"Surprised", "Unconscious", "Paralyzed", "Petrified", "Stunned", "Incapacitated"}
-                        active_disablers = [c for c in attacker.conditions if c.condition_id in disabling_conditions]
-                        if active_disablers:
-                             await manager.send_event(websocket, LogEvent(
-                                type="LOG", message=f"Cannot cast spell: You are {active_disablers[0].condition_id}!", level="warning"
-                            ).model_dump(mode='json'))
-                             continue
+                    disabler = _disabling_condition(attacker) if attacker else None
+                    if disabler:
+                         await manager.send_event(websocket, LogEvent(
+                            type="LOG", message=f"Cannot cast spell: You are {disabler}!", level="warning"
+                        ).model_dump(mode='json'))
+                         continue
                     
                     # 2. Registry Lookup (MANDATORY § STRIDE-T1)
                     spell_def = get_spell(payload.spell_id)
@@ -913,16 +1172,32 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
 
                     results = []
 
-                    is_aoe = payload.target_ids and len(payload.target_ids) > 0
+                    # AoE targets are resolved server-side from the spell's template
+                    is_aoe = bool(spell_def.aoe_shape in AOE_SHAPES and spell_def.aoe_radius)
+                    aoe_target_ids = []
+                    if is_aoe:
+                        aoe_target_ids = _resolve_aoe_targets(spell_def, payload)
+                        if aoe_target_ids is None:
+                            await manager.send_event(websocket, LogEvent(
+                                type="LOG", message=f"{spell_def.name} needs a target square on the battle grid!", level="warning"
+                            ).model_dump(mode='json'))
+                            continue
                     
                     if is_aoe:
                          # AOE Resolution
                         targets_hp = {}
                         targets_save = {}
-                        for tid in payload.target_ids:
+                        targets_auto_fail = set()
+                        targets_disadvantage = set()
+                        for tid in aoe_target_ids:
                             t = next((c for c in tracker.combatants if c.id == tid), None)
                             if t:
                                 targets_hp[tid] = t.hp_current
+                                auto_fail, save_disadvantage = save_mode(t.condition_mask, save_stat)
+                                if auto_fail:
+                                    targets_auto_fail.add(tid)
+                                if save_disadvantage:
+                                    targets_disadvantage.add(tid)
                                 # Simplified save bonus for now
                                 if save_stat == "dex":
                                     targets_save[tid] = t.dex_mod
@@ -943,7 +1218,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
 
                         results = resolve_aoe_spell(
                             attacker_id=payload.attacker_id,
-                            target_ids=payload.target_ids,
+                            target_ids=aoe_target_ids,
                             save_dc=save_dc,
                             save_stat=save_stat,
                             damage_dice_sides=sides,
@@ -951,7 +1226,9 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             damage_modifier=0, # Damage modifier is usually 0 for spells unless specified
                             damage_type=dmg_type,
                             targets_current_hp=targets_hp,
-                            targets_save_bonuses=targets_save
+                            targets_save_bonuses=targets_save,
+                            targets_auto_fail=targets_auto_fail,
+                            targets_disadvantage=targets_disadvantage,
                         )
                     else:
                         # Single Target Resolution (Legacy/Specific)
@@ -964,11 +1241,19 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             ).model_dump(mode='json'))
                             continue
 
+                        mods = _attack_modifiers(payload.attacker_id, t, ranged=True)
+                        if not mods.can_target:
+                            await manager.send_event(websocket, LogEvent(
+                                type="LOG", message=f"{t.name} has total cover!", level="warning"
+                            ).model_dump(mode='json'))
+                            continue
+
                         if is_save:
                             # Simplified save bonus for now
                             target_save_bonus = 0
                             if save_stat == "dex":
-                                target_save_bonus = t.dex_mod
+                                # Cover also shields against DEX saves
+                                target_save_bonus = t.dex_mod + mods.ac_bonus
                             elif save_stat == "con":
                                 target_save_bonus = t.con_mod
                             elif save_stat == "int":
@@ -978,6 +1263,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             elif save_stat == "cha":
                                 target_save_bonus = t.cha_mod
 
+                            auto_fail, save_disadvantage = save_mode(t.condition_mask, save_stat)
                             res = resolve_saving_throw(
                                 attacker_id=payload.attacker_id,
                                 target_id=target_id,
@@ -989,19 +1275,25 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                                 damage_modifier=0, # Damage modifier is usually 0 for spells unless specified
                                 damage_type=dmg_type,
                                 target_current_hp=t.hp_current,
-                                half_damage_on_success=half_dmg
+                                disadvantage=save_disadvantage,
+                                half_damage_on_success=half_dmg,
+                                auto_fail=auto_fail,
                             )
                         else:
                             res = resolve_attack(
                                 attacker_id=payload.attacker_id,
                                 target_id=target_id,
                                 attack_bonus=atk_bonus,
-                                target_ac=t.ac,
+                                target_ac=t.ac + mods.ac_bonus,
                                 damage_dice_sides=sides,
                                 damage_dice_count=count,
                                 damage_modifier=0, # Damage modifier is usually 0 for spells unless specified
                                 damage_type=dmg_type,
                                 target_current_hp=t.hp_current,
+                                advantage=mods.advantage,
+                                disadvantage=mods.disadvantage,
+                                environment_tags=mods.tags,
+                                auto_crit=mods.auto_crit,
                             )
                         results = [res]
 
@@ -1013,6 +1305,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                                 cbt.hp_current = res.target_remaining_hp
                                 if res.target_status == "dead":
                                     cbt.is_active = False
+                                record_hp(cbt)
 
                     # --- Events & Narrative ---
 
@@ -1061,7 +1354,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                         "action_type": "spell_cast",
                         "spell_name": payload.spell_id,
                         "is_save": payload.is_save or is_aoe,
-                        "save_stat": payload.save_stat,
+                        "save_stat": save_stat,
                         "targets_count": len(results),
                         "total_hits": sum(1 for r in results if r.hit), # logic varies for saves
                         "total_damage_dealt": sum(r.damage_total for r in results)
@@ -1107,6 +1400,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     ac = 10
                     actions = []
                     dex = payload.dex_modifier
+                    template_id = None
 
                     if (payload.combatant_id.startswith("monster_") or not payload.is_player):
                          try:
@@ -1116,11 +1410,14 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                             ac = stats.get("ac", 10)
                             actions = stats.get("actions", [])
                             dex = stats.get("dex_modifier", dex)
+                            template_id = payload.combatant_id
                          except Exception:
                              pass
 
                     async with tracker_lock:
-                        tracker.add_combatant(payload.combatant_id, name, dex, payload.is_player, hp_max, ac, actions)
+                        tracker.add_combatant(payload.combatant_id, name, dex, payload.is_player, hp_max, ac, actions,
+                                              template_id=template_id)
+                        sync_grid()
                         combatant = next(c for c in tracker.combatants if c.id == payload.combatant_id)
                         init_val = tracker.roll_initiative(combatant)
                     
@@ -1152,6 +1449,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     payload = StartCombatAction(**data)
                     async with tracker_lock:
                         tracker.start_encounter()
+                        sync_grid()
                     current = tracker.get_current_actor()
                     
                     fact_packet = {
@@ -1179,6 +1477,7 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     payload = NextTurnAction(**data)
                     async with tracker_lock:
                         current = tracker.next_turn()
+                    await _send_condition_events(websocket)
                     
                     fact_packet = {"action_type": "next_turn", "current_actor": current.name if current else "Unknown"}
                     chunk_index = 0
@@ -1304,5 +1603,12 @@ async def game_websocket(websocket: WebSocket, session_id: str, role: str = "pla
                     type="ACK", status="error", message="A server error occurred."
                 ).model_dump(mode='json'))
 
+            finally:
+                # Auto-save: flush this action's state events (O(delta))
+                try:
+                    autosave()
+                except Exception as e:
+                    print(f"⚠️ Auto-save failed: {e}")
+
     except WebSocketDisconnect:
         manager.disconnect(websocket)
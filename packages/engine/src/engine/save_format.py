@@ -0,0 +1,114 @@
+"""
+Dungeon Cortex — Save Blob Format
+Versioned, compressed encoding for game_saves snapshots.
+
+  header:  b"DCS" + version byte + codec byte
+  body:    zlib(msgpack(state))   — or compact JSON when msgpack is absent
+
+SRD-derived monster data is stored by reference: a combatant with a
+template_id whose actions match the SRD template is saved without them and
+re-hydrated from the SRD on load.
+"""
+
+import json
+import struct
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # Optional: fall back to compact JSON inside the same envelope
+    msgpack = None
+
+SAVE_FORMAT_VERSION = 1
+CODEC_MSGPACK = 1
+CODEC_JSON = 2
+
+_HEADER = struct.Struct(">3sBB")
+_MAGIC = b"DCS"
+
+
+def encode_save(state: dict) -> bytes:
+    if msgpack is not None:
+        codec, payload = CODEC_MSGPACK, msgpack.packb(state, use_bin_type=True)
+    else:
+        codec, payload = CODEC_JSON, json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(_MAGIC, SAVE_FORMAT_VERSION, codec) + zlib.compress(payload, 6)
+
+
+def decode_save(blob) -> dict:
+    """Decode a save blob; legacy rows (plain JSON text) are accepted as-is."""
+    if isinstance(blob, str):
+        return json.loads(blob)
+    blob = bytes(blob)
+    if blob[:3] != _MAGIC:
+        return json.loads(blob.decode("utf-8"))
+    _, version, codec = _HEADER.unpack_from(blob)
+    if version > SAVE_FORMAT_VERSION:
+        raise ValueError(f"Save format v{version} is newer than this engine (v{SAVE_FORMAT_VERSION})")
+    payload = zlib.decompress(blob[_HEADER.size:])
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("This save was written with msgpack; install msgpack to load it")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(payload)
+    raise ValueError(f"Unknown save codec {codec}")
+
+
+# ----------------------------------------------------------------------
+# SRD REFERENCES
+# ----------------------------------------------------------------------
+
+TEMPLATE_CACHE_SIZE = 256
+
+# template_id -> SRD actions (as JSON strings), or None if unavailable
+_template_cache: Dict[str, Optional[Tuple[str, ...]]] = {}
+
+
+def prefetch_templates(template_ids: Iterable[str]) -> None:
+    """Load the SRD actions of many monster templates with one query (e.g. before a load)."""
+    from .srd_queries import get_monster_stats_many
+    missing = [t for t in dict.fromkeys(template_ids) if t and t not in _template_cache]
+    if not missing:
+        return
+    try:
+        stats = get_monster_stats_many(missing)
+    except Exception:
+        stats = {}
+    if len(_template_cache) + len(missing) > TEMPLATE_CACHE_SIZE:
+        _template_cache.clear()
+    for template_id in missing:
+        actions = stats[template_id].get("actions", []) if template_id in stats else None
+        _template_cache[template_id] = (
+            tuple(json.dumps(a, sort_keys=True) for a in actions) if actions is not None else None
+        )
+
+
+def _template_actions(template_id: str) -> Optional[Tuple[str, ...]]:
+    """SRD actions for a monster template (as JSON strings), or None if unavailable."""
+    if template_id not in _template_cache:
+        prefetch_templates([template_id])
+    return _template_cache.get(template_id)
+
+
+def dehydrate_combatant(data: dict) -> dict:
+    """Drop SRD-derived actions when they can be rebuilt from the template."""
+    template_id = data.get("template_id")
+    if not template_id or "actions" not in data:
+        return data
+    template = _template_actions(template_id)
+    if template is None or template != tuple(json.dumps(a, sort_keys=True) for a in data["actions"]):
+        return data  # Customised or SRD unavailable: keep the copy
+    return {k: v for k, v in data.items() if k != "actions"}
+
+
+def hydrate_combatant(data: dict) -> dict:
+    """Restore actions stored by reference."""
+    if "actions" in data or not data.get("template_id"):
+        return data
+    template = _template_actions(data["template_id"])
+    if template is None:
+        print(f"⚠️ SRD template {data['template_id']} unavailable; {data.get('name')} loads without actions")
+        template = ()
+    return {**data, "actions": [json.loads(a) for a in template]}
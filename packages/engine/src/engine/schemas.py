@@ -41,6 +41,12 @@ class CharacterCreationRequest(BaseModel):
     stats: Optional[dict] = None  # {str: 16, dex: 12...} - if None, rolled server-side
 
 
+class SrdBatchRequest(BaseModel):
+    ids: List[str]  # SRD ids; names are resolved like /api/srd/{id}
+    lang: str = "en"
+    fields: Optional[List[str]] = None  # Top-level keys to keep, e.g. ["name", "hit_points"]
+
+
 class GameSession(BaseModel):
     save_id: str
     character: CombatantState
@@ -56,7 +62,7 @@ class InventoryItemModel(BaseModel):
     slot_type: Optional[str]
     grid_index: Optional[int] = None
     charges: int
-    stats: dict
+    stats: dict = {}  # Empty in the slim projection; see GetItemDetailsAction
     visual_asset_url: Optional[str] = None
     rarity: str = "Common"
     attunement: bool = False
@@ -70,6 +76,12 @@ class BaseAction(BaseModel):
 class GetInventoryAction(BaseAction):
     action: Literal["get_inventory"]
     character_id: str = "player"
+    known_version: Optional[int] = None  # Skip the item list if the client is current
+    full: bool = False                   # Attach full SRD stats to every item
+
+class GetItemDetailsAction(BaseAction):
+    action: Literal["get_item_details"]
+    item_id: str
 
 class GenerateLootAction(BaseAction):
     action: Literal["generate_loot"]
@@ -126,7 +138,8 @@ class CastSpellAction(BaseAction):
     spell_id: str  # Required to fetch from registry
     attacker_id: str = "player"
     target_id: str = "enemy"
-    target_ids: Optional[List[str]] = None
+    target_ids: Optional[List[str]] = None  # AoE fallback when the template cannot be placed on the grid
+    target_cell: Optional[int] = None  # AoE aim point on the tactical grid
     condition: Optional[str] = None
     is_save: bool = False
     # CRITICAL: Overrides removed for security (§ STRIDE-T1)
@@ -167,12 +180,21 @@ class CloseWidgetAction(BaseAction):
     action: Literal["close_widget"]
     widget_id: str
 
+class Viewport(BaseModel):
+    """Bounding box in map percent (0-100), as sent by the world map."""
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+
 class MapInteractionAction(BaseAction):
     action: Literal["map_interaction"]
     character_id: str
     target_node_id: Optional[str] = None
     cell_id: Optional[int] = None
     interaction_type: str = "travel" # travel, inspect, etc.
+    viewport: Optional[Viewport] = None  # request_data: only the nodes inside this box
 
 
 class NarrativeActionAction(BaseAction):
@@ -201,6 +223,7 @@ class GetShopAction(BaseAction):
 # Union type for validation
 GameAction = Union[
     GetInventoryAction,
+    GetItemDetailsAction,
     GenerateLootAction,
     SearchMonstersAction,
     AddCombatantAction,
@@ -240,6 +263,16 @@ class InventoryUpdateEvent(BaseEvent):
     type: Literal["INVENTORY_UPDATE"]
     character_id: str
     items: List[InventoryItemModel]
+    version: int = 0
+
+class InventoryUnchangedEvent(BaseEvent):
+    type: Literal["INVENTORY_UNCHANGED"] = "INVENTORY_UNCHANGED"
+    character_id: str
+    version: int
+
+class ItemDetailsEvent(BaseEvent):
+    type: Literal["ITEM_DETAILS"] = "ITEM_DETAILS"
+    item: InventoryItemModel
 
 class NarrativeChunkEvent(BaseEvent):
     type: Literal["NARRATIVE_CHUNK"]
@@ -290,6 +323,7 @@ class MapDataEvent(BaseEvent):
     type: Literal["MAP_DATA"] = "MAP_DATA"
     nodes: List[MapNode]
     current_node_id: str
+    viewport: Optional[Viewport] = None  # Echoed when only a viewport slice was sent
 
 
 class SpellData(BaseModel):
@@ -309,6 +343,7 @@ class SpellData(BaseModel):
     damage_dice_count: int
     damage_type: str
     aoe_radius: int
+    aoe_shape: Optional[str] = None
     name_es: Optional[str] = None
     description_es: Optional[str] = None
 
@@ -331,6 +366,7 @@ class MapUpdateEvent(BaseEvent):
     character_id: str
     cell_id: Optional[int] = None
     node_id: Optional[str] = None
+    path: Optional[List[str]] = None  # Node ids walked on a multi-hop journey
     interaction_type: str
     message: Optional[str] = None
 
@@ -342,6 +378,14 @@ class GoldUpdateEvent(BaseEvent):
     delta: int  # amount added this transaction
 
 
+class AssetReadyEvent(BaseEvent):
+    type: Literal["ASSET_READY"] = "ASSET_READY"
+    character_id: str
+    instance_id: str
+    template_id: str
+    visual_asset_url: str
+
+
 class ShopItemModel(BaseModel):
     rarity: str
     buy_price: int
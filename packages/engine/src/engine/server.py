@@ -6,8 +6,10 @@ HTTP + WebSocket server for the AG-UI protocol.
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from .db import get_db, close_db
+from .migrations import migrate
 from .routers import srd, combat, websocket, game, maps
 from .ai.chronos import ChronosClient
 from .ai.visual_vault import VisualVaultClient
@@ -21,49 +23,8 @@ async def lifespan(app: FastAPI):
     """Application lifecycle: startup and shutdown hooks."""
     db = get_db()
     
-    # Ensure essential tables exist
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS game_saves (
-            save_id TEXT PRIMARY KEY,
-            data_json TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS actors (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            type TEXT NOT NULL, -- person, monster, object
-            location_node_id TEXT, -- Added for map positioning
-            data_json TEXT NOT NULL DEFAULT '{}',
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS items (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            actor_id TEXT, -- Owner ID
-            data_json TEXT NOT NULL DEFAULT '{}',
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (actor_id) REFERENCES actors(id)
-        )
-    """)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS inventory_item (
-            id TEXT PRIMARY KEY,
-            character_id TEXT,
-            template_id TEXT,
-            location TEXT DEFAULT 'backpack',
-            slot_type TEXT,
-            grid_index INTEGER DEFAULT 0,
-            current_charges INTEGER DEFAULT 0,
-            is_identified INTEGER DEFAULT 1,
-            visual_asset_url TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    db.commit()
+    # Bring the schema up to date (only pending migrations run)
+    migrate(db)
     try:
         count = db.execute("SELECT COUNT(*) FROM srd_mechanic").fetchone()[0]
         print(f"🎲 Dungeon Cortex Engine starting... ({count} SRD mechanics loaded)")
@@ -91,6 +52,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (SRD batches, listings, search results)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include Routers
 app.include_router(srd.router)
 app.include_router(combat.router)
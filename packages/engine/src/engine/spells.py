@@ -31,7 +31,8 @@ class Spell:
     damage_dice_sides: int = 0
     damage_dice_count: int = 0
     damage_type: str = ""
-    aoe_radius: int = 0
+    aoe_radius: int = 0  # Template size in feet (radius, length or side)
+    aoe_shape: Optional[str] = None  # sphere, cylinder, cube, cone, line
     condition: Optional[str] = None
 
 def get_db_connection():
@@ -65,13 +66,19 @@ def _parse_spell(row: sqlite3.Row) -> Spell:
         damage_dice_sides=damage_info["sides"],
         damage_dice_count=damage_info["count"],
         damage_type=damage_info["type"],
-        aoe_radius=_extract_aoe(data)
+        aoe_radius=_extract_aoe(data),
+        aoe_shape=_extract_aoe_shape(data)
     )
 
 def _extract_aoe(data: Dict) -> int:
     aoe = data.get("area_of_effect", {})
     return aoe.get("size", 0)
 
+def _extract_aoe_shape(data: Dict) -> Optional[str]:
+    aoe = data.get("area_of_effect") or {}
+    shape = aoe.get("type")
+    return shape.lower() if shape else None
+
 def _load_spanish_data(row: sqlite3.Row) -> Dict[str, Any]:
     if not row["data_es"]:
         return {}
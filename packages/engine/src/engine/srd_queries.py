@@ -9,15 +9,18 @@ from functools import lru_cache
 from httpx import HTTPError  # Not really needed for sqlite, just used standard exc
 from fastapi import HTTPException
 import re
+from typing import Optional
 from .db import get_db
-from .db_utils import get_json_extract_sql
+from .name_resolver import name_resolver
+from . import srd_search
 
 @lru_cache(maxsize=128)
 
-def get_srd_mechanic(mechanic_id: str, lang: str = "en") -> dict:
+def get_srd_mechanic(mechanic_id: str, lang: str = "en", kind: Optional[str] = None) -> dict:
     """
     Fetch a single raw SRD mechanic by ID.
     Returns the deserialized JSON data.
+    `kind` (e.g. "monster") narrows the name fallback to one mechanic type.
     """
     db = get_db()
     row = db.execute(
@@ -26,21 +29,16 @@ def get_srd_mechanic(mechanic_id: str, lang: str = "en") -> dict:
     ).fetchone()
 
     if not row:
-        # FALLBACK: Try searching by name if ID fails (Context Precision / Recall improvement)
-        # Often LLMs or user input use human-readable names instead of slugified IDs
-        search_term = mechanic_id.replace("_", " ").lower()
-        # Use parity-safe JSON extraction
-        name_extract = get_json_extract_sql("data_json", "$.name")
-        row = db.execute(
-            f"""
-            SELECT id, type, data_json, data_es 
-            FROM srd_mechanic 
-            WHERE {name_extract} COLLATE NOCASE = ? 
-            OR id LIKE ?
-            LIMIT 1
-            """,
-            (search_term, f"%{mechanic_id}%")
-        ).fetchone()
+        # FALLBACK: Resolve human-readable / misspelled / Spanish names (Context Precision / Recall improvement)
+        # Often LLMs or user input use human-readable names instead of slugified IDs.
+        # The in-memory resolver answers (and negatively caches) without touching SQL.
+        # Partial id match is the last resort; it is memoized by the resolver as well.
+        resolver = name_resolver(db)
+        resolved = resolver.resolve_one(mechanic_id, kind) or resolver.resolve_partial(mechanic_id, kind)
+        if resolved:
+            row = db.execute(
+                "SELECT id, type, data_json, data_es FROM srd_mechanic WHERE id = ?", (resolved,)
+            ).fetchone()
 
     if not row:
         raise HTTPException(status_code=404, detail=f"Mechanic '{mechanic_id}' not found")
@@ -49,6 +47,76 @@ def get_srd_mechanic(mechanic_id: str, lang: str = "en") -> dict:
     json_str = row["data_es"] if lang == "es" else row["data_json"]
     return json.loads(json_str)
 
+
+BATCH_CHUNK = 500  # Stay well under SQLITE_MAX_VARIABLE_NUMBER
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _fetch_documents(db, ids: list[str], lang: str, fields: Optional[list[str]]) -> dict:
+    """id -> parsed document (or just `fields` of it) for the ids that exist."""
+    # Spanish falls back to English for untranslated records
+    doc = "CASE WHEN ? = 'es' AND data_es NOT IN ('', '{}') THEN data_es ELSE data_json END"
+    if fields:
+        # Project inside SQLite so only the requested keys are serialized and parsed.
+        # `->` keeps JSON types (json_extract turns true into 1) and is NULL for an
+        # absent key, which is then left out like the full document would.
+        body = ", ".join(f"doc -> '$.{f}'" for f in fields)
+    else:
+        body = "doc"
+    found = {}
+    for start in range(0, len(ids), BATCH_CHUNK):
+        chunk = ids[start:start + BATCH_CHUNK]
+        rows = db.execute(
+            f"SELECT id, {body} FROM (SELECT id, {doc} AS doc FROM srd_mechanic WHERE id IN ({', '.join('?' * len(chunk))}))",
+            [lang, *chunk]
+        ).fetchall()
+        if fields:
+            found.update(
+                (row[0], {f: json.loads(v) for f, v in zip(fields, row[1:]) if v is not None}) for row in rows
+            )
+        else:
+            found.update((row[0], json.loads(row[1])) for row in rows)
+    return found
+
+
+def get_many(
+    ids: list[str],
+    lang: str = "en",
+    fields: Optional[list[str]] = None,
+    kind: Optional[str] = None,
+) -> dict:
+    """
+    Fetch many SRD mechanics in one round-trip: requested id -> data.
+    Ids that are not primary keys go through the same name fallback as
+    get_srd_mechanic (narrowed by `kind`); unknown ids are left out.
+    `fields` limits each document to those top-level keys.
+    """
+    if fields:
+        bad = [f for f in fields if not _FIELD_NAME.match(f)]
+        if bad:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(bad)}")
+    requested = list(dict.fromkeys(i for i in ids if i))
+    if not requested:
+        return {}
+
+    db = get_db()
+    found = _fetch_documents(db, requested, lang, fields)
+    aliases = {}
+    missing = [i for i in requested if i not in found]
+    if missing:
+        resolver = name_resolver(db)
+        aliases = {i: resolver.resolve_one(i, kind) for i in missing}
+        targets = list(dict.fromkeys(t for t in aliases.values() if t and t not in found))
+        if targets:
+            found.update(_fetch_documents(db, targets, lang, fields))
+
+    result = {}
+    for i in requested:
+        key = i if i in found else aliases.get(i)
+        if key in found:
+            result[i] = found[key]
+    return result
+
 @lru_cache(maxsize=512)
 
 def parse_dice_string(dice_str: str) -> tuple[int, int, int]:
@@ -79,7 +147,7 @@ def get_weapon_stats(weapon_id: str) -> dict:
     Get damage dice and properties for a weapon.
     e.g. 'equipment_longsword' -> {damage: '1d8', type: 'slashing'}
     """
-    data = get_srd_mechanic(weapon_id)
+    data = get_srd_mechanic(weapon_id, kind="equipment")
     
     # 1. Try structured "damage" object (dnd5eapi style)
     damage_info = data.get("damage", {})
@@ -123,7 +191,7 @@ def get_spell_mechanics(spell_id: str) -> dict:
     """
     Get core mechanics for a spell.
     """
-    data = get_srd_mechanic(spell_id)
+    data = get_srd_mechanic(spell_id, kind="spell")
     
     mechanics = {
         "name": data.get("name", "Unknown Spell"),
@@ -215,8 +283,18 @@ def get_monster_stats(monster_id: str) -> dict:
     """
     Get AC, HP, and relevant combat stats for a monster.
     """
-    data = get_srd_mechanic(monster_id)
-    
+    return _monster_stats(monster_id, get_srd_mechanic(monster_id, kind="monster"))
+
+
+def get_monster_stats_many(monster_ids: list[str]) -> dict:
+    """get_monster_stats for several monsters with a single SRD query: id -> stats."""
+    return {
+        monster_id: _monster_stats(monster_id, data)
+        for monster_id, data in get_many(monster_ids, kind="monster").items()
+    }
+
+
+def _monster_stats(monster_id: str, data: dict) -> dict:
     # AC in SRD is a list of objects usually: [{'value': 15, 'type': 'armor'}]
     ac_list = data.get("armor_class", [])
     ac = 10
@@ -289,39 +367,39 @@ def get_monster_stats(monster_id: str) -> dict:
     # Apply Errata / Patches
     return _apply_monster_errata(monster_id, stats)
 
-def get_random_monster_by_cr(min_cr: float, max_cr: float):
+def _pick_monster_in_cr_range(db, min_cr: float, max_cr: float):
     """
-    Pick a random monster from the SRD whose CR falls within [min_cr, max_cr].
-    Returns raw monster data dict with an added 'id' key, or None if not found.
+    Uniform pick over an indexed CR range: count the range, then step to a
+    random offset along idx_srd_mechanic_type_cr. No JSON parsing, no sort.
     """
-    db = get_db()
-    rows = db.execute(
+    count = db.execute(
+        "SELECT COUNT(*) FROM srd_mechanic WHERE type = 'monster' AND cr BETWEEN ? AND ?",
+        (min_cr, max_cr)
+    ).fetchone()[0]
+    if not count:
+        return None
+    return db.execute(
         """
         SELECT id, data_json FROM srd_mechanic
-        WHERE type = 'monster'
-        AND CAST(json_extract(data_json, '$.challenge_rating') AS REAL) BETWEEN ? AND ?
-        ORDER BY RANDOM()
-        LIMIT 1
+        WHERE type = 'monster' AND cr BETWEEN ? AND ?
+        ORDER BY cr
+        LIMIT 1 OFFSET ?
         """,
-        (min_cr, max_cr)
-    ).fetchall()
+        (min_cr, max_cr, random.randrange(count))
+    ).fetchone()
 
-    if not rows:
-        # Fallback: any CR 0-1 monster
-        rows = db.execute(
-            """
-            SELECT id, data_json FROM srd_mechanic
-            WHERE type = 'monster'
-            AND CAST(json_extract(data_json, '$.challenge_rating') AS REAL) BETWEEN 0 AND 1
-            ORDER BY RANDOM()
-            LIMIT 1
-            """
-        ).fetchall()
 
-    if not rows:
+def get_random_monster_by_cr(min_cr: float, max_cr: float):
+    """
+    Pick a random monster from the SRD whose CR falls within [min_cr, max_cr].
+    Returns raw monster data dict with an added 'id' key, or None if not found.
+    """
+    db = get_db()
+    # Fallback: any CR 0-1 monster
+    row = _pick_monster_in_cr_range(db, min_cr, max_cr) or _pick_monster_in_cr_range(db, 0, 1)
+    if not row:
         return None
 
-    row = rows[0]
     data = json.loads(row["data_json"])
     data["id"] = row["id"]
     return data
@@ -353,36 +431,104 @@ def _apply_monster_errata(monster_id: str, stats: dict) -> dict:
 
 def search_monsters(query: str, limit: int = 10) -> list[dict]:
     """
-    Search for monsters by name.
-    Returns a list of simplified monster objects {id, name, cr, type}.
+    Search for monsters by name (ranked, prefix and typo tolerant).
+    Returns a list of simplified monster objects {id, name, cr, type, hp, ac}.
+    """
+    found = srd_search.search(query, types=["monster"], limit=limit, db=get_db())
+    return [
+        {
+            "id": r["id"],
+            "name": r["name"],
+            "cr": r["cr"] or 0,
+            "type": r["creature_type"] or "monster",
+            "hp": r["hp"] or 0,
+            "ac": r["ac"] or 0,
+        }
+        for r in found["results"]
+    ]
+
+
+# ----------------------------------------------------------------------
+# TYPE LISTINGS
+# ----------------------------------------------------------------------
+
+# Projectable listing fields -> SQL over the materialized columns
+LIST_FIELDS = {
+    "id": "m.id",
+    "index": "substr(m.id, length(m.type) + 2)",
+    "name": "COALESCE(m.name, 'Unknown')",
+    "type": "m.type",
+    "cr": "m.cr",
+    "level": "m.level",
+    "rarity": "m.rarity",
+    "school": "m.school",
+    "hp": "m.hp",
+    "ac": "m.ac",
+    "creature_type": "m.creature_type",
+}
+DEFAULT_LIST_FIELDS = ("id", "name", "index")
+
+_type_counts: Optional[dict] = None
+_type_counts_conn = None
+_type_counts_version: Optional[int] = None
+
+
+def count_by_type(db=None) -> dict:
+    """Row count per srd_mechanic type, recounted only when the SRD may have changed."""
+    global _type_counts, _type_counts_conn, _type_counts_version
+    db = db or get_db()
+    version = db.execute("PRAGMA data_version").fetchone()[0]
+    if _type_counts is None or _type_counts_conn is not db or _type_counts_version != version:
+        rows = db.execute("SELECT type, COUNT(*) FROM srd_mechanic GROUP BY type").fetchall()
+        _type_counts = {r[0]: r[1] for r in rows}
+        _type_counts_conn, _type_counts_version = db, version
+    return _type_counts
+
+
+def invalidate_type_counts():
+    """Call after writing srd_mechanic on the shared connection."""
+    global _type_counts
+    _type_counts = None
+
+
+def list_mechanics(
+    mechanic_type: str,
+    after: Optional[str] = None,
+    limit: int = 50,
+    fields: Optional[list[str]] = None,
+    lang: str = "en",
+) -> dict:
+    """
+    One page of a type, ordered by id. `after` is the previous page's
+    next_cursor (keyset: an index seek, whatever the depth). `fields`
+    picks from LIST_FIELDS; nothing is deserialized.
     """
+    fields = list(dict.fromkeys(fields or DEFAULT_LIST_FIELDS))
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
     db = get_db()
-    # Safe parameter substitution for MATCH
-    # FTS4/5 search: SELECT ... FROM table_fts WHERE table_fts MATCH 'query'
-    # The srd_mechanic_fts usually contains the content/name of the mechanic
-    
-    rows = db.execute(
-        """
-        SELECT m.id, m.data_json 
-        FROM srd_mechanic m
-        JOIN srd_mechanic_fts fts ON m.id = fts.id
-        WHERE m.type = 'monster' 
-        AND srd_mechanic_fts MATCH ?
+    columns = {f: LIST_FIELDS[f] for f in fields}
+    join = ""
+    if lang == "es" and "name" in columns:
+        # Spanish names live in the search index (rowids mirror srd_mechanic)
+        columns["name"] = f"COALESCE(NULLIF(f.name_es, ''), {LIST_FIELDS['name']})"
+        join = "LEFT JOIN srd_mechanic_fts f ON f.rowid = m.rowid AND f.id = m.id"
+    select = ", ".join(f'{sql} AS "{f}"' for f, sql in columns.items())
+
+    rows = db.execute(f"""
+        SELECT m.id AS _cursor, {select}
+        FROM srd_mechanic m {join}
+        WHERE m.type = ? AND m.id > ?
+        ORDER BY m.id
         LIMIT ?
-        """,
-        (query, limit)
-    ).fetchall()
-    
-    results = []
-    for row in rows:
-        data = json.loads(row["data_json"])
-        results.append({
-            "id": row["id"],
-            "name": data.get("name", "Unknown"),
-            "cr": data.get("challenge_rating", 0),
-            "type": data.get("type", "monster"),
-            "hp": data.get("hit_points", 0),
-            "ac": data.get("armor_class", [{"value": 0}])[0].get("value", 0) if isinstance(data.get("armor_class"), list) else data.get("armor_class", 0)
-        })
-        
-    return results
+    """, (mechanic_type, after or "", limit + 1)).fetchall()
+
+    items = [{f: row[f] for f in fields} for row in rows[:limit]]
+    return {
+        "type": mechanic_type,
+        "total": count_by_type(db).get(mechanic_type, 0),
+        "items": items,
+        "next_cursor": rows[limit - 1]["_cursor"] if len(rows) > limit else None,
+    }
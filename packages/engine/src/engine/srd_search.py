@@ -0,0 +1,274 @@
+"""
+Dungeon Cortex — Ranked SRD Search
+One search over monsters, spells and items, backed by srd_mechanic_fts.
+
+  - The FTS table keeps names apart from descriptions so bm25 can weight
+    a name hit NAME_WEIGHT times a description hit; an exact name sorts first.
+  - Every query term is a prefix ("fire bal" finds Fireball). When nothing
+    matches, the trigram name resolver supplies typo-tolerant hits instead.
+  - Type and CR-band facets count the whole match set; each facet ignores its
+    own filter so the client can show what switching it would return.
+  - Display fields come from the materialized srd_mechanic columns and
+    snippets from FTS5 snippet(); no data_json is parsed.
+  - Results are memoized per connection + PRAGMA data_version, like the
+    loot tables and the name resolver; callers get a copy of the cached entry.
+"""
+
+import copy
+import json
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .db import get_db
+from .loot_tables import cr_band
+from .name_resolver import name_resolver, normalize_name
+
+NAME_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+FUZZY_CANDIDATES = 50
+QUERY_CACHE_SIZE = 1024
+SNIPPET_TOKENS = 12
+
+# Public search kinds -> srd_mechanic.type values
+SEARCH_KINDS = {
+    "monster": ("monster",),
+    "spell": ("spell",),
+    "item": ("equipment", "magic_item"),
+}
+
+FTS_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS srd_mechanic_fts USING fts5(
+        id UNINDEXED,
+        type UNINDEXED,
+        name_en,
+        name_es,
+        content_en,
+        content_es,
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+# Column order matches FTS_DDL; unindexed columns carry no weight
+_BM25 = f"bm25(srd_mechanic_fts, 0, 0, {NAME_WEIGHT}, {NAME_WEIGHT}, {TEXT_WEIGHT}, {TEXT_WEIGHT})"
+
+
+# ----------------------------------------------------------------------
+# INDEX
+# ----------------------------------------------------------------------
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value) if value else ""
+
+
+def rebuild_search_index(db: sqlite3.Connection) -> int:
+    """
+    (Re)build srd_mechanic_fts from srd_mechanic; returns the rows indexed.
+    Used by migration 007 and by the ingest pipeline after each import.
+    FTS rowids mirror srd_mechanic rowids so details can be joined cheaply.
+    """
+    fts_columns = {row[1] for row in db.execute("PRAGMA table_info(srd_mechanic_fts)")}
+    if fts_columns and "name_en" not in fts_columns:
+        db.execute("DROP TABLE srd_mechanic_fts")  # Pre-007 layout: name folded into content
+    db.execute(FTS_DDL)
+    db.execute("DELETE FROM srd_mechanic_fts")
+
+    columns = {row[1] for row in db.execute("PRAGMA table_info(srd_mechanic)")}
+    data_es = "data_es" if "data_es" in columns else "NULL"
+    rows = db.execute(f"SELECT rowid, id, type, data_json, {data_es} FROM srd_mechanic").fetchall()
+    entries = []
+    for rowid, mechanic_id, kind, data_json, es_json in rows:
+        en = json.loads(data_json or "{}")
+        es = json.loads(es_json or "{}")
+        entries.append((
+            rowid, mechanic_id, kind,
+            _text(en.get("name")), _text(es.get("name")),
+            _text(en.get("desc")), _text(es.get("desc")),
+        ))
+    db.executemany(
+        "INSERT INTO srd_mechanic_fts (rowid, id, type, name_en, name_es, content_en, content_es) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        entries
+    )
+    invalidate_search_cache()
+    return len(entries)
+
+
+# ----------------------------------------------------------------------
+# QUERY
+# ----------------------------------------------------------------------
+
+def match_expression(query: str) -> Optional[str]:
+    """FTS5 MATCH string: every normalized term as a quoted prefix, ANDed."""
+    terms = normalize_name(query).split()
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+
+def _expand_kinds(types: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    if not types:
+        return None
+    kinds = []
+    for t in types:
+        kinds.extend(SEARCH_KINDS.get(t, (t,)))
+    return tuple(sorted(set(kinds)))
+
+
+def _in_cr(cr: Optional[float], cr_min: Optional[float], cr_max: Optional[float]) -> bool:
+    if cr_min is None and cr_max is None:
+        return True
+    if cr is None:
+        return False
+    return (cr_min is None or cr >= cr_min) and (cr_max is None or cr <= cr_max)
+
+
+def _details(db: sqlite3.Connection, ids: Sequence[str], lang: str) -> Dict[str, dict]:
+    if not ids:
+        return {}
+    marks = ", ".join("?" * len(ids))
+    rows = db.execute(f"""
+        SELECT m.id, m.type, m.name, f.name_es, m.cr, m.level, m.rarity, m.school,
+               m.hp, m.ac, m.creature_type
+        FROM srd_mechanic m
+        LEFT JOIN srd_mechanic_fts f ON f.rowid = m.rowid AND f.id = m.id
+        WHERE m.id IN ({marks})
+    """, list(ids)).fetchall()
+    details = {}
+    for r in rows:
+        details[r[0]] = {
+            "id": r[0],
+            "type": r[1],
+            "name": (r[3] if lang == "es" and r[3] else r[2]) or r[0],
+            "cr": r[4],
+            "level": r[5],
+            "rarity": r[6],
+            "school": r[7],
+            "hp": r[8],
+            "ac": r[9],
+            "creature_type": r[10],
+        }
+    return details
+
+
+def _snippets(db: sqlite3.Connection, match: str, ids: Sequence[str]) -> Dict[str, str]:
+    if not ids:
+        return {}
+    marks = ", ".join("?" * len(ids))
+    rows = db.execute(f"""
+        SELECT id, snippet(srd_mechanic_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})
+        FROM srd_mechanic_fts
+        WHERE srd_mechanic_fts MATCH ? AND id IN ({marks})
+    """, [match, *ids]).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+def search(
+    query: str,
+    types: Optional[Iterable[str]] = None,
+    cr_min: Optional[float] = None,
+    cr_max: Optional[float] = None,
+    lang: str = "en",
+    limit: int = 20,
+    offset: int = 0,
+    db: Optional[sqlite3.Connection] = None,
+) -> dict:
+    """
+    Ranked search over the SRD. `types` takes search kinds ("monster",
+    "spell", "item") or raw srd_mechanic types. Returns
+    {query, total, fuzzy, results, facets: {type, cr}}; results carry a
+    score (higher is better) and a <mark>-highlighted snippet.
+    """
+    db = db or get_db()
+    key = normalize_name(query)
+    kinds = _expand_kinds(types)
+    cache = _query_cache(db)
+    cache_key = (key, kinds, cr_min, cr_max, lang, limit, offset)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    # Every match as (id, type, cr, score), best first
+    match = match_expression(query)
+    hits: List[Tuple[str, str, Optional[float], float]] = []
+    if match:
+        rows = db.execute(f"""
+            SELECT f.id, m.type, m.cr, {_BM25} AS score
+            FROM srd_mechanic_fts f
+            JOIN srd_mechanic m ON m.id = f.id
+            WHERE srd_mechanic_fts MATCH ?
+            ORDER BY (m.name_lower = ?) DESC, score
+        """, (match, key)).fetchall()
+        hits = [(r[0], r[1], r[2], round(-r[3], 3)) for r in rows]
+
+    fuzzy = False
+    if not hits and key:
+        resolver = name_resolver(db)
+        if kinds is None:
+            ranked = resolver.resolve(query, limit=FUZZY_CANDIDATES)
+        else:
+            # Candidates come from the asked types only, so other types cannot crowd them out
+            ranked = sorted(
+                (m for kind in kinds for m in resolver.resolve(query, kind, limit=FUZZY_CANDIDATES)),
+                key=lambda m: (-m.score, m.id),
+            )[:FUZZY_CANDIDATES]
+        if ranked:
+            fuzzy = True
+            crs = {r[0]: r[1] for r in db.execute(
+                f"SELECT id, cr FROM srd_mechanic WHERE id IN ({', '.join('?' * len(ranked))})",
+                [m.id for m in ranked]
+            )}
+            hits = [(m.id, m.type, crs.get(m.id), m.score) for m in ranked]
+
+    selected = [h for h in hits if (kinds is None or h[1] in kinds) and _in_cr(h[2], cr_min, cr_max)]
+    type_facet = Counter(h[1] for h in hits if _in_cr(h[2], cr_min, cr_max))
+    cr_facet = Counter(cr_band(h[2]) for h in hits if h[2] is not None and (kinds is None or h[1] in kinds))
+
+    page = selected[offset:offset + limit]
+    ids = [h[0] for h in page]
+    details = _details(db, ids, lang)
+    snippets = _snippets(db, match, ids) if match and not fuzzy else {}
+    results = []
+    for mechanic_id, _, _, score in page:
+        result = details.get(mechanic_id)
+        if result is None:
+            continue  # Index row without a mechanic (stale index)
+        result["score"] = score
+        result["snippet"] = snippets.get(mechanic_id)
+        results.append(result)
+
+    response = {
+        "query": query,
+        "total": len(selected),
+        "fuzzy": fuzzy,
+        "results": results,
+        "facets": {"type": dict(type_facet), "cr": dict(cr_facet)},
+    }
+    if len(cache) >= QUERY_CACHE_SIZE:
+        cache.clear()
+    cache[cache_key] = response
+    return copy.deepcopy(response)
+
+
+# ----------------------------------------------------------------------
+# CACHE
+# ----------------------------------------------------------------------
+
+_cache: Dict[tuple, dict] = {}
+_cache_conn: Optional[sqlite3.Connection] = None
+_cache_version: Optional[int] = None
+
+
+def _query_cache(db: sqlite3.Connection) -> Dict[tuple, dict]:
+    """Result cache for `db`, emptied whenever the SRD may have changed."""
+    global _cache_conn, _cache_version
+    version = db.execute("PRAGMA data_version").fetchone()[0]
+    if _cache_conn is not db or _cache_version != version:
+        _cache.clear()
+        _cache_conn, _cache_version = db, version
+    return _cache
+
+
+def invalidate_search_cache():
+    """Call after writing srd_mechanic on the shared connection."""
+    _cache.clear()
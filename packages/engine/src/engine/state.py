@@ -1,10 +1,40 @@
+"""
+Dungeon Cortex — Session State & Persistence
+Global session objects plus event-sourced saves.
+
+Every mutation (combatant added, HP, conditions, turn, grid move, world
+position, fog reveal) is appended as a compact event to `game_events`.
+A save row in `game_saves` is a snapshot tagged with the last event seq it
+covers; loading restores the snapshot and replays the events after it.
+Snapshots are compact blobs (save_format.py) with listing metadata
+(name, class, level, location) in indexed columns beside them.
+Saving the active game only flushes new events (O(delta)), so auto-save
+runs after every action; a fresh snapshot compacts the log every
+SNAPSHOT_EVERY events or on explicit save-as.
+"""
+
 import asyncio
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
 from .initiative import InitiativeTracker, Combatant
 from .conditions import ActiveCondition
+from .visibility import VisibilityRegistry
+from .tactical import TacticalGrid
+from .los import LineOfSight
+from .movement import GRID_WIDTH, GRID_HEIGHT
 from .db import get_db
+from .migrations import migrate
+from .save_format import encode_save, decode_save, dehydrate_combatant, hydrate_combatant, prefetch_templates
 import json
 from dataclasses import asdict
 
+# Events between compacting snapshots
+SNAPSHOT_EVERY = 200
+
+# Save metadata promoted to columns so listing never decodes a blob
+METADATA_COLUMNS = ("character_name", "character_class", "level", "location")
+
 # Global Initiative Tracker (single session for now)
 # Global Initiative Tracker (single session for now)
 tracker = InitiativeTracker()
@@ -12,58 +42,369 @@ tracker = InitiativeTracker()
 # Asyncio lock for thread-safe tracker mutations
 tracker_lock = asyncio.Lock()
 
-# Track combatant positions: {character_id: cell_id (int) or node_id (str)}
+# Track world positions: {character_id: node_id}
 combatant_positions: dict[str, any] = {}
 
-def save_game(save_id: str):
-    """Persist current tracker state to DB."""
-    state = {
+# Tactical (combat) positions, terrain and range queries live on the battle grid
+tactical_grid = TacticalGrid(GRID_WIDTH, GRID_HEIGHT)
+# Cached shadowcast visibility fields + cover over the same grid
+line_of_sight = LineOfSight(tactical_grid)
+
+# Per-character Fog of War (packed 1-bit masks, serialized into saves)
+visibility_registry = VisibilityRegistry()
+
+# ----------------------------------------------------------------------
+# EVENT LOG
+# ----------------------------------------------------------------------
+
+class CombatLog:
+    """Append-only event log for the save currently in play."""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection] = get_db):
+        self._connect = connect
+        self._ready = False
+        self.save_id: Optional[str] = None
+        self.seq = 0            # last event appended (buffered or written)
+        self.snapshot_seq = 0   # last event covered by the save's snapshot
+        self._pending: List[tuple] = []
+        self._muted = 0
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        db = self._connect()
+        if not self._ready:
+            migrate(db)
+            self._ready = True
+        return db
+
+    def attach(self, save_id: str, seq: int, snapshot_seq: int):
+        self.flush()  # Buffered events still belong to the previous save
+        self.save_id = save_id
+        self.seq = seq
+        self.snapshot_seq = snapshot_seq
+        self._pending.clear()
+
+    @contextmanager
+    def muted(self):
+        """Suppress logging while state is rebuilt from a snapshot or replay."""
+        self._muted += 1
+        try:
+            yield
+        finally:
+            self._muted -= 1
+
+    @property
+    def backlog(self) -> int:
+        return self.seq - self.snapshot_seq
+
+    def append(self, kind: str, data: dict):
+        if self.save_id is None or self._muted:
+            return
+        self.seq += 1
+        self._pending.append((self.save_id, self.seq, kind, json.dumps(data, separators=(",", ":"))))
+
+    def flush(self) -> int:
+        """Write buffered events in one transaction. Returns how many were written."""
+        if not self._pending:
+            return 0
+        db = self.db
+        pending, self._pending = self._pending, []
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO game_events (save_id, seq, kind, data_json) VALUES (?, ?, ?, ?)",
+                pending,
+            )
+        return len(pending)
+
+    def events(self, save_id: str, after_seq: int = 0) -> List[Tuple[int, str, dict]]:
+        """Events after a seq, oldest first (replay input and audit trail)."""
+        rows = self.db.execute(
+            "SELECT seq, kind, data_json FROM game_events WHERE save_id = ? AND seq > ? ORDER BY seq",
+            (save_id, after_seq),
+        ).fetchall()
+        return [(row["seq"], row["kind"], json.loads(row["data_json"])) for row in rows]
+
+    def compact(self, save_id: str, upto_seq: int):
+        db = self.db
+        db.execute("DELETE FROM game_events WHERE save_id = ? AND seq <= ?", (save_id, upto_seq))
+        db.commit()
+
+
+combat_log = CombatLog()
+
+
+# --- Recording (called after in-place mutations the hooks cannot see) ---
+
+def record_hp(combatant: Combatant):
+    combat_log.append("hp", {"id": combatant.id, "hp": combatant.hp_current, "active": combatant.is_active})
+
+
+def record_roster():
+    """Turn order, initiative and encounter flags (after sorting or dropping combatants)."""
+    combat_log.append("roster", {
+        "ids": [c.id for c in tracker.combatants],
+        "initiative": {c.id: c.initiative for c in tracker.combatants},
+        "round": tracker.round,
+        "turn_index": tracker.turn_index,
+        "has_started": tracker.has_started,
+    })
+
+
+def record_move(token_id: str):
+    cell = tactical_grid.cell_of(token_id)
+    combat_log.append("move", {"id": token_id, "cell": tactical_grid.to_cell_id(cell) if cell is not None else None})
+
+
+def record_position(entity_id: str):
+    combat_log.append("position", {"id": entity_id, "node": combatant_positions.get(entity_id)})
+
+
+def _free_cell(is_player: bool) -> Optional[Tuple[int, int]]:
+    """First open square, scanning columns from the west edge for players, the east for everyone else."""
+    columns = range(tactical_grid.width) if is_player else range(tactical_grid.width - 1, -1, -1)
+    for x in columns:
+        for y in range(tactical_grid.height):
+            if not tactical_grid.is_blocked((x, y)) and not tactical_grid.occupants((x, y)):
+                return (x, y)
+    return None
+
+
+def sync_grid():
+    """
+    Put every tracker combatant on the battle grid and take departed ones off.
+    Combatants already placed keep their square; newcomers take the first open
+    square on their side. Placements are logged like moves.
+    """
+    ids = {c.id for c in tracker.combatants}
+    for token_id in [t for t in tactical_grid.positions if t not in ids]:
+        tactical_grid.remove(token_id)
+        record_move(token_id)
+    for c in tracker.combatants:
+        if tactical_grid.cell_of(c.id) is None:
+            cell = _free_cell(c.is_player)
+            if cell is None:
+                print(f"⚠️ No free grid square for {c.id}")
+                continue
+            tactical_grid.place(c.id, cell)
+            record_move(c.id)
+
+
+def _on_tracker_change(kind: str, combatant: Optional[Combatant]):
+    if kind == "combatant":
+        combat_log.append("combatant", dehydrate_combatant(asdict(combatant)))
+    elif kind == "conditions":
+        combat_log.append("conditions", {"id": combatant.id, "conditions": [asdict(c) for c in combatant.conditions]})
+    elif kind == "turn":
+        combat_log.append("turn", {"round": tracker.round, "turn_index": tracker.turn_index})
+    elif kind == "roster":
+        record_roster()
+
+
+def _on_reveal(viewer_id: str, x: float, y: float, radius: float):
+    combat_log.append("reveal", {"id": viewer_id, "x": x, "y": y, "r": radius})
+
+
+tracker.observer = _on_tracker_change
+visibility_registry.on_reveal = _on_reveal
+
+
+# ----------------------------------------------------------------------
+# SNAPSHOT + REPLAY
+# ----------------------------------------------------------------------
+
+def _combatant_from_dict(c_data: dict) -> Combatant:
+    c_data = hydrate_combatant(dict(c_data))
+    c_data["conditions"] = [
+        ActiveCondition(**cond) if isinstance(cond, dict) else cond
+        for cond in c_data.get("conditions", [])
+    ]
+    return Combatant(**c_data)
+
+
+def snapshot_state() -> dict:
+    """Full session state in the save-file format."""
+    return {
         "round": tracker.round,
         "turn_index": tracker.turn_index,
-        "combatants": [asdict(c) for c in tracker.combatants],
+        "combatants": [dehydrate_combatant(asdict(c)) for c in tracker.combatants],
         "has_started": tracker.has_started,
-        "positions": combatant_positions
+        "positions": dict(combatant_positions),
+        "visibility": visibility_registry.to_dict(),
+        "grid": tactical_grid.to_dict(),
     }
-    
-    db = get_db()
-    db.execute("INSERT OR REPLACE INTO game_saves (save_id, data_json) VALUES (?, ?)", 
-               (save_id, json.dumps(state)))
+
+
+def write_snapshot(save_id: str, metadata: Optional[dict] = None):
+    """
+    Snapshot the session into `save_id` (keeping existing metadata such as
+    character_name), drop the events it covers and log further changes there.
+    """
+    db = combat_log.db
+    if combat_log.save_id == save_id:
+        combat_log.flush()
+        seq = combat_log.seq
+    else:
+        row = db.execute("SELECT MAX(seq) FROM game_events WHERE save_id = ?", (save_id,)).fetchone()
+        seq = row[0] or 0
+
+    row = db.execute(
+        f"SELECT data_json, data_blob, {', '.join(METADATA_COLUMNS)} FROM game_saves WHERE save_id = ?", (save_id,)
+    ).fetchone()
+    data = _decode_row(row) if row else {}
+    columns = {col: row[col] for col in METADATA_COLUMNS} if row else {}
+    for key, value in (metadata or {}).items():
+        if key in METADATA_COLUMNS:
+            columns[key] = value
+        else:
+            data[key] = value
+    for key in METADATA_COLUMNS:
+        data.pop(key, None)  # Legacy JSON saves kept these in the blob
+    data.update(snapshot_state())
+    data["event_seq"] = seq
+    db.execute(f"""
+        INSERT INTO game_saves (save_id, data_json, data_blob, {', '.join(METADATA_COLUMNS)})
+        VALUES (?, NULL, ?, ?, ?, ?, ?)
+        ON CONFLICT(save_id) DO UPDATE SET
+            data_json = NULL, data_blob = excluded.data_blob,
+            character_name = excluded.character_name, character_class = excluded.character_class,
+            level = excluded.level, location = excluded.location
+    """, (save_id, encode_save(data), *(columns.get(col) for col in METADATA_COLUMNS)))
     db.commit()
-    print(f"Game saved: {save_id}")
+    combat_log.compact(save_id, seq)
+    combat_log.attach(save_id, seq, seq)
+
+
+def save_game(save_id: str):
+    """Persist the session: a delta flush for the game in play, else a full snapshot."""
+    if combat_log.save_id == save_id:
+        written = combat_log.flush()
+        if combat_log.backlog >= SNAPSHOT_EVERY:
+            write_snapshot(save_id)
+        print(f"Game saved: {save_id} ({written} new events)")
+    else:
+        write_snapshot(save_id)
+        print(f"Game saved: {save_id}")
+
+
+def autosave():
+    """Flush the active game's events (run after every action)."""
+    if combat_log.save_id is None:
+        return
+    combat_log.flush()
+    if combat_log.backlog >= SNAPSHOT_EVERY:
+        write_snapshot(combat_log.save_id)
+
+
+def _apply_event(kind: str, data: dict):
+    if kind == "combatant":
+        c = _combatant_from_dict(data)
+        index = next((i for i, old in enumerate(tracker.combatants) if old.id == c.id), None)
+        if index is None:
+            tracker.combatants.append(c)
+        else:
+            tracker.combatants[index] = c
+        return
+    if kind == "roster":
+        by_id = {c.id: c for c in tracker.combatants}
+        tracker.combatants[:] = [by_id[cid] for cid in data["ids"] if cid in by_id]
+        for c in tracker.combatants:
+            c.initiative = data["initiative"].get(c.id, c.initiative)
+        tracker.round = data["round"]
+        tracker.turn_index = data["turn_index"]
+        tracker.has_started = data["has_started"]
+    elif kind == "turn":
+        tracker.round = data["round"]
+        tracker.turn_index = data["turn_index"]
+    elif kind in ("hp", "conditions"):
+        c = next((c for c in tracker.combatants if c.id == data["id"]), None)
+        if c is None:
+            return
+        if kind == "hp":
+            c.hp_current = data["hp"]
+            c.is_active = data["active"]
+        else:
+            c.conditions = [ActiveCondition(**cond) for cond in data["conditions"]]
+            c.refresh_condition_mask()
+    elif kind == "move":
+        if data["cell"] is None:
+            tactical_grid.remove(data["id"])
+        else:
+            tactical_grid.place(data["id"], tactical_grid.from_cell_id(data["cell"]))
+    elif kind == "position":
+        if data["node"] is None:
+            combatant_positions.pop(data["id"], None)
+        else:
+            combatant_positions[data["id"]] = data["node"]
+    elif kind == "reveal":
+        visibility_registry.reveal(data["id"], data["x"], data["y"], data["r"])
+    else:
+        print(f"⚠️ Skipping unknown save event: {kind}")
+
+
+def _decode_row(row) -> dict:
+    return decode_save(row["data_blob"]) if row["data_blob"] is not None else json.loads(row["data_json"] or "{}")
+
+
+def get_save_metadata(save_id: str) -> Optional[dict]:
+    """Listing columns for one save (None if it does not exist)."""
+    row = combat_log.db.execute(
+        f"SELECT save_id, created_at, {', '.join(METADATA_COLUMNS)} FROM game_saves WHERE save_id = ?", (save_id,)
+    ).fetchone()
+    return dict(row) if row else None
+
 
 def load_game(save_id: str) -> bool:
-    """Load tracker state from DB."""
-    db = get_db()
-    row = db.execute("SELECT data_json FROM game_saves WHERE save_id = ?", (save_id,)).fetchone()
+    """Restore the snapshot, replay the events logged after it, and resume logging."""
+    db = combat_log.db
+    row = db.execute("SELECT data_json, data_blob FROM game_saves WHERE save_id = ?", (save_id,)).fetchone()
     
     if not row:
         return False
         
-    data = json.loads(row["data_json"])
-    
-    tracker.round = data.get("round", 1)
-    tracker.turn_index = data.get("turn_index", 0)
-    tracker.has_started = data.get("has_started", False)
-    
-    tracker.combatants.clear()
-    for c_data in data.get("combatants", []):
-        raw_conditions = c_data.get("conditions", [])
-        c_data["conditions"] = [
-            ActiveCondition(**cond) if isinstance(cond, dict) else cond
-            for cond in raw_conditions
-        ]
-        c = Combatant(**c_data)
-        tracker.combatants.append(c)
-    
-    # Load positions
-    global combatant_positions
-    combatant_positions = data.get("positions", {})
-        
-    print(f"Game loaded: {save_id}")
+    data = _decode_row(row)
+    snapshot_seq = data.get("event_seq", 0)
+
+    with combat_log.muted():
+        tracker.round = data.get("round", 1)
+        tracker.turn_index = data.get("turn_index", 0)
+        tracker.has_started = data.get("has_started", False)
+
+        tracker.combatants.clear()
+        # One SRD query for every template referenced by the save
+        prefetch_templates(c.get("template_id") for c in data.get("combatants", []))
+        for c_data in data.get("combatants", []):
+            tracker.combatants.append(_combatant_from_dict(c_data))
+
+        # Load positions (in place: other modules hold a reference to this dict)
+        combatant_positions.clear()
+        tactical_grid.load_dict(data.get("grid", {}))
+        for entity_id, pos in data.get("positions", {}).items():
+            if isinstance(pos, int):
+                # Legacy saves stored grid cells alongside world nodes
+                try:
+                    tactical_grid.place(entity_id, tactical_grid.from_cell_id(pos))
+                except ValueError:
+                    print(f"⚠️ Dropping off-grid legacy position {pos} for {entity_id}")
+            else:
+                combatant_positions[entity_id] = pos
+        visibility_registry.load_dict(data.get("visibility", {}))
+
+        seq = snapshot_seq
+        for seq, kind, event in combat_log.events(save_id, snapshot_seq):
+            _apply_event(kind, event)
+
+    tracker.condition_events.clear()
+    tracker.rebuild_schedule()
+    combat_log.attach(save_id, seq, snapshot_seq)
+    # Saves from before the grid was filled from the tracker have unplaced combatants
+    sync_grid()
+
+    print(f"Game loaded: {save_id} (replayed {seq - snapshot_seq} events)")
     return True
 
 def list_saves() -> list[dict]:
-    """List all available saves."""
-    db = get_db()
-    rows = db.execute("SELECT save_id, created_at FROM game_saves ORDER BY created_at DESC").fetchall()
-    return [{"save_id": row["save_id"], "created_at": row["created_at"]} for row in rows]
+    """List all available saves (metadata columns only; blobs are never decoded)."""
+    rows = combat_log.db.execute(
+        f"SELECT save_id, created_at, {', '.join(METADATA_COLUMNS)} FROM game_saves ORDER BY created_at DESC"
+    ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,221 @@
+"""
+Dungeon Cortex — Tactical Grid
+Square battle grid for combat positioning (5 ft per square, 5e rules).
+
+  - Configurable dimensions; cells are addressed 1-based row-major like
+    movement.py / HexMap.tsx (cell_id = y * width + x + 1).
+  - Obstacle and difficult-terrain layers (flat bytearrays).
+  - Uniform-grid spatial hash of token positions for range queries
+    ("who is within 5 ft / 30 ft") without scanning every token.
+  - Reachable cells within a speed budget (Dijkstra over 1/2-cost squares,
+    diagonals count as 5 ft), cached per terrain revision.
+"""
+
+import heapq
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]  # (x, y), 0-based
+
+FEET_PER_SQUARE = 5
+BUCKET_SIZE = 6            # spatial hash bucket edge in squares (30 ft)
+FLOOD_CACHE_SIZE = 128     # cached reachable-cell flood fills
+
+_NEIGHBOURS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class TacticalGrid:
+    def __init__(self, width: int = 5, height: int = 5):
+        self.reset(width, height)
+
+    def reset(self, width: int, height: int):
+        """Clear terrain and tokens, optionally resizing the grid."""
+        if width < 1 or height < 1:
+            raise ValueError("Grid dimensions must be positive")
+        self.width = width
+        self.height = height
+        self.blocked = bytearray(width * height)            # 1 = impassable
+        self.terrain_cost = bytearray([1]) * (width * height)  # squares per step (2 = difficult)
+        self.positions: Dict[str, Cell] = {}
+        self._buckets: Dict[Cell, Set[str]] = {}
+        self._occupied: Dict[Cell, Set[str]] = {}
+        self.terrain_revision = 0
+        self.occupancy_revision = 0
+        self._flood_cache: "OrderedDict[tuple, Dict[Cell, int]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # ADDRESSING
+    # ------------------------------------------------------------------
+
+    def in_bounds(self, cell: Cell) -> bool:
+        return 0 <= cell[0] < self.width and 0 <= cell[1] < self.height
+
+    def to_cell_id(self, cell: Cell) -> int:
+        return cell[1] * self.width + cell[0] + 1
+
+    def from_cell_id(self, cell_id: int) -> Cell:
+        index = cell_id - 1
+        cell = (index % self.width, index // self.width)
+        if index < 0 or not self.in_bounds(cell):
+            raise ValueError(f"Cell {cell_id} is outside the {self.width}x{self.height} grid")
+        return cell
+
+    def _index(self, cell: Cell) -> int:
+        return cell[1] * self.width + cell[0]
+
+    @staticmethod
+    def distance(a: Cell, b: Cell) -> int:
+        """Squares between two cells (Chebyshev: diagonals count as one)."""
+        return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+    # ------------------------------------------------------------------
+    # TERRAIN LAYERS
+    # ------------------------------------------------------------------
+
+    def set_obstacle(self, cell: Cell, blocked: bool = True):
+        self.blocked[self._index(cell)] = 1 if blocked else 0
+        self.terrain_revision += 1
+
+    def set_difficult(self, cell: Cell, difficult: bool = True):
+        self.terrain_cost[self._index(cell)] = 2 if difficult else 1
+        self.terrain_revision += 1
+
+    def is_blocked(self, cell: Cell) -> bool:
+        return bool(self.blocked[self._index(cell)])
+
+    # ------------------------------------------------------------------
+    # TOKENS + SPATIAL HASH
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _bucket(cell: Cell) -> Cell:
+        return (cell[0] // BUCKET_SIZE, cell[1] // BUCKET_SIZE)
+
+    def place(self, token_id: str, cell: Cell):
+        """Put a token on a cell (moving it if already placed)."""
+        if not self.in_bounds(cell):
+            raise ValueError(f"{cell} is outside the grid")
+        self.remove(token_id)
+        self.positions[token_id] = cell
+        self._buckets.setdefault(self._bucket(cell), set()).add(token_id)
+        self._occupied.setdefault(cell, set()).add(token_id)
+        self.occupancy_revision += 1
+
+    def remove(self, token_id: str):
+        cell = self.positions.pop(token_id, None)
+        if cell is None:
+            return
+        for index, key in ((self._buckets, self._bucket(cell)), (self._occupied, cell)):
+            members = index.get(key)
+            if members is not None:
+                members.discard(token_id)
+                if not members:
+                    del index[key]
+        self.occupancy_revision += 1
+
+    def cell_of(self, token_id: str) -> Optional[Cell]:
+        return self.positions.get(token_id)
+
+    def occupants(self, cell: Cell) -> Set[str]:
+        return set(self._occupied.get(cell, ()))
+
+    def tokens_within(self, origin: Cell, feet: int, exclude: Iterable[str] = ()) -> List[str]:
+        """Token ids within `feet` of a cell, nearest first."""
+        squares = feet // FEET_PER_SQUARE
+        bx0, by0 = self._bucket((origin[0] - squares, origin[1] - squares))
+        bx1, by1 = self._bucket((origin[0] + squares, origin[1] + squares))
+        skip = set(exclude)
+        found = []
+        for bx in range(bx0, bx1 + 1):
+            for by in range(by0, by1 + 1):
+                for token_id in self._buckets.get((bx, by), ()):
+                    if token_id in skip:
+                        continue
+                    d = self.distance(origin, self.positions[token_id])
+                    if d <= squares:
+                        found.append((d, token_id))
+        return [token_id for _, token_id in sorted(found)]
+
+    def tokens_near(self, token_id: str, feet: int) -> List[str]:
+        origin = self.positions.get(token_id)
+        if origin is None:
+            return []
+        return self.tokens_within(origin, feet, exclude=(token_id,))
+
+    # ------------------------------------------------------------------
+    # MOVEMENT
+    # ------------------------------------------------------------------
+
+    def reachable(self, start: Cell, speed_feet: int,
+                  impassable: FrozenSet[Cell] = frozenset()) -> Dict[Cell, int]:
+        """
+        Cells reachable from `start` within `speed_feet`, mapped to feet spent.
+        Entering difficult terrain costs double. `impassable` adds extra blockers
+        (e.g. hostile creatures). Results are cached until terrain changes.
+        """
+        key = (start, speed_feet, impassable, self.terrain_revision)
+        cached = self._flood_cache.get(key)
+        if cached is not None:
+            self._flood_cache.move_to_end(key)
+            return cached
+
+        budget = speed_feet // FEET_PER_SQUARE
+        spent = {start: 0}
+        heap = [(0, start)]
+        while heap:
+            cost, cell = heapq.heappop(heap)
+            if cost > spent[cell]:
+                continue
+            x, y = cell
+            for dx, dy in _NEIGHBOURS:
+                nxt = (x + dx, y + dy)
+                if not self.in_bounds(nxt) or nxt in impassable:
+                    continue
+                index = nxt[1] * self.width + nxt[0]
+                if self.blocked[index]:
+                    continue
+                step = cost + self.terrain_cost[index]
+                if step <= budget and step < spent.get(nxt, budget + 1):
+                    spent[nxt] = step
+                    heapq.heappush(heap, (step, nxt))
+
+        result = {cell: squares * FEET_PER_SQUARE for cell, squares in spent.items()}
+        self._flood_cache[key] = result
+        if len(self._flood_cache) > FLOOD_CACHE_SIZE:
+            self._flood_cache.popitem(last=False)
+        return result
+
+    def reachable_for(self, token_id: str, speed_feet: int, hostile_ids: Iterable[str] = ()) -> Dict[Cell, int]:
+        """
+        Squares a token can end its move on: hostile squares cannot be crossed,
+        and no square occupied by another creature can be the destination.
+        """
+        start = self.positions[token_id]
+        hostile = frozenset(self.positions[t] for t in hostile_ids if t in self.positions)
+        cells = self.reachable(start, speed_feet, impassable=hostile)
+        return {
+            cell: feet for cell, feet in cells.items()
+            if cell == start or not (self._occupied.get(cell, set()) - {token_id})
+        }
+
+    # ------------------------------------------------------------------
+    # SERIALIZATION
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "obstacles": [i for i, v in enumerate(self.blocked) if v],
+            "difficult": [i for i, v in enumerate(self.terrain_cost) if v == 2],
+            "tokens": {tid: self.to_cell_id(cell) for tid, cell in self.positions.items()},
+        }
+
+    def load_dict(self, data: dict):
+        self.reset(data.get("width", self.width), data.get("height", self.height))
+        for i in data.get("obstacles", []):
+            self.blocked[i] = 1
+        for i in data.get("difficult", []):
+            self.terrain_cost[i] = 2
+        for token_id, cell_id in data.get("tokens", {}).items():
+            self.place(token_id, self.from_cell_id(cell_id))
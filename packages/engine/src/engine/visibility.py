@@ -3,11 +3,179 @@ Dungeon Cortex — Visibility & Fog of War (§3.2)
 Logic for alpha-masking maps to represent explored vs unexplored areas.
 """
 
+import base64
+import bisect
+import json
+import os
+import struct
+import threading
+import zlib
+from functools import lru_cache
 from PIL import Image, ImageDraw
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
 
-class VisibilityManager:
+# Parchment colour #f4e4bc from the design system
+PARCHMENT_RGBA = (244, 228, 188, 255)
+PARCHMENT_NOISE_DENSITY = 0.01  # 1% of pixels get a faint ink fleck
+PARCHMENT_NOISE_MAX_ALPHA = 10
+TILE_SIZE = 256  # Fog mask and masked output are stored as TILE_SIZE² tiles
+REVEAL_LOG_LIMIT = 512  # Logged reveals kept for incremental redraws
+
+Tile = Tuple[int, int]
+Box = Tuple[int, int, int, int]  # (x0, y0, x1, y1), end-exclusive pixels
+
+
+def tile_box(tile: Tile, size: Tuple[int, int], tile_size: int = TILE_SIZE) -> Box:
+    """Pixel bounds of a tile within an image of `size` (W, H), clipped at the edges."""
+    tx, ty = tile
+    return (tx * tile_size, ty * tile_size,
+            min((tx + 1) * tile_size, size[0]), min((ty + 1) * tile_size, size[1]))
+
+
+def all_tiles(size: Tuple[int, int], tile_size: int = TILE_SIZE) -> List[Tile]:
+    cols = -(-size[0] // tile_size)
+    rows = -(-size[1] // tile_size)
+    return [(tx, ty) for ty in range(rows) for tx in range(cols)]
+
+
+def tiles_for_region(region: Tuple[float, float, float, float], size: Tuple[int, int],
+                     tile_size: int = TILE_SIZE) -> Set[Tile]:
+    """Tiles of an image of `size` touched by a fractional (0..1) region."""
+    x0 = max(0, int(region[0] * size[0]) - 1)
+    y0 = max(0, int(region[1] * size[1]) - 1)
+    x1 = min(size[0] - 1, int(region[2] * size[0]) + 1)
+    y1 = min(size[1] - 1, int(region[3] * size[1]) + 1)
+    if x1 < x0 or y1 < y0:
+        return set()
+    return {(tx, ty)
+            for ty in range(y0 // tile_size, y1 // tile_size + 1)
+            for tx in range(x0 // tile_size, x1 // tile_size + 1)}
+
+
+@lru_cache(maxsize=8)
+def _parchment_texture(width: int, height: int) -> np.ndarray:
+    """
+    Pre-render the parchment backdrop for a given size as an (H, W, 4) uint8 array.
+    Noise is generated in one vectorized pass and cached per size.
+    """
+    texture = np.empty((height, width, 4), dtype=np.uint8)
+    texture[...] = PARCHMENT_RGBA
+
+    rng = np.random.default_rng(width * 100_003 + height)
+    count = int(width * height * PARCHMENT_NOISE_DENSITY)
+    flat = texture.reshape(-1, 4)
+    idx = rng.integers(0, width * height, size=count)
+    alpha = rng.integers(0, PARCHMENT_NOISE_MAX_ALPHA + 1, size=count, dtype=np.uint16)
+
+    # Blend a black fleck of `alpha` over the parchment colour
+    rgb = flat[idx, :3].astype(np.uint16)
+    flat[idx, :3] = ((rgb * (255 - alpha)[:, None] + 127) // 255).astype(np.uint8)
+
+    texture.setflags(write=False)
+    return texture
+
+
+def composite_arrays(img: np.ndarray, backdrop: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Blend two (H, W, C) uint8 arrays with an (H, W) uint8 mask.
+    255 in mask -> `img`, 0 -> `backdrop` (same semantics as Image.composite).
+    """
+    m = mask.astype(np.uint16)[..., None]
+    blended = img.astype(np.uint16) * m + backdrop.astype(np.uint16) * (255 - m)
+    return ((blended + 127) // 255).astype(np.uint8)
+
+
+def reveal_region(x_percent: float, y_percent: float, radius_percent: float,
+                  width: int, height: int) -> Tuple[float, float, float, float]:
+    """Fractional bounding box of a reveal (the radius is a share of the width)."""
+    x = (x_percent / 100.0) * width
+    y = (y_percent / 100.0) * height
+    r = (radius_percent / 100.0) * width
+    return ((x - r) / width, (y - r) / height, (x + r) / width, (y + r) / height)
+
+
+class RevealLog:
+    """
+    Revision-ordered reveal regions for incremental redraws. The log is
+    capped at `limit` entries and can be trimmed to the oldest revision a
+    consumer still needs; asking about anything older than what is kept
+    (`floor`) answers None, meaning "treat every tile as dirty".
+    """
+
+    def __init__(self, limit: int = REVEAL_LOG_LIMIT):
+        self.limit = limit
+        self.floor = 0
+        # (revision, viewer id or None, fractional region)
+        self.entries: List[Tuple[int, Optional[str], Tuple[float, float, float, float]]] = []
+
+    def append(self, revision: int, region: Tuple[float, float, float, float], viewer_id: Optional[str] = None):
+        self.entries.append((revision, viewer_id, region))
+        if len(self.entries) > self.limit:
+            self.trim(self.entries[len(self.entries) // 2][0] - 1)
+
+    def trim(self, keep_after: int):
+        """Forget reveals at or before `keep_after`."""
+        cut = bisect.bisect_right(self.entries, keep_after, key=lambda e: e[0])
+        if cut:
+            self.floor = max(self.floor, self.entries[cut - 1][0])
+            del self.entries[:cut]
+
+    def reset(self, revision: int):
+        """Drop everything: views older than `revision` must redraw in full."""
+        self.entries.clear()
+        self.floor = revision
+
+    def since(self, since_revision: int):
+        """Entries newer than `since_revision`, or None if some were already dropped."""
+        if since_revision < self.floor:
+            return None
+        return self.entries[bisect.bisect_right(self.entries, since_revision, key=lambda e: e[0]):]
+
+
+class _MaskSource:
+    """
+    Scaling/cropping of an L-mode `mask` (0 = unexplored, 255 = explored).
+    Compositing reads any mask source through mask_array / mask_tile /
+    dirty_tiles / revision, so the world fog and per-viewer views share it.
+    """
+
+    width: int
+    height: int
+    mask: Image.Image
+    revision: int
+    _scaled_masks: Dict[Tuple[int, int], np.ndarray]
+
+    def mask_tile(self, size: Tuple[int, int], box: Box) -> np.ndarray:
+        """
+        The mask scaled to `size`, cropped to `box`, computed from the matching
+        source region only (cost scales with the tile, not the map).
+        """
+        if size == (self.width, self.height):
+            return np.asarray(self.mask.crop(box), dtype=np.uint8)
+        sx, sy = self.width / size[0], self.height / size[1]
+        src = (box[0] * sx, box[1] * sy, box[2] * sx, box[3] * sy)
+        region = self.mask.resize((box[2] - box[0], box[3] - box[1]), Image.LANCZOS, box=src)
+        return np.asarray(region, dtype=np.uint8)
+
+    def mask_array(self, size: Tuple[int, int]) -> np.ndarray:
+        """Return the mask scaled to `size` (W, H) as a uint8 array, cached until the mask changes."""
+        cached = self._scaled_masks.get(size)
+        if cached is None:
+            if size != (self.width, self.height):
+                scaled = self.mask.resize(size, Image.LANCZOS)
+            else:
+                scaled = self.mask
+            cached = np.asarray(scaled, dtype=np.uint8)
+            self._scaled_masks[size] = cached
+        return cached
+
+    def dirty_tiles(self, size: Tuple[int, int], since_revision: int) -> Set[Tile]:
+        raise NotImplementedError
+
+
+class VisibilityManager(_MaskSource):
     def __init__(self, width: int = 1280, height: int = 720):
         self.width = width
         self.height = height
@@ -15,6 +183,15 @@ class VisibilityManager:
         # 0 = Unexplored (Transparent/Dark), 255 = Explored (Visible)
         self.mask = Image.new("L", (width, height), 0)
         self.draw = ImageDraw.Draw(self.mask)
+        # Resized masks keyed by target size; cleared whenever the mask changes
+        self._scaled_masks: Dict[Tuple[int, int], np.ndarray] = {}
+        # Incremental bookkeeping: each reveal bumps the revision and logs its
+        # fractional bounding box so consumers can redraw only touched tiles.
+        self.revision = 0
+        self.reveal_log = RevealLog()
+        self._saved_revision = 0
+        # Decoded raw captures keyed by path -> (mtime, pixels)
+        self._raw_cache: Dict[str, Tuple[float, np.ndarray]] = {}
 
     def reveal_area(self, x_percent: float, y_percent: float, radius_percent: float = 15):
         """
@@ -24,44 +201,129 @@ class VisibilityManager:
         x = (x_percent / 100.0) * self.width
         y = (y_percent / 100.0) * self.height
         r = (radius_percent / 100.0) * self.width
-        
+
         self.draw.ellipse([x - r, y - r, x + r, y + r], fill=255)
+        self._scaled_masks.clear()
+
+        self.revision += 1
+        region = reveal_region(x_percent, y_percent, radius_percent, self.width, self.height)
+        self.reveal_log.append(self.revision, region)
+        return region
 
-    def apply_mask(self, image_path: Path, output_path: Path):
+    def dirty_tiles(self, size: Tuple[int, int], since_revision: int) -> Set[Tile]:
+        """Tiles of an image of `size` touched by reveals newer than `since_revision`."""
+        entries = self.reveal_log.since(since_revision)
+        if entries is None:
+            return set(all_tiles(size))
+        dirty: Set[Tile] = set()
+        for _, _, region in entries:
+            dirty |= tiles_for_region(region, size)
+        return dirty
+
+    def trim_reveal_log(self, keep_after: int):
+        """Drop reveals no consumer needs (mask tiles are saved up to `_saved_revision`)."""
+        self.reveal_log.trim(min(keep_after, self._saved_revision))
+
+    def apply_mask(self, image_path: Path, output_path: Path, view: Optional[_MaskSource] = None):
         """
-        Apply the current mask to an image.
+        Apply the current mask (or a viewer's `view`) to an image.
         Unexplored areas will be masked with a parchment-like color.
         """
         if not image_path.exists():
             return
-            
+        source = view or self
+
         with Image.open(image_path).convert("RGBA") as img:
-            # Scale mask to match image if necessary
-            if img.size != (self.width, self.height):
-                current_mask = self.mask.resize(img.size, Image.LANCZOS)
-            else:
-                current_mask = self.mask
-            
-            # Create a "parchment" version for unexplored areas
-            # Using the color #f4e4bc from the design system
-            parchment_color = (244, 228, 188, 255)
-            parchment = Image.new("RGBA", img.size, parchment_color)
-            
-            # Optional: Add subtle noise to parchment
-            import random
-            draw = ImageDraw.Draw(parchment)
-            for _ in range(int(img.size[0] * img.size[1] * 0.01)): # 1% noise
-                rx = random.randint(0, img.size[0] - 1)
-                ry = random.randint(0, img.size[1] - 1)
-                noise_alpha = random.randint(0, 10)
-                draw.point((rx, ry), fill=(0, 0, 0, noise_alpha))
-
-            # Create the final composite
-            # Note: Composite uses the mask to blend between the two images.
-            # 255 (white) in mask -> uses 'img'
-            # 0 (black) in mask -> uses 'parchment'
-            out = Image.composite(img, parchment, current_mask)
-            out.save(output_path, "PNG")
+            size = img.size
+            pixels = np.asarray(img, dtype=np.uint8)
+
+        out = composite_arrays(pixels, _parchment_texture(*size), source.mask_array(size))
+        Image.fromarray(out, "RGBA").save(output_path, "PNG")
+
+    def _load_raw(self, image_path: Path) -> np.ndarray:
+        key = str(image_path)
+        mtime = image_path.stat().st_mtime
+        cached = self._raw_cache.get(key)
+        if cached is None or cached[0] != mtime:
+            with Image.open(image_path).convert("RGBA") as img:
+                cached = (mtime, np.asarray(img, dtype=np.uint8))
+            self._raw_cache[key] = cached
+        return cached[1]
+
+    def apply_mask_tiles(self, image_path: Path, tile_dir: Path, prefix: str,
+                         since_revision: Optional[int] = None,
+                         view: Optional[_MaskSource] = None) -> List[dict]:
+        """
+        Composite the fog (or a viewer's `view`) over `image_path` tile by tile
+        and write each touched tile as `{prefix}_{tx}_{ty}.png` in `tile_dir`.
+        With `since_revision`, only tiles touched by later reveals are redrawn;
+        otherwise the full grid. A `{prefix}.json` manifest records the grid
+        and revision. Returns the tile diffs: [{"tile": [tx, ty], "box": [...], "file": name}].
+        """
+        if not image_path.exists():
+            return []
+        source = view or self
+
+        pixels = self._load_raw(image_path)
+        size = (pixels.shape[1], pixels.shape[0])
+        parchment = _parchment_texture(*size)
+        tile_dir.mkdir(parents=True, exist_ok=True)
+
+        if since_revision is None:
+            targets = all_tiles(size)
+        else:
+            targets = sorted(source.dirty_tiles(size, since_revision))
+        diffs = []
+        for tile in targets:
+            x0, y0, x1, y1 = tile_box(tile, size)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            out = composite_arrays(pixels[y0:y1, x0:x1], parchment[y0:y1, x0:x1],
+                                   source.mask_tile(size, (x0, y0, x1, y1)))
+            filename = f"{prefix}_{tile[0]}_{tile[1]}.png"
+            Image.fromarray(out, "RGBA").save(tile_dir / filename, "PNG")
+            diffs.append({"tile": list(tile), "box": [x0, y0, x1, y1], "file": filename})
+
+        manifest = {
+            "size": list(size),
+            "tile_size": TILE_SIZE,
+            "revision": source.revision,
+            "tiles": [list(t) for t in all_tiles(size)],
+        }
+        tmp_path = tile_dir / f"{prefix}.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, tile_dir / f"{prefix}.json")
+        return diffs
+
+    def save_mask_tiles(self, tile_dir: Path) -> List[Tile]:
+        """
+        Persist only the mask tiles touched since the last save
+        (`mask_{tx}_{ty}.png` at mask resolution). Returns the tiles written.
+        """
+        tile_dir.mkdir(parents=True, exist_ok=True)
+        size = (self.width, self.height)
+        has_tiles = any(tile_dir.glob("mask_*_*.png"))
+        tiles = all_tiles(size) if not has_tiles else sorted(self.dirty_tiles(size, self._saved_revision))
+        for tile in tiles:
+            self.mask.crop(tile_box(tile, size)).save(tile_dir / f"mask_{tile[0]}_{tile[1]}.png")
+        self._saved_revision = self.revision
+        return tiles
+
+    def load_mask_tiles(self, tile_dir: Path) -> bool:
+        """Reassemble the mask from tiles written by `save_mask_tiles`."""
+        paths = list(tile_dir.glob("mask_*_*.png")) if tile_dir.exists() else []
+        if not paths:
+            return False
+        size = (self.width, self.height)
+        for path in paths:
+            _, tx, ty = path.stem.split("_")
+            x0, y0, _, _ = tile_box((int(tx), int(ty)), size)
+            with Image.open(path) as tile_img:
+                self.mask.paste(tile_img.convert("L"), (x0, y0))
+        self._scaled_masks.clear()
+        self._saved_revision = self.revision
+        return True
 
     def save_mask(self, path: Path):
         self.mask.save(path)
@@ -70,3 +332,191 @@ class VisibilityManager:
         if path.exists():
             self.mask = Image.open(path).convert("L")
             self.draw = ImageDraw.Draw(self.mask)
+            self._scaled_masks.clear()
+
+
+class VisibilityBitset:
+    """
+    Compact explored/unexplored mask for one viewer (character or party):
+    one bit per pixel, rows packed into bytes (MSB first, numpy.packbits order).
+    A 1280x720 mask is 115 KB in memory and a few hundred bytes serialized.
+    """
+
+    _HEADER = struct.Struct(">4sII")
+    _MAGIC = b"VBS1"
+
+    def __init__(self, width: int = 1280, height: int = 720, bits: Optional[np.ndarray] = None):
+        self.width = width
+        self.height = height
+        row_bytes = -(-width // 8)
+        if bits is None:
+            bits = np.zeros((height, row_bytes), dtype=np.uint8)
+        elif bits.shape != (height, row_bytes):
+            raise ValueError(f"Bitset shape {bits.shape} does not match {width}x{height}")
+        self.bits = bits
+
+    def reveal_area(self, x_percent: float, y_percent: float, radius_percent: float = 15):
+        """Set a circle of bits (same coordinate convention as VisibilityManager)."""
+        cx = (x_percent / 100.0) * self.width
+        cy = (y_percent / 100.0) * self.height
+        r = (radius_percent / 100.0) * self.width
+
+        y0, y1 = max(0, int(cy - r)), min(self.height, int(cy + r) + 1)
+        x0, x1 = max(0, int(cx - r)), min(self.width, int(cx + r) + 1)
+        if y0 >= y1 or x0 >= x1:
+            return
+        # Work on the byte-aligned bounding block only
+        b0, b1 = x0 // 8, -(-x1 // 8)
+        ys = np.arange(y0, y1)[:, None] + 0.5
+        xs = np.arange(b0 * 8, b1 * 8)[None, :] + 0.5
+        circle = (xs - cx) ** 2 + (ys - cy) ** 2 <= r * r
+        circle[:, self.width - b0 * 8:] = False  # padding bits past the right edge
+        self.bits[y0:y1, b0:b1] |= np.packbits(circle, axis=1)
+
+    def is_revealed(self, x: int, y: int) -> bool:
+        return bool(self.bits[y, x // 8] & (0x80 >> (x % 8)))
+
+    def count(self) -> int:
+        """Number of revealed pixels."""
+        return int(np.unpackbits(self.bits, axis=1, count=self.width).sum())
+
+    def _check_compatible(self, other: "VisibilityBitset"):
+        if (self.width, self.height) != (other.width, other.height):
+            raise ValueError("Visibility bitsets have different dimensions")
+
+    def union(self, other: "VisibilityBitset") -> "VisibilityBitset":
+        self._check_compatible(other)
+        return VisibilityBitset(self.width, self.height, self.bits | other.bits)
+
+    def intersection(self, other: "VisibilityBitset") -> "VisibilityBitset":
+        self._check_compatible(other)
+        return VisibilityBitset(self.width, self.height, self.bits & other.bits)
+
+    def to_image(self) -> Image.Image:
+        """Expand to an 8-bit L mask (0/255) usable by VisibilityManager compositing."""
+        unpacked = np.unpackbits(self.bits, axis=1, count=self.width)
+        return Image.fromarray(unpacked * np.uint8(255), "L")
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self._MAGIC, self.width, self.height) + zlib.compress(self.bits.tobytes(), 6)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "VisibilityBitset":
+        magic, width, height = cls._HEADER.unpack_from(blob)
+        if magic != cls._MAGIC:
+            raise ValueError("Not a visibility bitset")
+        raw = zlib.decompress(blob[cls._HEADER.size:])
+        bits = np.frombuffer(raw, dtype=np.uint8).reshape(height, -(-width // 8)).copy()
+        return cls(width, height, bits)
+
+
+class VisibilityRegistry:
+    """
+    Per-viewer fog state (one VisibilityBitset per character or party id).
+    Party views are derived on demand with union/intersection.
+    Like VisibilityManager, each reveal bumps `revision` and logs its region
+    (per viewer) so composited views can redraw only the touched tiles.
+    """
+
+    def __init__(self, width: int = 1280, height: int = 720):
+        self.width = width
+        self.height = height
+        self.masks: Dict[str, VisibilityBitset] = {}
+        # Called as on_reveal(viewer_id, x, y, radius) so saves can log reveals as deltas
+        self.on_reveal: Optional[Callable[[str, float, float, float], None]] = None
+        self.revision = 0
+        self.reveal_log = RevealLog()
+        # Reveals come from the event loop (travel) and map worker threads
+        self.lock = threading.RLock()
+
+    def get(self, viewer_id: str) -> VisibilityBitset:
+        mask = self.masks.get(viewer_id)
+        if mask is None:
+            mask = self.masks[viewer_id] = VisibilityBitset(self.width, self.height)
+        return mask
+
+    def reveal(self, viewer_id: str, x_percent: float, y_percent: float, radius_percent: float = 15):
+        with self.lock:
+            self.get(viewer_id).reveal_area(x_percent, y_percent, radius_percent)
+            self.revision += 1
+            region = reveal_region(x_percent, y_percent, radius_percent, self.width, self.height)
+            self.reveal_log.append(self.revision, region, viewer_id)
+        if self.on_reveal:
+            self.on_reveal(viewer_id, x_percent, y_percent, radius_percent)
+
+    def party_view(self, viewer_ids: List[str], mode: str = "union") -> VisibilityBitset:
+        """
+        Combined view for a group: "union" = anything any member has seen,
+        "intersection" = only what every member has seen.
+        """
+        with self.lock:
+            masks = [self.get(v) for v in viewer_ids]
+            if not masks:
+                return VisibilityBitset(self.width, self.height)
+            bits = masks[0].bits.copy()
+            for m in masks[1:]:
+                if mode == "intersection":
+                    bits &= m.bits
+                else:
+                    bits |= m.bits
+        return VisibilityBitset(self.width, self.height, bits)
+
+    def view(self, viewer_ids: List[str], mode: str = "union") -> "ViewerMask":
+        """party_view() ready for VisibilityManager compositing (see ViewerMask)."""
+        return ViewerMask(self, viewer_ids, mode)
+
+    def dirty_tiles(self, viewer_ids: List[str], size: Tuple[int, int], since_revision: int) -> Set[Tile]:
+        """Tiles of an image of `size` touched by the viewers' reveals newer than `since_revision`."""
+        with self.lock:
+            entries = self.reveal_log.since(since_revision)
+        if entries is None:
+            return set(all_tiles(size))
+        members = set(viewer_ids)
+        dirty: Set[Tile] = set()
+        for _, viewer_id, region in entries:
+            if viewer_id in members:
+                dirty |= tiles_for_region(region, size)
+        return dirty
+
+    def _replaced(self):
+        """Every mask was swapped wholesale: views must redraw in full."""
+        self.revision += 1
+        self.reveal_log.reset(self.revision)
+
+    def clear(self):
+        with self.lock:
+            self.masks.clear()
+            self._replaced()
+
+    def to_dict(self) -> Dict[str, str]:
+        """Serialize for the save file: {viewer_id: base64(compressed bitset)}."""
+        with self.lock:
+            return {vid: base64.b64encode(m.to_bytes()).decode("ascii") for vid, m in self.masks.items()}
+
+    def load_dict(self, data: Dict[str, str]):
+        masks = {vid: VisibilityBitset.from_bytes(base64.b64decode(blob)) for vid, blob in data.items()}
+        with self.lock:
+            self.masks = masks
+            self._replaced()
+
+
+class ViewerMask(_MaskSource):
+    """
+    A snapshot of party_view(viewer_ids) as an L mask, so captures can be
+    composited with what one character (or party) has explored instead of
+    the world fog. Dirty tiles come from the registry's per-viewer log.
+    """
+
+    def __init__(self, registry: VisibilityRegistry, viewer_ids: List[str], mode: str = "union"):
+        self.registry = registry
+        self.viewer_ids = list(viewer_ids)
+        self.width = registry.width
+        self.height = registry.height
+        with registry.lock:  # Revision and bits from the same instant
+            self.revision = registry.revision
+            bitset = registry.party_view(self.viewer_ids, mode)
+        self.mask = bitset.to_image()
+        self._scaled_masks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def dirty_tiles(self, size: Tuple[int, int], since_revision: int) -> Set[Tile]:
+        return self.registry.dirty_tiles(self.viewer_ids, size, since_revision)
@@ -0,0 +1,165 @@
+"""
+Dungeon Cortex — World Graph Store
+Persists MapNodes in SQLite so generated worlds can hold tens of thousands
+of nodes without living in memory or shipping whole in every MAP_DATA event.
+
+  - world_node:       one row per node (coordinates in map percent).
+  - world_edge:       directed connections (src -> dst), indexed both ways.
+  - world_node_rtree: R*Tree over coordinates for viewport / bbox queries
+                      (falls back to a B-tree on (x, y) if SQLite lacks rtree).
+  - azgaar_cell_id is indexed for Azgaar cell -> node lookups.
+
+The schema is migration 009 (migrations.py).
+"""
+
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .db import get_db
+from .migrations import migrate
+from .maps import MapNode
+
+# Hard cap on nodes returned by one viewport query
+MAX_VIEWPORT_NODES = 2000
+
+
+class WorldStore:
+    def __init__(self, connect: Callable[[], sqlite3.Connection] = get_db):
+        self._connect = connect
+        self._ready = False
+        self.has_rtree = False
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        db = self._connect()
+        if not self._ready:
+            self._ensure_schema(db)
+        return db
+
+    def _ensure_schema(self, db: sqlite3.Connection):
+        """The tables come from migration 009; only note which spatial index it built."""
+        migrate(db)
+        self.has_rtree = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'world_node_rtree'"
+        ).fetchone() is not None
+        self._ready = True
+
+    # ------------------------------------------------------------------
+    # READS
+    # ------------------------------------------------------------------
+
+    def _connections(self, db: sqlite3.Connection, node_ids: List[str]) -> Dict[str, List[str]]:
+        conns: Dict[str, List[str]] = {nid: [] for nid in node_ids}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for i in range(0, len(node_ids), 500):
+            chunk = node_ids[i:i + 500]
+            rows = db.execute(
+                f"SELECT src_id, dst_id FROM world_edge WHERE src_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for row in rows:
+                conns[row["src_id"]].append(row["dst_id"])
+        return conns
+
+    def _to_nodes(self, db: sqlite3.Connection, rows: Iterable[sqlite3.Row]) -> List[MapNode]:
+        rows = list(rows)
+        conns = self._connections(db, [r["id"] for r in rows])
+        return [
+            MapNode(
+                id=r["id"], name=r["name"], type=r["type"],
+                coordinates={"x": r["x"], "y": r["y"]},
+                description=r["description"], connections=conns[r["id"]],
+                risk_level=r["risk_level"], azgaar_cell_id=r["azgaar_cell_id"],
+            )
+            for r in rows
+        ]
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM world_node").fetchone()[0]
+
+    def get(self, node_id: str) -> Optional[MapNode]:
+        db = self.db
+        row = db.execute("SELECT * FROM world_node WHERE id = ?", (node_id,)).fetchone()
+        return self._to_nodes(db, [row])[0] if row else None
+
+    def get_by_cell(self, cell_id: int) -> Optional[MapNode]:
+        db = self.db
+        row = db.execute("SELECT * FROM world_node WHERE azgaar_cell_id = ? LIMIT 1", (cell_id,)).fetchone()
+        return self._to_nodes(db, [row])[0] if row else None
+
+    def all(self) -> List[MapNode]:
+        db = self.db
+        return self._to_nodes(db, db.execute("SELECT * FROM world_node ORDER BY rowid"))
+
+    def in_bbox(self, min_x: float, min_y: float, max_x: float, max_y: float,
+                limit: int = MAX_VIEWPORT_NODES) -> List[MapNode]:
+        """Nodes whose coordinates fall inside the box (inclusive)."""
+        db = self.db
+        limit = max(1, min(limit, MAX_VIEWPORT_NODES))
+        if self.has_rtree:
+            rows = db.execute("""
+                SELECT n.* FROM world_node_rtree r JOIN world_node n ON n.rowid = r.rid
+                WHERE r.min_x >= ? AND r.max_x <= ? AND r.min_y >= ? AND r.max_y <= ?
+                LIMIT ?
+            """, (min_x, max_x, min_y, max_y, limit))
+        else:
+            rows = db.execute("""
+                SELECT * FROM world_node WHERE x BETWEEN ? AND ? AND y BETWEEN ? AND ? LIMIT ?
+            """, (min_x, max_x, min_y, max_y, limit))
+        return self._to_nodes(db, rows)
+
+    # ------------------------------------------------------------------
+    # WRITES (incremental)
+    # ------------------------------------------------------------------
+
+    def _upsert(self, db: sqlite3.Connection, node: MapNode):
+        x, y = node.coordinates["x"], node.coordinates["y"]
+        db.execute("""
+            INSERT INTO world_node (id, name, type, x, y, description, risk_level, azgaar_cell_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name, type = excluded.type, x = excluded.x, y = excluded.y,
+                description = excluded.description, risk_level = excluded.risk_level,
+                azgaar_cell_id = excluded.azgaar_cell_id
+        """, (node.id, node.name, node.type, x, y, node.description, node.risk_level, node.azgaar_cell_id))
+        if self.has_rtree:
+            rid = db.execute("SELECT rowid FROM world_node WHERE id = ?", (node.id,)).fetchone()[0]
+            db.execute("INSERT OR REPLACE INTO world_node_rtree VALUES (?, ?, ?, ?, ?)", (rid, x, x, y, y))
+        db.execute("DELETE FROM world_edge WHERE src_id = ?", (node.id,))
+        db.executemany(
+            "INSERT OR IGNORE INTO world_edge (src_id, dst_id) VALUES (?, ?)",
+            [(node.id, dst) for dst in node.connections],
+        )
+
+    def upsert(self, node: MapNode):
+        db = self.db
+        self._upsert(db, node)
+        db.commit()
+
+    def upsert_many(self, nodes: Iterable[MapNode]):
+        db = self.db
+        with db:
+            for node in nodes:
+                self._upsert(db, node)
+
+    def link(self, a_id: str, b_id: str):
+        db = self.db
+        db.executemany("INSERT OR IGNORE INTO world_edge (src_id, dst_id) VALUES (?, ?)",
+                       [(a_id, b_id), (b_id, a_id)])
+        db.commit()
+
+    def remove(self, node_id: str):
+        db = self.db
+        row = db.execute("SELECT rowid FROM world_node WHERE id = ?", (node_id,)).fetchone()
+        if row and self.has_rtree:
+            db.execute("DELETE FROM world_node_rtree WHERE rid = ?", (row[0],))
+        db.execute("DELETE FROM world_node WHERE id = ?", (node_id,))
+        db.execute("DELETE FROM world_edge WHERE src_id = ? OR dst_id = ?", (node_id, node_id))
+        db.commit()
+
+    def seed(self, nodes: Iterable[MapNode]) -> bool:
+        """Populate an empty store (e.g. with the built-in Known World). Returns True if seeded."""
+        if self.count():
+            return False
+        self.upsert_many(nodes)
+        return True
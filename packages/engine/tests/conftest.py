@@ -0,0 +1,12 @@
+import os
+import shutil
+import tempfile
+
+# routers/maps.py builds its MapManager at import time; keep its fog tiles and
+# captures out of the source tree.
+_MAP_OUTPUT_DIR = tempfile.mkdtemp(prefix="dc-maps-")
+os.environ.setdefault("MAP_OUTPUT_DIR", _MAP_OUTPUT_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_MAP_OUTPUT_DIR, ignore_errors=True)
@@ -0,0 +1,67 @@
+"""
+Unit Tests — AoE templates (aoe.py)
+"""
+
+import time
+import numpy as np
+import pytest
+
+from engine.aoe import affected_tokens, inside_template, template_mask
+from engine.spells import _extract_aoe, _extract_aoe_shape
+from engine.tactical import TacticalGrid
+
+
+@pytest.fixture
+def grid():
+    g = TacticalGrid(20, 20)
+    g.place("caster", (2, 10))
+    g.place("a", (10, 10))
+    g.place("b", (12, 10))
+    g.place("c", (10, 14))
+    g.place("far", (19, 0))
+    return g
+
+
+def test_sphere_centred_on_aim(grid):
+    # 10 ft radius = 2 squares around (10, 10)
+    assert affected_tokens(grid, "sphere", 10, (2, 10), (10, 10)) == ["a", "b"]
+
+
+def test_cone_and_line_from_caster(grid):
+    # 60 ft cone aimed east reaches a/b; c is 4 squares off-axis at 8 along (half-width 4)
+    assert affected_tokens(grid, "cone", 60, (2, 10), (10, 10)) == ["a", "b", "c"]
+    assert affected_tokens(grid, "cone", 30, (2, 10), (10, 10)) == []
+    assert affected_tokens(grid, "line", 60, (2, 10), (10, 10)) == ["a", "b"]
+    assert "caster" not in affected_tokens(grid, "line", 60, (2, 10), (10, 10))
+
+
+def test_cube_extends_from_origin(grid):
+    # 15 ft cube = the three squares east of the origin, one square either side
+    assert affected_tokens(grid, "cube", 15, (9, 10), (10, 10)) == ["a", "b"]
+    assert affected_tokens(grid, "cube", 10, (9, 10), (10, 10)) == ["a"]
+
+
+def test_template_mask_matches_token_test():
+    g = TacticalGrid(30, 30)
+    mask = template_mask(g, "cone", 50, (0, 15), (29, 15))
+    assert mask.shape == (30, 30)
+    assert mask[15, 10] and not mask[0, 10] and not mask[15, 0]
+    ys, xs = np.nonzero(mask)
+    assert inside_template(np.column_stack([xs, ys]), "cone", 50, (0, 15), (29, 15)).all()
+
+
+def test_big_aoe_over_large_battle_is_cheap():
+    g = TacticalGrid(200, 200)
+    for i in range(5000):
+        g.place(f"t{i}", (i % 200, i // 200))
+    start = time.perf_counter()
+    hit = affected_tokens(g, "sphere", 100, (0, 0), (100, 12))
+    assert time.perf_counter() - start < 0.5
+    assert hit and all(np.hypot(g.positions[t][0] - 100, g.positions[t][1] - 12) <= 20 for t in hit)
+
+
+def test_spell_parsing_reads_template():
+    data = {"area_of_effect": {"type": "Sphere", "size": 20}}
+    assert _extract_aoe(data) == 20
+    assert _extract_aoe_shape(data) == "sphere"
+    assert _extract_aoe_shape({}) is None
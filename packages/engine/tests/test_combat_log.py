@@ -0,0 +1,145 @@
+"""
+Unit Tests — Event-sourced saves (state.py)
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from engine import state
+from engine.save_format import decode_save
+from engine.state import (
+    combat_log, tracker, tactical_grid, visibility_registry, combatant_positions,
+    write_snapshot, save_game, load_game, autosave, snapshot_state, record_hp, record_move, sync_grid,
+)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    monkeypatch.setattr(combat_log, "_connect", lambda: conn)
+    monkeypatch.setattr(combat_log, "_ready", False)
+    combat_log.save_id = None
+
+    with combat_log.muted():
+        tracker.combatants.clear()
+        tracker.round, tracker.turn_index, tracker.has_started = 1, 0, False
+        tracker.rebuild_schedule()
+        tracker.add_combatant("hero", "Hero", 2, is_player=True, hp_max=12)
+        combatant_positions.clear()
+        combatant_positions["hero"] = "start_town"
+        visibility_registry.clear()
+        tactical_grid.reset(tactical_grid.width, tactical_grid.height)
+    write_snapshot("s1", metadata={"character_name": "Hero"})
+    yield conn
+
+    combat_log.save_id = None
+    with combat_log.muted():
+        tracker.combatants.clear()
+        tracker.has_started = False
+        tracker.rebuild_schedule()
+        combatant_positions.clear()
+        visibility_registry.clear()
+        tactical_grid.reset(tactical_grid.width, tactical_grid.height)
+    conn.close()
+
+
+def _play_some_turns():
+    tracker.add_combatant("gob", "Goblin", 1, hp_max=7)
+    tracker.combatants[0].initiative, tracker.combatants[1].initiative = 15, 8
+    tracker.start_encounter()
+    sync_grid()
+    goblin = tracker.combatants[1]
+    goblin.hp_current = 3
+    record_hp(goblin)
+    tracker.add_condition("gob", "poisoned", duration=2)
+    tactical_grid.place("hero", (1, 1))
+    record_move("hero")
+    visibility_registry.reveal("hero", 40, 40)
+    tracker.next_turn()
+
+
+def _scramble():
+    with combat_log.muted():
+        tracker.combatants.clear()
+        tracker.round = 9
+        tactical_grid.reset(tactical_grid.width, tactical_grid.height)
+        visibility_registry.clear()
+
+
+def test_autosave_appends_deltas_not_snapshots(session):
+    _play_some_turns()
+    autosave()
+
+    kinds = [kind for _, kind, _ in combat_log.events("s1")]
+    assert kinds[:2] == ["combatant", "roster"]
+    assert {"hp", "conditions", "move", "reveal", "turn"} <= set(kinds)
+    row = session.execute("SELECT data_blob FROM game_saves WHERE save_id = 's1'").fetchone()
+    assert decode_save(row["data_blob"])["event_seq"] == 0  # snapshot untouched
+
+
+def test_load_replays_events_after_snapshot(session):
+    _play_some_turns()
+    expected = snapshot_state()
+    autosave()
+
+    _scramble()
+    assert load_game("s1")
+    assert snapshot_state() == expected
+    assert tracker.combatants[1].condition_mask  # derived mask rebuilt on replay
+
+
+def test_snapshot_compacts_and_keeps_metadata(session, monkeypatch):
+    monkeypatch.setattr(state, "SNAPSHOT_EVERY", 3)
+    _play_some_turns()
+    expected = snapshot_state()
+    save_game("s1")
+
+    assert combat_log.events("s1") == []
+    row = session.execute("SELECT character_name FROM game_saves WHERE save_id = 's1'").fetchone()
+    assert row["character_name"] == "Hero"
+
+    _scramble()
+    assert load_game("s1")
+    assert snapshot_state() == expected
+
+
+def test_replay_ignores_muted_changes(session):
+    with combat_log.muted():
+        tracker.combatants[0].hp_current = 1
+        record_hp(tracker.combatants[0])
+    autosave()
+    assert combat_log.events("s1") == []
+
+
+def test_sync_grid_places_sides_and_drops_departed(session):
+    with combat_log.muted():
+        tracker.add_combatant("gob", "Goblin", 1, hp_max=7)
+        tactical_grid.set_obstacle((tactical_grid.width - 1, 0))
+        sync_grid()
+        assert tactical_grid.cell_of("hero") == (0, 0)                          # players from the west edge
+        assert tactical_grid.cell_of("gob") == (tactical_grid.width - 1, 1)     # others from the east, around walls
+
+        tactical_grid.place("hero", (2, 2))
+        tracker.combatants[:] = [c for c in tracker.combatants if c.id != "gob"]
+        sync_grid()
+        assert tactical_grid.positions == {"hero": (2, 2)}  # placed tokens keep their square
+
+
+def test_load_places_combatants_saved_off_grid(session):
+    with combat_log.muted():
+        tracker.add_combatant("gob", "Goblin", 1, hp_max=7)
+    write_snapshot("s1")
+    _scramble()
+
+    assert load_game("s1")
+    assert set(tactical_grid.positions) == {"hero", "gob"}
+    autosave()
+    events = combat_log.events("s1")
+    assert sorted(e["id"] for _, kind, e in events if kind == "move") == ["gob", "hero"]  # placements are logged
+
@@ -0,0 +1,124 @@
+"""
+Unit Tests — Compiled Condition Flags (conditions.py)
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from engine.conditions import (
+    ConditionFlag, ConditionRegistry, attack_roll_mode, auto_crit,
+    can_act, condition_mask, save_mode, speed_feet,
+)
+from engine.combat import resolve_attack, resolve_saving_throw, resolve_aoe_spell
+from engine.dice import DiceResult
+from engine.initiative import InitiativeTracker
+
+
+def _fixed_d20(natural: int):
+    def fake(modifier: int = 0) -> DiceResult:
+        return DiceResult(rolls=(natural,), modifier=modifier, total=natural + modifier,
+                          notation=f"1d20+{modifier}")
+    return fake
+
+
+class TestCompiledFlags:
+
+    def test_effects_compile_at_registration(self):
+        paralyzed = ConditionRegistry.get("paralyzed").flags
+        assert paralyzed & ConditionFlag.CANT_ACT
+        assert paralyzed & ConditionFlag.AUTO_FAIL_STR_SAVE
+        assert paralyzed & ConditionFlag.AUTO_FAIL_DEX_SAVE
+        assert not paralyzed & ConditionFlag.AUTO_FAIL_WIS_SAVE
+        assert paralyzed & ConditionFlag.CRIT_WITHIN_5FT
+
+    def test_lookup_is_case_insensitive(self):
+        assert ConditionRegistry.flags("Stunned") == ConditionRegistry.flags("stunned")
+        assert not can_act(ConditionRegistry.flags("Surprised"))
+        assert ConditionRegistry.flags("Concentrating") == ConditionFlag.NONE
+
+    def test_attack_roll_mode(self):
+        blinded = condition_mask(["blinded"])
+        invisible = condition_mask(["invisible"])
+        assert attack_roll_mode(blinded, 0) == (False, True)
+        assert attack_roll_mode(0, blinded) == (True, False)
+        assert attack_roll_mode(invisible, 0) == (True, False)
+        assert attack_roll_mode(blinded, blinded) == (True, True)
+
+    def test_prone_depends_on_range(self):
+        prone = condition_mask(["prone"])
+        assert attack_roll_mode(0, prone, within_5ft=True) == (True, False)
+        assert attack_roll_mode(0, prone, within_5ft=False) == (False, True)
+
+    def test_auto_crit_only_within_5ft(self):
+        unconscious = condition_mask(["unconscious"])
+        assert auto_crit(unconscious, within_5ft=True)
+        assert not auto_crit(unconscious, within_5ft=False)
+
+    def test_save_mode(self):
+        restrained = condition_mask(["restrained"])
+        stunned = condition_mask(["stunned"])
+        assert save_mode(restrained, "dex") == (False, True)
+        assert save_mode(stunned, "DEX") == (True, False)
+        assert save_mode(stunned, "wis") == (False, False)
+        assert save_mode(stunned, None) == (False, False)
+
+    def test_speed(self):
+        assert speed_feet(condition_mask(["grappled"]), 30) == 0
+        assert speed_feet(condition_mask(["poisoned"]), 30) == 30
+
+
+class TestCombatantMask:
+
+    def _tracker(self):
+        tracker = InitiativeTracker()
+        tracker.add_combatant("g1", "Goblin", 2)
+        return tracker, tracker.combatants[0]
+
+    def test_mask_follows_add_and_remove(self):
+        tracker, goblin = self._tracker()
+        tracker.add_condition("g1", "stunned")
+        tracker.add_condition("g1", "paralyzed")
+        assert not can_act(goblin.condition_mask)
+
+        # Paralyzed still disables after Stunned is removed
+        tracker.remove_condition("g1", "stunned")
+        assert not can_act(goblin.condition_mask)
+        tracker.remove_condition("g1", "paralyzed")
+        assert goblin.condition_mask == 0
+
+    def test_mask_cleared_on_expiry(self):
+        tracker, goblin = self._tracker()
+        tracker.has_started = True
+        tracker.add_condition("g1", "poisoned", duration=1)
+        assert goblin.condition_mask & ConditionFlag.ATTACK_DISADVANTAGE
+        tracker.next_turn()
+        assert goblin.condition_mask == 0
+
+
+class TestResolvers:
+
+    def test_auto_crit_doubles_dice_on_hit(self):
+        with patch("engine.combat.d20", side_effect=_fixed_d20(15)):
+            result = resolve_attack("a", "t", 5, 10, 6, 1, 0, "slashing", 50, auto_crit=True)
+        assert result.hit and result.critical
+
+    def test_auto_crit_does_not_turn_miss_into_hit(self):
+        with patch("engine.combat.d20", side_effect=_fixed_d20(2)):
+            result = resolve_attack("a", "t", 0, 18, 6, 1, 0, "slashing", 50, auto_crit=True)
+        assert not result.hit and not result.critical
+
+    def test_auto_fail_save(self):
+        with patch("engine.combat.d20", side_effect=_fixed_d20(20)):
+            result = resolve_saving_throw("a", "t", 10, "dex", 5, 6, 2, 0, "fire", 50, auto_fail=True)
+        assert not result.save_success
+
+    def test_aoe_auto_fail_per_target(self):
+        with patch("engine.combat.d20", side_effect=_fixed_d20(20)):
+            results = resolve_aoe_spell(
+                "a", ["t1", "t2"], 10, "dex", 6, 2, 0, "fire",
+                {"t1": 50, "t2": 50}, {"t1": 0, "t2": 0}, targets_auto_fail={"t2"},
+            )
+        assert [r.save_success for r in results] == [True, False]
@@ -100,3 +100,90 @@ class TestInitiativeTracker:
         # Next should be C (skip B)
         next_c = tracker.next_turn()
         assert next_c.id == "c"
+
+
+def _fixed_d20(natural: int):
+    def fake(modifier: int = 0) -> DiceResult:
+        return DiceResult(rolls=(natural,), modifier=modifier, total=natural + modifier,
+                          notation=f"1d20+{modifier}")
+    return fake
+
+
+class TestConditionScheduler:
+
+    def _tracker(self):
+        tracker = InitiativeTracker()
+        a = Combatant("a", "A", 0, initiative=20)
+        b = Combatant("b", "B", 0, initiative=10, wis_mod=2)
+        tracker.combatants = [a, b]
+        tracker.start_encounter()
+        return tracker, a, b
+
+    def test_duration_expires_at_holders_turn(self):
+        tracker, a, b = self._tracker()
+        tracker.add_condition("b", "poisoned", duration=2)  # B's turn is still to come
+        tracker.add_condition("a", "blinded", duration=1)   # applied on A's own turn
+
+        tracker.next_turn()                # B, round 1
+        assert b.has_condition("poisoned")
+        tracker.next_turn()                # A, round 2
+        assert not a.has_condition("blinded")
+        tracker.next_turn()                # B, round 2
+        assert not b.has_condition("poisoned")
+
+        events = tracker.drain_condition_events()
+        assert [(e["combatant_id"], e["condition_id"], e["reason"]) for e in events] == [
+            ("a", "blinded", "expired"), ("b", "poisoned", "expired"),
+        ]
+        assert tracker.drain_condition_events() == []
+
+    def test_refresh_extends_and_remove_cancels(self):
+        tracker, a, b = self._tracker()
+        tracker.add_condition("b", "poisoned", duration=1)
+        tracker.add_condition("b", "poisoned", duration=3)
+        tracker.add_condition("b", "blinded", duration=1)
+        tracker.remove_condition("b", "blinded")
+
+        tracker.next_turn()  # B, round 1 — the stale 1-round entry is skipped
+        assert b.has_condition("poisoned")
+        assert tracker.drain_condition_events() == []
+
+    def test_save_ends_rolls_at_end_of_turn(self):
+        tracker, a, b = self._tracker()
+        tracker.add_condition("b", "paralyzed", save_ends_dc=15, save_stat="wis")
+        tracker.next_turn()  # B's turn starts
+
+        with patch("engine.initiative.d20", side_effect=_fixed_d20(5)):
+            tracker.next_turn()  # B's turn ends: 5 + 2 fails
+        assert b.has_condition("paralyzed")
+        tracker.next_turn()  # B, round 2
+        with patch("engine.initiative.d20", side_effect=_fixed_d20(14)):
+            tracker.next_turn()  # 14 + 2 saves
+        assert not b.has_condition("paralyzed")
+        assert b.condition_mask == 0
+        assert [e["reason"] for e in tracker.drain_condition_events()] == ["save_failed", "saved"]
+
+    def test_auto_failed_save_ends(self):
+        tracker, a, b = self._tracker()
+        tracker.add_condition("b", "stunned", save_ends_dc=5, save_stat="dex")
+        tracker.next_turn()
+        with patch("engine.initiative.d20", side_effect=_fixed_d20(20)):
+            tracker.next_turn()
+        assert b.has_condition("stunned")  # Stunned auto-fails DEX saves
+
+    def test_skipped_turn_keeps_save_ends_a_save(self):
+        tracker, a, b = self._tracker()
+        tracker.add_condition("b", "paralyzed", save_ends_dc=15, save_stat="wis")
+        b.is_active = False  # B's turn (and its end-of-turn save) is skipped this round
+
+        with patch("engine.initiative.d20", side_effect=_fixed_d20(5)):
+            tracker.next_turn()  # A, round 2: the overdue save runs as a save, not an expiry
+        assert b.has_condition("paralyzed")
+        assert [e["reason"] for e in tracker.drain_condition_events()] == ["save_failed"]
+
+        b.is_active = True
+        tracker.next_turn()  # B, round 2
+        with patch("engine.initiative.d20", side_effect=_fixed_d20(14)):
+            tracker.next_turn()  # B's round-2 save still happens
+        assert not b.has_condition("paralyzed")
+        assert [e["reason"] for e in tracker.drain_condition_events()] == ["saved"]
@@ -9,7 +9,12 @@ from unittest.mock import patch, MagicMock
 # We'll see. 
 # Ideally we should use the same init_db logic.
 
-from engine.inventory import create_inventory_item, get_inventory, generate_loot
+from engine.inventory import (
+    create_inventory_item, get_inventory, generate_loot, create_inventory_items,
+    distribute_loot, distribute_loot_many, transfer_items, equip_item, unequip_item, template_data,
+    invalidate_template_cache, get_inventory_version, get_item_details, set_visual_asset_url,
+)
+from engine.migrations import migrate
 
 class TestInventory(unittest.TestCase):
     
@@ -50,16 +55,18 @@ class TestInventory(unittest.TestCase):
         self.conn.execute("""
         INSERT INTO srd_mechanic (id, type, data_json) VALUES
         ('item_potion', 'item', '{"name": "Potion of Healing"}'),
-        ('item_sword', 'magic_item', '{"name": "Vorpal Sword"}')
+        ('item_sword', 'magic_item', '{"name": "Vorpal Sword", "rarity": {"name": "Legendary"}, "requires_attunement": true}')
         """)
         self.conn.commit()
         
         # Patch get_db
         self.patcher = patch('engine.inventory.get_db', return_value=self.conn)
         self.mock_get_db = self.patcher.start()
+        invalidate_template_cache()
         
     def tearDown(self):
         self.patcher.stop()
+        invalidate_template_cache()
         self.conn.close()
         
     def test_create_and_get_inventory(self):
@@ -84,5 +91,117 @@ class TestInventory(unittest.TestCase):
         self.assertTrue(len(loot) >= 1)
         self.assertIn(loot[0], ['item_potion', 'item_sword'])
         
+    def test_bulk_create_is_one_executemany(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        items = create_inventory_items([("char1", "item_potion")] * 20)
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual(len(items), 20)
+        self.assertEqual(len(get_inventory("char1")), 20)
+        # executemany runs the INSERT per row, but inside one BEGIN/COMMIT
+        self.assertEqual(sum(1 for q in statements if q.startswith("BEGIN")), 1)
+        self.assertEqual(sum(1 for q in statements if q.startswith("COMMIT")), 1)
+
+    def test_distribute_loot_hydrates_from_one_query(self):
+        migrate(self.conn)  # Schema first, so the trace only covers the distribution
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        loot = distribute_loot_many({"char1": ["item_potion", "item_sword"], "char2": ["item_potion"]})
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual([i["name"] for i in loot["char1"]], ["Potion of Healing", "Vorpal Sword"])
+        self.assertEqual(len(loot["char2"]), 1)
+        self.assertEqual(sum(1 for q in statements if "FROM srd_mechanic" in q), 1)
+
+        single = distribute_loot("char3", ["item_sword"])
+        self.assertEqual(single[0]["name"], "Vorpal Sword")
+        self.assertEqual(single[0]["location"], "backpack")
+
+    def test_template_data_skips_missing(self):
+        data = template_data(["item_potion", "nope"])
+        self.assertEqual(list(data), ["item_potion"])
+
+    def test_transfer_items(self):
+        a = create_inventory_item("char1", "item_potion")
+        b = create_inventory_item("char1", "item_sword")
+        equip_item("char1", b["id"], "main_hand")
+
+        self.assertEqual(transfer_items("char1", "char2", [a["id"], b["id"], "missing"]), 2)
+        moved = get_inventory("char2")
+        self.assertEqual(len(moved), 2)
+        self.assertTrue(all(i["location"] == "BACKPACK" and i["slot_type"] is None for i in moved))
+        self.assertEqual(get_inventory("char1"), [])
+
+    def test_equip_swaps_slot(self):
+        a = create_inventory_item("char1", "item_sword")
+        b = create_inventory_item("char1", "item_sword")
+        equip_item("char1", a["id"], "main_hand")
+        equip_item("char1", b["id"], "main_hand")
+
+        by_id = {i["instance_id"]: i for i in get_inventory("char1")}
+        self.assertEqual(by_id[a["id"]]["location"], "BACKPACK")
+        self.assertEqual(by_id[b["id"]]["location"], "EQUIPPED")
+        self.assertEqual(by_id[b["id"]]["slot_type"], "main_hand")
+
+    def test_equip_foreign_item_leaves_slot_alone(self):
+        a = create_inventory_item("char1", "item_sword")
+        other = create_inventory_item("char2", "item_sword")
+        equip_item("char1", a["id"], "main_hand")
+
+        with self.assertRaises(ValueError):
+            equip_item("char1", other["id"], "main_hand")
+        self.assertEqual(get_inventory("char1")[0]["location"], "EQUIPPED")
+
+    def test_legacy_rows_are_backfilled(self):
+        # Row written by the old schema, before the display columns existed
+        self.conn.execute("INSERT INTO inventory_item (id, character_id, template_id, location) VALUES ('old', 'char1', 'item_sword', 'backpack')")
+        self.conn.commit()
+
+        items = get_inventory("char1")
+        self.assertEqual(items[0]["name"], "Vorpal Sword")
+        self.assertEqual(items[0]["rarity"], "Legendary")
+        self.assertTrue(items[0]["attunement"])
+        indexes = [row[1] for row in self.conn.execute("PRAGMA index_list(inventory_item)")]
+        self.assertIn("idx_inventory_character", indexes)
+
+    def test_slim_projection_skips_srd(self):
+        create_inventory_item("char1", "item_sword")
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        items = get_inventory("char1")
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual(items[0]["name"], "Vorpal Sword")
+        self.assertEqual(items[0]["stats"], {})
+        self.assertFalse(any("srd_mechanic" in q for q in statements))
+
+        full = get_inventory("char1", full=True)
+        self.assertEqual(full[0]["stats"]["name"], "Vorpal Sword")
+        details = get_item_details(items[0]["instance_id"])
+        self.assertTrue(details["stats"]["requires_attunement"])
+        self.assertIsNone(get_item_details("missing"))
+
+    def test_version_bumps_on_every_write(self):
+        self.assertEqual(get_inventory_version("char1"), 0)
+        item = create_inventory_item("char1", "item_sword")
+        v1 = get_inventory_version("char1")
+        self.assertGreater(v1, 0)
+
+        get_inventory("char1")
+        self.assertEqual(get_inventory_version("char1"), v1)
+
+        equip_item("char1", item["id"], "main_hand")
+        v2 = get_inventory_version("char1")
+        unequip_item("char1", item["id"])
+        v3 = get_inventory_version("char1")
+        set_visual_asset_url(item["id"], "/assets/generated/sword.png")
+        v4 = get_inventory_version("char1")
+        self.assertTrue(v1 < v2 < v3 < v4)
+
+        transfer_items("char1", "char2", [item["id"]])
+        self.assertGreater(get_inventory_version("char1"), v4)
+        self.assertGreater(get_inventory_version("char2"), 0)
+
 if __name__ == '__main__':
     unittest.main()
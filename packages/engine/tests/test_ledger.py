@@ -0,0 +1,80 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+
+from engine.ledger import (
+    InsufficientFunds, add_gold, get_gold, history, post, settle, split_shares, transfer,
+)
+
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.patcher = patch("engine.ledger.get_db", return_value=self.conn)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.conn.close()
+
+    def test_add_and_get(self):
+        self.assertEqual(get_gold("hero"), 0)
+        self.assertEqual(add_gold("hero", 25), 25)
+        self.assertEqual(add_gold("hero", 10), 35)
+        self.assertEqual(add_gold("hero", -5), 35)  # Rewards never debit
+        self.assertEqual(get_gold("hero"), 35)
+
+    def test_hot_path_has_no_ddl(self):
+        add_gold("hero", 1)
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        add_gold("hero", 1)
+        get_gold("hero")
+        self.conn.set_trace_callback(None)
+        self.assertFalse(any("CREATE" in q for q in statements))
+
+    def test_history_is_append_only_with_running_balance(self):
+        add_gold("hero", 20, reason="loot")
+        transfer("hero", "shop:forge", 15, reason="longsword")
+        entries = history("hero")
+        self.assertEqual([(e["delta"], e["balance_after"]) for e in entries], [(-15, 5), (20, 20)])
+        self.assertEqual(entries[0]["reason"], "longsword")
+
+    def test_transfer_is_atomic(self):
+        add_gold("hero", 10)
+        with self.assertRaises(InsufficientFunds):
+            post([("hero", -30), ("rogue", 30)], "bad split")
+        self.assertEqual(get_gold("hero"), 10)
+        self.assertEqual(get_gold("rogue"), 0)
+        self.assertEqual(len(history("hero")), 1)
+
+        balances = transfer("hero", "rogue", 4)
+        self.assertEqual(balances, {"hero": 6, "rogue": 4})
+
+    def test_transfer_rejects_non_positive(self):
+        with self.assertRaises(ValueError):
+            transfer("hero", "rogue", 0)
+
+    def test_settle_party_split(self):
+        shares = dict(split_shares(10, ["a", "b", "c"]))
+        self.assertEqual(shares, {"a": 4, "b": 3, "c": 3})
+        balances = settle(shares, reason="combat victory")
+        self.assertEqual(balances, {"a": 4, "b": 3, "c": 3})
+        txns = {e["txn_id"] for c in "abc" for e in history(c)}
+        self.assertEqual(len(txns), 1)
+
+    def test_legacy_wallets_get_opening_entry(self):
+        legacy = sqlite3.connect(":memory:")
+        legacy.execute("CREATE TABLE character_gold (character_id TEXT PRIMARY KEY, gold INTEGER NOT NULL DEFAULT 0)")
+        legacy.execute("INSERT INTO character_gold VALUES ('veteran', 120)")
+        legacy.commit()
+        with patch("engine.ledger.get_db", return_value=legacy):
+            self.assertEqual(get_gold("veteran"), 120)
+            self.assertEqual(history("veteran")[0]["reason"], "opening balance")
+            self.assertEqual(add_gold("veteran", 5), 125)
+        legacy.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
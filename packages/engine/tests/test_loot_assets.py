@@ -0,0 +1,86 @@
+"""
+Unit Tests — Loot asset fan-out (routers/websocket.py)
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from engine.routers import websocket as ws
+
+
+class _FakeVault:
+    is_mock = False
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    def lookup(self, item_name, context):
+        return "/assets/generated/cached.png" if item_name == "cached_item" else None
+
+    async def get_asset_url(self, item_name, context):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if item_name == "failed_item":
+            return "/assets/placeholder.png"
+        return f"/assets/generated/{item_name}.png"
+
+
+@pytest.mark.asyncio
+async def test_loot_assets_fan_out_with_placeholders():
+    vault = _FakeVault()
+    sent, stored = [], {}
+    template_ids = ["cached_item"] + [f"item_{i}" for i in range(8)]
+
+    async def fake_send(websocket, event):
+        sent.append(event)
+
+    with patch.object(ws, "visual_vault", vault), \
+         patch.object(ws, "create_inventory_items", side_effect=lambda pairs, visual_asset_urls: [
+             {"id": f"inst_{t}", "template_id": t} for _, t in pairs]), \
+         patch.object(ws, "set_visual_asset_url", side_effect=lambda i, u: stored.__setitem__(i, u)), \
+         patch.object(ws.manager, "send_event", side_effect=fake_send), \
+         patch.object(ws, "_asset_semaphore", asyncio.Semaphore(3)):
+        created = ws._create_loot_items("hero", template_ids, "looted item")
+        assert [c["pending"] for c in created] == [False] + [True] * 8
+
+        await ws._stream_loot_assets(None, "hero", created, "looted item")
+
+    assert vault.peak <= 3
+    assert len(sent) == 8
+    assert all(e["type"] == "ASSET_READY" for e in sent)
+    assert stored["inst_item_0"] == "/assets/generated/item_0.png"
+    assert "inst_cached_item" not in stored
+
+
+@pytest.mark.asyncio
+async def test_placeholder_results_send_no_asset_ready():
+    vault = _FakeVault()
+    sent, stored = [], {}
+
+    async def fake_send(websocket, event):
+        sent.append(event)
+
+    created = [
+        {"id": "inst_failed", "template_id": "failed_item", "url": "/assets/items/failed_item.png", "pending": True},
+        {"id": "inst_same", "template_id": "same", "url": "/assets/generated/same.png", "pending": True},
+        {"id": "inst_new", "template_id": "new", "url": "/assets/items/new.png", "pending": True},
+    ]
+    with patch.object(ws, "visual_vault", vault), \
+         patch.object(ws, "set_visual_asset_url", side_effect=lambda i, u: stored.__setitem__(i, u)), \
+         patch.object(ws.manager, "send_event", side_effect=fake_send):
+        await ws._stream_loot_assets(None, "hero", created, "looted item")
+
+    assert [e["instance_id"] for e in sent] == ["inst_new"]
+    assert stored == {"inst_new": "/assets/generated/new.png"}
+
+
+def test_mock_vault_schedules_no_generation():
+    vault = _FakeVault()
+    vault.is_mock = True
+    with patch.object(ws, "visual_vault", vault), patch.object(ws.asyncio, "create_task") as create_task:
+        ws._schedule_loot_assets(None, "hero", [{"id": "i", "template_id": "t", "url": "u", "pending": True}], "ctx")
+    create_task.assert_not_called()
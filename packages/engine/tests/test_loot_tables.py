@@ -0,0 +1,103 @@
+import json
+import random
+import sqlite3
+import unittest
+from collections import Counter
+
+from engine.loot_tables import (
+    AliasTable, LootTables, cr_band, item_rarity, loot_tables, invalidate_loot_tables,
+)
+
+
+class TestCrBand(unittest.TestCase):
+    def test_band_edges(self):
+        self.assertEqual(cr_band(0), "0-4")
+        self.assertEqual(cr_band(4.5), "0-4")
+        self.assertEqual(cr_band(5), "5-10")
+        self.assertEqual(cr_band(11), "11-16")
+        self.assertEqual(cr_band(30), "17+")
+
+    def test_item_rarity_accepts_dict_and_str(self):
+        self.assertEqual(item_rarity({"rarity": {"name": "Rare"}}), "Rare")
+        self.assertEqual(item_rarity({"rarity": "Uncommon"}), "Uncommon")
+        self.assertEqual(item_rarity({}), "Common")
+
+
+class TestAliasTable(unittest.TestCase):
+    def test_matches_weights(self):
+        table = AliasTable([1, 3, 6])
+        rng = random.Random(7)
+        counts = Counter(table.sample(rng) for _ in range(20000))
+        self.assertAlmostEqual(counts[0] / 20000, 0.1, delta=0.02)
+        self.assertAlmostEqual(counts[1] / 20000, 0.3, delta=0.02)
+        self.assertAlmostEqual(counts[2] / 20000, 0.6, delta=0.02)
+
+    def test_rejects_empty(self):
+        with self.assertRaises(ValueError):
+            AliasTable([])
+
+
+class TestLootTables(unittest.TestCase):
+    def setUp(self):
+        self.tables = LootTables({
+            "potion": "Common", "rope": "Common",
+            "cloak": "Uncommon",
+            "vorpal": "Rare",
+        })
+
+    def test_band_pool_is_target_plus_common(self):
+        picks = set(self.tables.draw("5-10", 500, random.Random(1)))
+        self.assertEqual(picks, {"potion", "rope", "cloak"})
+
+    def test_draw_is_uniform_over_pool(self):
+        counts = Counter(self.tables.draw("5-10", 30000, random.Random(3)))
+        for item in ("potion", "rope", "cloak"):
+            self.assertAlmostEqual(counts[item] / 30000, 1 / 3, delta=0.02)
+
+    def test_falls_back_to_all_items(self):
+        tables = LootTables({"vorpal": "Rare"})
+        self.assertEqual(tables.draw("0-4", 3, random.Random(0)), ["vorpal"] * 3)
+
+    def test_empty_tables_draw_nothing(self):
+        self.assertEqual(LootTables({}).draw("0-4", 3), [])
+
+
+class TestLootTableCache(unittest.TestCase):
+    def setUp(self):
+        invalidate_loot_tables()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT, data_json JSON)")
+        self.conn.execute("INSERT INTO srd_mechanic VALUES ('potion', 'item', ?)",
+                          (json.dumps({"rarity": {"name": "Common"}}),))
+        self.conn.commit()
+
+    def tearDown(self):
+        invalidate_loot_tables()
+        self.conn.close()
+
+    def test_cached_until_invalidated(self):
+        first = loot_tables(self.conn)
+        self.assertIs(loot_tables(self.conn), first)
+
+        self.conn.execute("INSERT INTO srd_mechanic VALUES ('cloak', 'magic_item', '{\"rarity\": \"Uncommon\"}')")
+        self.conn.commit()
+        invalidate_loot_tables()
+        rebuilt = loot_tables(self.conn)
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual(rebuilt.size, 2)
+
+    def test_new_connection_rebuilds(self):
+        first = loot_tables(self.conn)
+        other = sqlite3.connect(":memory:")
+        other.row_factory = sqlite3.Row
+        other.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT, data_json JSON)")
+        try:
+            self.assertEqual(loot_tables(other).size, 0)
+            self.assertIsNot(loot_tables(self.conn), first)
+        finally:
+            other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit Tests — Line of sight & cover (los.py)
+"""
+
+import time
+import random
+
+from engine.los import LineOfSight, compute_field, cover_between
+from engine.tactical import TacticalGrid
+
+
+def _visible(grid, field, cell):
+    return bool(field[cell[1] * grid.width + cell[0]])
+
+
+def test_shadowcasting_blocks_behind_walls_and_is_symmetric():
+    grid = TacticalGrid(9, 9)
+    for x in range(2, 7):
+        grid.set_obstacle((x, 4))
+    field = compute_field(grid, (4, 1))
+    assert _visible(grid, field, (4, 3))
+    assert _visible(grid, field, (4, 4))          # the wall face itself is seen
+    assert not _visible(grid, field, (4, 6))
+
+    rng = random.Random(7)
+    for _ in range(200):
+        a = (rng.randrange(9), rng.randrange(9))
+        b = (rng.randrange(9), rng.randrange(9))
+        if grid.is_blocked(a) or grid.is_blocked(b):
+            continue
+        assert _visible(grid, compute_field(grid, a), b) == _visible(grid, compute_field(grid, b), a)
+
+
+def test_cover_grades():
+    grid = TacticalGrid(7, 7)
+    assert cover_between(grid, (0, 0), (6, 6)) == "none"
+    grid.set_obstacle((3, 3))
+    assert cover_between(grid, (3, 1), (3, 5)) == "half"
+    for x in range(0, 7):
+        grid.set_obstacle((x, 3))
+    assert cover_between(grid, (3, 1), (3, 5)) == "total"
+
+
+def test_attack_modifiers_and_cache_invalidation():
+    grid = TacticalGrid(9, 9)
+    los = LineOfSight(grid)
+    grid.place("rogue", (4, 0))
+    grid.place("orc", (4, 8))
+    assert los.attack_modifiers("rogue", "orc").tags == []
+
+    for x in range(9):
+        grid.set_obstacle((x, 4))
+    mods = los.attack_modifiers("rogue", "orc")
+    assert not mods.can_target
+
+    grid.set_obstacle((4, 4), False)        # a murder-hole in the wall
+    grid.place("rogue", (4, 1))
+    before = los.field_for("rogue")
+    mods = los.attack_modifiers("rogue", "orc")
+    assert mods.can_target and los.can_see("rogue", "orc")
+    assert los.field_for("rogue") is before  # unchanged position: cached field
+
+    grid.place("rogue", (0, 1))
+    assert los.field_for("rogue") is not before
+    assert not los.attack_modifiers("rogue", "orc").can_target
+
+
+def test_pillar_grants_half_cover_ac():
+    grid = TacticalGrid(7, 7)
+    los = LineOfSight(grid)
+    grid.set_obstacle((3, 3))
+    grid.place("archer", (3, 1))
+    grid.place("goblin", (3, 5))
+    mods = los.attack_modifiers("archer", "goblin")
+    assert (mods.cover, mods.ac_bonus, mods.can_target) == ("half", 2, True)
+    assert "half_cover" in mods.tags
+
+
+def test_unseen_attacker_gets_advantage():
+    grid = TacticalGrid(5, 5)
+    los = LineOfSight(grid)
+    grid.place("archer", (0, 0))
+    grid.place("target", (4, 4))
+    # Off-grid tokens have no positional modifiers
+    assert not los.attack_modifiers("archer", "ghost").advantage
+    mods = los.attack_modifiers("archer", "target")
+    assert not mods.advantage and not mods.disadvantage
+
+    # Only the attacker is hidden (e.g. Invisible): advantage, no disadvantage
+    mods = los.attack_modifiers("archer", "target", attacker_hidden=True)
+    assert mods.advantage and not mods.disadvantage
+    assert "unseen_attacker" in mods.tags
+
+
+def test_unseen_target_gets_disadvantage_and_blocked_sight_cancels():
+    grid = TacticalGrid(5, 5)
+    los = LineOfSight(grid)
+    grid.place("archer", (0, 0))
+    grid.place("target", (4, 4))
+    mods = los.attack_modifiers("archer", "target", target_hidden=True)
+    assert mods.disadvantage and not mods.advantage and "unseen_target" in mods.tags
+
+    # A wall hides both sides: the advantage and disadvantage cancel
+    for y in range(5):
+        grid.set_obstacle((2, y))
+    mods = los.attack_modifiers("archer", "target", attacker_hidden=True)
+    assert not los.can_see("archer", "target")
+    assert not mods.advantage and not mods.disadvantage
+
+
+def test_many_token_fields_are_fast():
+    grid = TacticalGrid(100, 100)
+    rng = random.Random(3)
+    for _ in range(600):
+        grid.set_obstacle((rng.randrange(100), rng.randrange(100)))
+    los = LineOfSight(grid)
+    for i in range(40):
+        cell = (rng.randrange(100), rng.randrange(100))
+        if not grid.is_blocked(cell):
+            grid.place(f"t{i}", cell)
+    start = time.perf_counter()
+    for tid in list(grid.positions):
+        los.visible_tokens(tid)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for tid in list(grid.positions):
+        los.visible_tokens(tid)
+    assert time.perf_counter() - start < first
+    assert first < 3.0
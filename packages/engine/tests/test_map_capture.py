@@ -0,0 +1,115 @@
+"""
+Unit Tests — Map capture job queue (maps.py)
+"""
+
+import asyncio
+import threading
+import pytest
+from PIL import Image
+
+from engine.maps import MapManager
+from engine.visibility import VisibilityRegistry
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mm = MapManager(
+        str(tmp_path / "external-sources"), registry=VisibilityRegistry(), output_dir=str(tmp_path / "generated")
+    )
+    mm.browser_calls = 0
+
+    async def fake_capture(cell_id, seed, raw_path):
+        mm.browser_calls += 1
+        await asyncio.sleep(0.01)
+        raw_path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGBA", (320, 180), (10, 20, 30, 255)).save(raw_path)
+
+    mm._run_browser_capture = fake_capture
+    return mm
+
+
+@pytest.mark.asyncio
+async def test_duplicate_captures_coalesce(manager):
+    first = await manager.capture_node("start_town")
+    second = await manager.capture_node("start_town")
+    assert first is second
+    assert first.status in ("queued", "running")
+    assert len(manager._job_tasks) == 1  # The queued job is strongly referenced
+
+    while first.status in ("queued", "running"):
+        await asyncio.sleep(0.01)
+
+    assert first.status == "done"
+    assert first.to_dict()["image_url"] == "/generated/map_start_town.png"
+    assert manager.browser_calls == 1
+    assert manager.get_job(first.job_id) is first
+    await asyncio.sleep(0)
+    assert not manager._job_tasks
+
+
+@pytest.mark.asyncio
+async def test_reveal_runs_off_the_event_loop(manager, monkeypatch):
+    threads = []
+    monkeypatch.setattr(manager, "reveal_node", lambda node_id, viewer_id=None: threads.append(threading.current_thread()))
+    await manager.capture_node("start_town")
+    assert threads and threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_cached_capture_only_remasks(manager):
+    job = await manager.capture_node("start_town", seed="s1")
+    while job.status in ("queued", "running"):
+        await asyncio.sleep(0.01)
+
+    again = await manager.capture_node("start_town", seed="s1")
+    assert again.status == "done" and again.cached
+    assert manager.browser_calls == 1
+
+    other_seed = await manager.capture_node("start_town", seed="s2")
+    assert not other_seed.cached
+
+
+@pytest.mark.asyncio
+async def test_unmapped_node_is_rejected(manager):
+    assert await manager.capture_node("does_not_exist") is None
+
+
+@pytest.mark.asyncio
+async def test_viewer_captures_use_their_own_fog(manager):
+    mine = await manager.capture_node("start_town", viewer_id="p1")
+    while mine.status in ("queued", "running"):
+        await asyncio.sleep(0.01)
+    party = await manager.capture_node("start_town", party_ids=["p2", "p1"])
+    world = await manager.capture_node("start_town")
+
+    assert mine is not party and manager.browser_calls == 1
+    assert mine.to_dict()["image_url"] == "/generated/map_start_town__p1.png"
+    assert party.to_dict()["viewers"] == ["p1", "p2"]
+    assert world.to_dict()["image_url"] == "/generated/map_start_town.png"
+    assert ("start_town", ("p1",)) in manager._composed
+
+    # A later reveal for p1 redraws p1's and the party's maps, not only the world map
+    updates = await asyncio.to_thread(manager.reveal_node, "dreadlands_entrance", "p1")
+    assert {"map_start_town", "map_start_town__p1", "map_start_town__p1+p2"} == set(updates)
+
+
+@pytest.mark.asyncio
+async def test_reveal_logs_keep_only_what_composed_maps_need(manager):
+    job = await manager.capture_node("start_town", viewer_id="p1")
+    while job.status in ("queued", "running"):
+        await asyncio.sleep(0.01)
+    await asyncio.to_thread(manager.reveal_node, "dreadlands_entrance", "p1")
+    # Every composed map is current, so nothing older needs replaying
+    assert manager.visibility.reveal_log.entries == []
+    assert manager.registry.reveal_log.entries == []
+
+
+@pytest.mark.asyncio
+async def test_viewer_reveal_leaves_the_world_fog_alone(manager):
+    world_revision = manager.visibility.revision
+    await asyncio.to_thread(manager.reveal_node, "dreadlands_entrance", "p1")
+    assert manager.visibility.revision == world_revision
+    assert manager.registry.get("p1").count() > 0
+
+    await asyncio.to_thread(manager.reveal_node, "dreadlands_entrance")
+    assert manager.visibility.revision == world_revision + 1
@@ -0,0 +1,121 @@
+import sqlite3
+
+import pytest
+
+from engine import migrations
+from engine.migrations import LATEST_VERSION, MIGRATIONS, Migration, migrate, schema_version
+
+
+def _db():
+    db = sqlite3.connect(":memory:")
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def _indexes(db, table):
+    return {row[1] for row in db.execute(f"PRAGMA index_list({table})")}
+
+
+def test_fresh_database_gets_every_migration_and_index():
+    db = _db()
+    assert migrate(db) == [m.version for m in MIGRATIONS]
+    assert schema_version(db) == LATEST_VERSION
+    assert "idx_actors_location" in _indexes(db, "actors")
+    assert "idx_inventory_character" in _indexes(db, "inventory_item")
+    assert "idx_game_saves_created" in _indexes(db, "game_saves")
+
+
+def test_only_pending_migrations_run():
+    db = _db()
+    assert migrate(db, target=2) == [1, 2]
+    assert schema_version(db) == 2
+    assert migrate(db) == list(range(3, LATEST_VERSION + 1))
+    assert migrate(db) == []
+
+
+def test_current_connection_skips_ddl():
+    db = _db()
+    migrate(db)
+    statements = []
+    db.set_trace_callback(statements.append)
+    migrate(db)
+    db.set_trace_callback(None)
+    assert statements == []
+
+
+def test_adopts_unversioned_database():
+    # Tables created by the old inline startup DDL, with data in them
+    db = _db()
+    db.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT, data_json JSON)")
+    db.execute("""INSERT INTO srd_mechanic VALUES ('cloak', 'magic_item', '{"name": "Cloak of Elvenkind", "rarity": "Uncommon"}')""")
+    db.execute("CREATE TABLE inventory_item (id TEXT PRIMARY KEY, character_id TEXT, template_id TEXT, location TEXT)")
+    db.execute("INSERT INTO inventory_item VALUES ('i1', 'hero', 'cloak', 'backpack')")
+    db.execute("CREATE TABLE character_gold (character_id TEXT PRIMARY KEY, gold INTEGER NOT NULL DEFAULT 0)")
+    db.execute("INSERT INTO character_gold VALUES ('hero', 40)")
+    db.commit()
+
+    migrate(db)
+    item = db.execute("SELECT name, rarity FROM inventory_item WHERE id = 'i1'").fetchone()
+    assert tuple(item) == ("Cloak of Elvenkind", "Uncommon")
+    opening = db.execute("SELECT delta, balance_after FROM gold_ledger WHERE character_id = 'hero'").fetchone()
+    assert tuple(opening) == (40, 40)
+
+
+def test_srd_filter_columns_are_generated_and_indexed():
+    db = _db()
+    db.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT NOT NULL, data_json TEXT NOT NULL DEFAULT '{}')")
+    db.execute("""INSERT INTO srd_mechanic (id, type, data_json) VALUES
+        ('spell_fireball', 'spell', '{"name": "Fireball", "level": 3, "school": {"index": "evocation"}}'),
+        ('magic_item_cloak', 'magic_item', '{"name": "Cloak", "rarity": {"name": "Uncommon"}}'),
+        ('monster_goblin', 'monster', '{"name": "Goblin", "challenge_rating": 0.25}')""")
+    migrate(db)
+
+    rows = {r["id"]: dict(r) for r in db.execute("SELECT id, name_lower, cr, level, rarity, school FROM srd_mechanic")}
+    assert rows["spell_fireball"]["school"] == "evocation" and rows["spell_fireball"]["level"] == 3
+    assert rows["magic_item_cloak"]["rarity"] == "Uncommon"
+    assert rows["monster_goblin"]["cr"] == 0.25 and rows["monster_goblin"]["name_lower"] == "goblin"
+    assert {"idx_srd_mechanic_name_lower", "idx_srd_mechanic_type_cr"} <= _indexes(db, "srd_mechanic")
+
+    # Later ingests keep the columns in sync without any extra work
+    db.execute("""INSERT OR REPLACE INTO srd_mechanic (id, type, data_json) VALUES ('monster_goblin', 'monster', '{"name": "Goblin Boss", "challenge_rating": 1}')""")
+    assert tuple(db.execute("SELECT name_lower, cr FROM srd_mechanic WHERE id = 'monster_goblin'").fetchone()) == ("goblin boss", 1.0)
+
+
+def test_srd_schema_is_frozen_per_migration():
+    db = _db()
+    db.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT NOT NULL, data_json TEXT NOT NULL DEFAULT '{}')")
+    migrate(db, target=6)
+    columns = {row[1] for row in db.execute("PRAGMA table_xinfo(srd_mechanic)")}
+    assert set(migrations.SRD_COLUMNS_006) <= columns and not set(migrations.SRD_COLUMNS_007) & columns
+    assert "idx_srd_mechanic_type" in _indexes(db, "srd_mechanic")
+
+    migrate(db)
+    assert set(migrations.SRD_COLUMNS) <= {row[1] for row in db.execute("PRAGMA table_xinfo(srd_mechanic)")}
+    assert _indexes(db, "srd_mechanic") >= set(migrations.SRD_INDEXES)
+    assert "idx_srd_mechanic_type" not in _indexes(db, "srd_mechanic")
+
+
+def test_ensure_srd_columns_reruns_on_a_migrated_database():
+    # Re-ingesting must not re-add generated columns (table_info hides them)
+    db = _db()
+    db.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT NOT NULL, data_json TEXT NOT NULL DEFAULT '{}')")
+    migrate(db)
+    migrations.ensure_srd_columns(db)
+    migrations.ensure_srd_columns(db)
+    assert "idx_srd_mechanic_type" not in _indexes(db, "srd_mechanic")
+
+
+def test_failed_migration_rolls_back(monkeypatch):
+    def broken(db):
+        db.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    db = _db()
+    migrate(db)
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [Migration(LATEST_VERSION + 1, "broken", broken)])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", LATEST_VERSION + 1)
+
+    with pytest.raises(RuntimeError):
+        migrate(db)
+    assert schema_version(db) == LATEST_VERSION
+    assert db.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
@@ -0,0 +1,73 @@
+import json
+import sqlite3
+
+from engine.name_resolver import NameResolver, invalidate_name_resolver, name_resolver, normalize_name
+
+ROWS = [
+    ("monster_goblin", "monster", "Goblin", "Trasgo"),
+    ("monster_hobgoblin", "monster", "Hobgoblin", None),
+    ("spell_fireball", "spell", "Fireball", "Bola de fuego"),
+    ("spell_cure_wounds", "spell", "Cure Wounds", "Curar heridas"),
+    ("equipment_longsword", "equipment", "Longsword", "Espada larga"),
+    ("monster_ancient_red_dragon", "monster", "Ancient Red Dragon", "Dragón rojo anciano"),
+]
+
+
+def test_normalize():
+    assert normalize_name("  Dragón_Rojo-Anciano!! ") == "dragon rojo anciano"
+    assert normalize_name("") == ""
+
+
+def test_exact_aliases():
+    resolver = NameResolver(ROWS)
+    assert resolver.resolve_one("goblin") == "monster_goblin"            # English name / bare index
+    assert resolver.resolve_one("Bola de Fuego") == "spell_fireball"     # Spanish name
+    assert resolver.resolve_one("dragon rojo anciano") == "monster_ancient_red_dragon"  # accents stripped
+    assert resolver.resolve_one("cure_wounds") == "spell_cure_wounds"    # slug
+    assert resolver.resolve("Longsword")[0].score == 1.0
+
+
+def test_fuzzy_ranked_and_type_filtered():
+    resolver = NameResolver(ROWS)
+    matches = resolver.resolve("Fire Bal")
+    assert matches[0].id == "spell_fireball" and matches[0].score < 1.0
+
+    ranked = resolver.resolve("gobln", limit=5)
+    assert [m.id for m in ranked][:1] == ["monster_goblin"]
+    assert all(a.score >= b.score for a, b in zip(ranked, ranked[1:]))
+
+    assert resolver.resolve_one("goblin", kind="spell") is None
+    assert resolver.resolve_one("Fireball", kind="spell") == "spell_fireball"
+
+
+def test_misses_are_cached():
+    resolver = NameResolver(ROWS)
+    assert resolver.resolve("Tarrasque") == []
+    assert ("tarrasque", None, 5) in resolver._results
+    assert resolver.resolve("tarrasque") is resolver._results[("tarrasque", None, 5)]
+
+
+def test_partial_id_match_is_cached():
+    resolver = NameResolver(ROWS)
+    assert resolver.resolve_partial("GOBLIN") == "monster_goblin"       # id order: goblin < hobgoblin
+    assert resolver.resolve_partial("red_drag", kind="monster") == "monster_ancient_red_dragon"
+    assert resolver.resolve_partial("fire", kind="monster") is None
+    assert ("fire", "monster") in resolver._partials
+    assert resolver.resolve_partial("tarrasque") is None and ("tarrasque", None) in resolver._partials
+
+
+def test_shared_instance_rebuilds_on_new_connection():
+    invalidate_name_resolver()
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT, data_json TEXT, data_es TEXT)")
+    db.execute("INSERT INTO srd_mechanic VALUES ('monster_wolf', 'monster', ?, '{}')", (json.dumps({"name": "Wolf"}),))
+    db.commit()
+    try:
+        first = name_resolver(db)
+        assert name_resolver(db) is first
+        assert first.resolve_one("wolf") == "monster_wolf"
+        invalidate_name_resolver()
+        assert name_resolver(db) is not first
+    finally:
+        invalidate_name_resolver()
+        db.close()
@@ -0,0 +1,89 @@
+"""
+Unit Tests — World routing (pathfinding.py)
+"""
+
+import sqlite3
+
+import pytest
+
+from engine import maps
+from engine.maps import MapNode, WORLD_GRAPH
+from engine.pathfinding import RouteTable, find_path, route_table
+from engine.world_store import WorldStore
+
+
+@pytest.fixture
+def memory_world(monkeypatch):
+    """Point maps at an in-memory world store so edits never reach the dev DB."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    store = WorldStore(lambda: conn)
+    store.seed(WORLD_GRAPH.values())
+    monkeypatch.setattr(maps, "_world_store", store)
+    yield store
+    conn.close()
+
+
+def _node(node_id, x, y, connections, risk=1):
+    return MapNode(id=node_id, name=node_id.title(), type="wilderness",
+                   coordinates={"x": x, "y": y}, description="", connections=connections,
+                   risk_level=risk)
+
+
+def _diamond():
+    # a -> d is shorter through b, but b is far riskier than c
+    return {
+        "a": _node("a", 0, 0, ["b", "c"]),
+        "b": _node("b", 10, 1, ["a", "d"], risk=10),
+        "c": _node("c", 10, -4, ["a", "d"]),
+        "d": _node("d", 20, 0, ["b", "c"]),
+        "island": _node("island", 90, 90, []),
+    }
+
+
+def test_find_path_prefers_safer_road():
+    path, cost = find_path("a", "d", graph=_diamond())
+    assert path == ["a", "c", "d"]
+    assert cost > 20
+
+
+def test_route_table_matches_astar_and_handles_unreachable():
+    graph = _diamond()
+    table = RouteTable(graph)
+    assert table.route("a", "d") == find_path("a", "d", graph=graph)[0]
+    assert table.route("d", "a") == ["d", "c", "a"]
+    assert table.route("a", "a") == ["a"]
+    assert table.route("a", "island") is None
+    assert table.distance("a", "island") == float("inf")
+    # Only the pairs asked for are solved, each once
+    assert set(table._routes) == {("a", "d"), ("d", "a"), ("a", "a"), ("a", "island")}
+    table.route("a", "d").append("mutated")
+    assert table.route("a", "d") == ["a", "c", "d"]
+
+
+def test_world_routes_rebuild_when_graph_changes(memory_world, monkeypatch):
+    def no_full_load():
+        raise AssertionError("routing must not load the whole graph")
+    monkeypatch.setattr(memory_world, "all", no_full_load)
+    assert route_table.route("start_town", "sanguine_spire") == [
+        "start_town", "dreadlands_entrance", "sanguine_spire"
+    ]
+    before = route_table.revision
+    maps.upsert_node(_node("test_outpost", 50.0, 45.0, []))
+    try:
+        maps.link_nodes("start_town", "test_outpost")
+        assert route_table.route("test_outpost", "fort_hollow") == [
+            "test_outpost", "start_town", "dreadlands_entrance", "fort_hollow"
+        ]
+        assert route_table.revision != before
+    finally:
+        maps.remove_node("test_outpost")
+    assert memory_world.get("test_outpost") is None
+
+
+def test_link_nodes_rejects_unknown_nodes(memory_world):
+    revision = maps.graph_revision()
+    with pytest.raises(KeyError):
+        maps.link_nodes("start_town", "nowhere")
+    assert maps.graph_revision() == revision
+    assert "nowhere" not in maps.get_node("start_town").connections
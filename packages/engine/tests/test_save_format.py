@@ -0,0 +1,73 @@
+"""
+Unit Tests — Compact save blobs (save_format.py) and save metadata columns
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from engine import save_format
+from engine.save_format import encode_save, decode_save, dehydrate_combatant, hydrate_combatant
+from engine.migrations import migrate
+
+CLAW = {"name": "Claw", "attack_bonus": 4, "damage_dice_sides": 6}
+
+
+def test_roundtrip_is_versioned_and_smaller():
+    state = {"round": 3, "combatants": [{"id": f"c{i}", "name": "Goblin", "hp_current": 7} for i in range(50)]}
+    blob = encode_save(state)
+    assert blob[:3] == b"DCS" and blob[3] == save_format.SAVE_FORMAT_VERSION
+    assert len(blob) < len(json.dumps(state))
+    assert decode_save(blob) == state
+
+
+def test_decodes_legacy_json():
+    assert decode_save('{"round": 2}') == {"round": 2}
+
+
+def test_actions_stored_by_reference():
+    with patch.object(save_format, "_template_actions", return_value=(json.dumps(CLAW, sort_keys=True),)):
+        stored = dehydrate_combatant({"id": "m1", "template_id": "wolf", "actions": [CLAW]})
+        assert "actions" not in stored
+        assert hydrate_combatant(stored)["actions"] == [CLAW]
+
+        # Customised actions are kept verbatim
+        custom = {"id": "m2", "template_id": "wolf", "actions": [{**CLAW, "attack_bonus": 9}]}
+        assert dehydrate_combatant(custom) is custom
+
+
+def test_actions_kept_when_srd_unavailable():
+    with patch.object(save_format, "_template_actions", return_value=None):
+        data = {"id": "m1", "template_id": "wolf", "actions": [CLAW]}
+        assert dehydrate_combatant(data) is data
+
+
+def test_templates_prefetched_in_one_lookup():
+    save_format._template_cache.clear()
+    stats = {"monster_wolf": {"actions": [CLAW]}}
+    with patch("engine.srd_queries.get_monster_stats_many", return_value=stats) as fetch:
+        save_format.prefetch_templates(["monster_wolf", "monster_gone", "monster_wolf", None])
+        assert save_format._template_actions("monster_wolf") == (json.dumps(CLAW, sort_keys=True),)
+        assert save_format._template_actions("monster_gone") is None
+    fetch.assert_called_once_with(["monster_wolf", "monster_gone"])
+    save_format._template_cache.clear()
+
+
+def test_legacy_saves_get_metadata_columns():
+    db = sqlite3.connect(":memory:")
+    db.row_factory = sqlite3.Row
+    db.execute("CREATE TABLE game_saves (save_id TEXT PRIMARY KEY, data_json TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    db.execute("INSERT INTO game_saves (save_id, data_json) VALUES ('new', ?)",
+               (json.dumps({"character_name": "Ayla", "character_class": "Wizard", "level": 3, "location": "Oakvale"}),))
+    db.execute("INSERT INTO game_saves (save_id, data_json) VALUES ('old', ?)",
+               (json.dumps({"character": {"name": "Bran", "class_id": "class_fighter"}}),))
+
+    migrate(db)
+    migrate(db)  # idempotent
+    rows = {r["save_id"]: dict(r) for r in db.execute("SELECT save_id, character_name, character_class, level, location FROM game_saves")}
+    assert rows["new"] == {"save_id": "new", "character_name": "Ayla", "character_class": "Wizard", "level": 3, "location": "Oakvale"}
+    assert rows["old"]["character_name"] == "Bran" and rows["old"]["character_class"] == "Fighter"
@@ -1,6 +1,14 @@
+import json
+import random
+import sqlite3
 import unittest
 from unittest.mock import patch, MagicMock
-from src.engine.srd_queries import get_spell_mechanics, get_monster_stats
+from fastapi import HTTPException
+from src.engine.migrations import migrate
+from src.engine.srd_queries import (
+    get_spell_mechanics, get_monster_stats, get_random_monster_by_cr, get_srd_mechanic,
+    list_mechanics, count_by_type, invalidate_type_counts, get_many, get_monster_stats_many,
+)
 
 class TestSRDQueries(unittest.TestCase):
 
@@ -145,5 +153,114 @@ class TestSRDQueries(unittest.TestCase):
         self.assertEqual(action["damage_modifier"], 2)
         self.assertEqual(action["damage_type"], "slashing")
 
+
+class TestMaterializedSRDColumns(unittest.TestCase):
+    """Queries against a real (in-memory) SRD with the generated filter columns."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT NOT NULL, data_json TEXT NOT NULL DEFAULT '{}', data_es TEXT NOT NULL DEFAULT '{}')")
+        monsters = [("rat", "Giant Rat", 0.125), ("kobold", "Kobold", 0.125), ("wolf", "Wolf", 0.25),
+                    ("ogre", "Ogre", 2), ("troll", "Troll", 5)]
+        self.conn.executemany(
+            "INSERT INTO srd_mechanic (id, type, data_json) VALUES (?, 'monster', ?)",
+            [(f"monster_{i}", json.dumps({"name": n, "challenge_rating": cr})) for i, n, cr in monsters]
+        )
+        self.conn.execute("""INSERT INTO srd_mechanic (id, type, data_json, data_es) VALUES ('spell_shield_of_faith', 'spell',
+            '{"name": "Shield of Faith", "level": 1, "school": {"index": "abjuration"}}', '{"name": "Escudo de fe", "level": 1}')""")
+        migrate(self.conn)
+        self.patcher = patch('src.engine.srd_queries.get_db', return_value=self.conn)
+        self.patcher.start()
+        get_srd_mechanic.cache_clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        get_srd_mechanic.cache_clear()
+        self.conn.close()
+
+    def test_random_monster_uses_cr_index(self):
+        plan = self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM srd_mechanic WHERE type = 'monster' AND cr BETWEEN 0 AND 1 ORDER BY cr LIMIT 1 OFFSET 0"
+        ).fetchall()
+        self.assertIn("idx_srd_mechanic_type_cr", plan[0][3])
+
+        random.seed(4)
+        picks = {get_random_monster_by_cr(0, 0.25)["id"] for _ in range(60)}
+        self.assertEqual(picks, {"monster_rat", "monster_kobold", "monster_wolf"})
+
+    def test_random_monster_falls_back_to_low_cr(self):
+        self.assertIn(get_random_monster_by_cr(20, 30)["id"], {"monster_rat", "monster_kobold", "monster_wolf"})
+
+    def test_name_fallbacks(self):
+        self.assertEqual(get_srd_mechanic("Shield_of_Faith")["level"], 1)  # normalized name
+        self.assertEqual(get_srd_mechanic("troll")["name"], "Troll")        # bare index
+        self.assertEqual(get_srd_mechanic("Giant Ratt")["name"], "Giant Rat")  # typo (trigrams)
+        self.assertEqual(get_srd_mechanic("gre")["name"], "Ogre")           # partial id
+        self.assertEqual(get_monster_stats("kobold")["name"], "Kobold")
+        with self.assertRaises(HTTPException):
+            get_srd_mechanic("Tarrasque")
+
+    def test_list_pages_by_cursor(self):
+        plan = self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM srd_mechanic m WHERE m.type = 'monster' AND m.id > '' ORDER BY m.id LIMIT 3"
+        ).fetchall()
+        self.assertIn("idx_srd_mechanic_type_id", plan[0][3])
+        self.assertFalse(any("TEMP B-TREE" in row[3] for row in plan))
+
+        first = list_mechanics("monster", limit=3)
+        self.assertEqual(first["total"], 5)
+        self.assertEqual([i["index"] for i in first["items"]], ["kobold", "ogre", "rat"])
+        self.assertEqual(first["items"][0], {"id": "monster_kobold", "name": "Kobold", "index": "kobold"})
+        rest = list_mechanics("monster", after=first["next_cursor"], limit=3)
+        self.assertEqual([i["id"] for i in rest["items"]], ["monster_troll", "monster_wolf"])
+        self.assertIsNone(rest["next_cursor"])
+
+    def test_list_projects_requested_fields(self):
+        page = list_mechanics("monster", limit=2, fields=["name", "cr"])
+        self.assertEqual(page["items"], [{"name": "Kobold", "cr": 0.125}, {"name": "Ogre", "cr": 2.0}])
+        with self.assertRaises(HTTPException) as ctx:
+            list_mechanics("monster", fields=["data_json"])
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_get_many_is_one_query(self):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        found = get_many(["monster_wolf", "monster_ogre", "monster_wolf"])
+        self.conn.set_trace_callback(None)
+        self.assertEqual({k: v["name"] for k, v in found.items()}, {"monster_wolf": "Wolf", "monster_ogre": "Ogre"})
+        self.assertEqual(sum(1 for q in statements if "FROM srd_mechanic" in q), 1)
+        self.assertEqual(list(get_many(["monster_rat", "Tarrasque"])), ["monster_rat"])  # Unknown ids are left out
+
+    def test_get_many_resolves_names_and_projects(self):
+        found = get_many(["Trol", "spell_shield_of_faith"], fields=["name", "school"])
+        self.assertEqual(found["Trol"], {"name": "Troll"})  # Absent keys are left out
+        self.assertEqual(found["spell_shield_of_faith"]["school"], {"index": "abjuration"})  # Objects stay objects
+        self.assertEqual(get_many(["spell_shield_of_faith", "monster_rat"], lang="es", fields=["name"]),
+                         {"spell_shield_of_faith": {"name": "Escudo de fe"}, "monster_rat": {"name": "Giant Rat"}})
+        with self.assertRaises(HTTPException):
+            get_many(["monster_rat"], fields=["name') --"])
+
+    def test_get_many_projection_keeps_json_types(self):
+        self.conn.execute("""INSERT INTO srd_mechanic (id, type, data_json) VALUES ('spell_bless', 'spell',
+            '{"name": "Bless", "concentration": true, "ritual": false, "material": null}')""")
+        found = get_many(["spell_bless"], fields=["concentration", "ritual", "material", "level"])
+        self.assertEqual(found["spell_bless"], {"concentration": True, "ritual": False, "material": None})
+        self.assertIs(found["spell_bless"]["concentration"], True)
+
+    def test_monster_stats_many(self):
+        stats = get_monster_stats_many(["monster_ogre", "kobold"])
+        self.assertEqual(stats["kobold"], get_monster_stats("kobold"))
+        self.assertEqual(stats["monster_ogre"]["cr"], 2)
+
+    def test_type_counts_are_cached(self):
+        invalidate_type_counts()
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        self.assertEqual(count_by_type(self.conn), {"monster": 5, "spell": 1})
+        count_by_type(self.conn)
+        self.conn.set_trace_callback(None)
+        self.assertEqual(sum(1 for q in statements if "COUNT(*)" in q), 1)
+
 if __name__ == '__main__':
     unittest.main()
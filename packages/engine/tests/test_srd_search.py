@@ -0,0 +1,131 @@
+import json
+import sqlite3
+
+import pytest
+
+from engine.migrations import migrate
+from engine.name_resolver import invalidate_name_resolver
+from engine import srd_search
+from engine.srd_search import invalidate_search_cache, match_expression, rebuild_search_index, search
+
+MECHANICS = [
+    ("spell_fireball", "spell", {"name": "Fireball", "level": 3, "school": {"index": "evocation"},
+                                  "desc": ["A bright streak flashes to a point you choose and blossoms into flame."]},
+     {"name": "Bola de fuego", "desc": ["Un destello brillante estalla en llamas."]}),
+    ("spell_fire_bolt", "spell", {"name": "Fire Bolt", "level": 0, "desc": ["You hurl a mote of fire at a creature."]}, {}),
+    ("spell_wall_of_ice", "spell", {"name": "Wall of Ice", "level": 6,
+                                     "desc": ["Creatures near the wall take cold damage; fire melts it."]}, {}),
+    ("monster_fire_elemental", "monster", {"name": "Fire Elemental", "challenge_rating": 5, "type": "elemental",
+                                            "hit_points": 102, "armor_class": [{"type": "natural", "value": 13}],
+                                            "desc": "A creature of living flame."}, {}),
+    ("monster_goblin", "monster", {"name": "Goblin", "challenge_rating": 0.25, "type": "humanoid",
+                                    "hit_points": 7, "armor_class": 15}, {"name": "Trasgo"}),
+    ("monster_hobgoblin", "monster", {"name": "Hobgoblin", "challenge_rating": 0.5, "type": "humanoid",
+                                       "hit_points": 11, "armor_class": [{"value": 18}]}, {}),
+    ("magic_item_flame_tongue", "magic_item", {"name": "Flame Tongue", "rarity": {"name": "Rare"},
+                                                "desc": ["Speak the command word and fire erupts from the blade."]}, {}),
+]
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE srd_mechanic (id TEXT PRIMARY KEY, type TEXT NOT NULL, data_json TEXT NOT NULL DEFAULT '{}', data_es TEXT NOT NULL DEFAULT '{}')")
+    # Pre-007 index layout: name folded into the content column
+    conn.execute("CREATE VIRTUAL TABLE srd_mechanic_fts USING fts5(id UNINDEXED, type, content_en, content_es)")
+    conn.executemany(
+        "INSERT INTO srd_mechanic (id, type, data_json, data_es) VALUES (?, ?, ?, ?)",
+        [(i, t, json.dumps(en), json.dumps(es)) for i, t, en, es in MECHANICS]
+    )
+    migrate(conn)
+    yield conn
+    invalidate_search_cache()
+    invalidate_name_resolver()
+    conn.close()
+
+
+def test_match_expression_is_prefix_and_safe():
+    assert match_expression("Fire bal") == '"fire"* "bal"*'
+    assert match_expression('fire" OR *') == '"fire"* "or"*'
+    assert match_expression("  ") is None
+
+
+def test_migration_splits_names_from_descriptions(db):
+    columns = {row[1] for row in db.execute("PRAGMA table_info(srd_mechanic_fts)")}
+    assert {"name_en", "name_es", "content_en", "content_es"} <= columns
+    assert rebuild_search_index(db) == len(MECHANICS)
+
+
+def test_name_hits_outrank_description_hits(db):
+    found = search("fire", db=db)
+    ids = [r["id"] for r in found["results"]]
+    assert found["total"] == 5 and not found["fuzzy"]
+    # Wall of Ice and Flame Tongue only mention fire in their descriptions
+    assert set(ids[-2:]) == {"spell_wall_of_ice", "magic_item_flame_tongue"}
+    assert all(a["score"] >= b["score"] for a, b in zip(found["results"], found["results"][1:]))
+
+
+def test_exact_name_first_and_prefix_terms(db):
+    assert search("goblin", db=db)["results"][0]["id"] == "monster_goblin"
+    # "bol" also prefixes the Spanish "Bola de fuego", ranked below the English name
+    assert [r["id"] for r in search("fire bol", db=db)["results"]] == ["spell_fire_bolt", "spell_fireball"]
+    assert search("firebal", db=db)["results"][0]["id"] == "spell_fireball"
+
+
+def test_typo_falls_back_to_fuzzy_names(db):
+    found = search("Firebell", db=db)
+    assert found["fuzzy"] and found["results"][0]["id"] == "spell_fireball"
+    assert found["results"][0]["snippet"] is None
+    assert search("zzzzqqq", db=db)["total"] == 0
+
+
+def test_type_and_cr_filters_with_facets(db):
+    found = search("fire", types=["monster", "item"], db=db)
+    assert {r["id"] for r in found["results"]} == {"monster_fire_elemental", "magic_item_flame_tongue"}
+    # Each facet ignores its own filter
+    assert found["facets"]["type"] == {"spell": 3, "monster": 1, "magic_item": 1}
+    assert found["facets"]["cr"] == {"5-10": 1}
+
+    tough = search("goblin", cr_min=1, db=db)
+    assert tough["total"] == 0 and tough["facets"] == {"type": {}, "cr": {"0-4": 1}}
+
+
+def test_results_come_from_materialized_columns(db):
+    elemental = search("elemental", db=db)["results"][0]
+    assert (elemental["cr"], elemental["hp"], elemental["ac"], elemental["creature_type"]) == (5.0, 102, 13, "elemental")
+    assert elemental["snippet"] == "Fire <mark>Elemental</mark>"
+
+    fireball = search("bola de fuego", lang="es", db=db)["results"][0]
+    assert (fireball["id"], fireball["name"], fireball["school"]) == ("spell_fireball", "Bola de fuego", "evocation")
+
+
+def test_results_are_cached_until_invalidated(db):
+    first = search("goblin", db=db)
+    assert search("Goblin!", db=db) == first and len(srd_search._cache) == 1  # Same normalized query
+    invalidate_search_cache()
+    assert not srd_search._cache
+
+
+def test_cached_results_are_copies(db):
+    first = search("goblin", db=db)
+    first["results"][0]["name"] = "Mutated"
+    first["facets"]["type"].clear()
+    again = search("goblin", db=db)
+    assert again["results"][0]["name"] == "Goblin" and again["facets"]["type"]
+
+
+def test_fuzzy_candidates_come_from_the_asked_types(db, monkeypatch):
+    db.execute("INSERT INTO srd_mechanic (id, type, data_json) VALUES ('monster_fire_bot', 'monster', ?)",
+               (json.dumps({"name": "Fire Bot"}),))
+    rebuild_search_index(db)
+    # One candidate slot: picked across all types it would be Fire Bolt, leaving no monster
+    monkeypatch.setattr(srd_search, "FUZZY_CANDIDATES", 1)
+    found = search("fire boltt", types=["monster"], db=db)
+    assert found["fuzzy"] and [r["id"] for r in found["results"]] == ["monster_fire_bot"]
+
+
+def test_pagination(db):
+    everything = [r["id"] for r in search("fire", db=db)["results"]]
+    page = search("fire", limit=2, offset=2, db=db)
+    assert page["total"] == 5 and [r["id"] for r in page["results"]] == everything[2:4]
@@ -0,0 +1,80 @@
+"""
+Unit Tests — Tactical grid (tactical.py, movement.py)
+"""
+
+import time
+import pytest
+
+from engine.tactical import TacticalGrid
+from engine.movement import validate_movement_range
+
+
+def test_cell_ids_match_legacy_addressing():
+    grid = TacticalGrid(5, 5)
+    assert grid.from_cell_id(1) == (0, 0)
+    assert grid.from_cell_id(7) == (1, 1)
+    assert grid.to_cell_id((4, 4)) == 25
+    with pytest.raises(ValueError):
+        grid.from_cell_id(26)
+
+
+def test_range_queries_use_spatial_hash():
+    grid = TacticalGrid(100, 100)
+    grid.place("hero", (50, 50))
+    grid.place("goblin", (51, 50))      # 5 ft
+    grid.place("archer", (56, 44))      # 30 ft (diagonal counts as 5 ft)
+    grid.place("dragon", (90, 90))
+
+    assert grid.tokens_near("hero", 5) == ["goblin"]
+    assert grid.tokens_near("hero", 30) == ["goblin", "archer"]
+
+    grid.place("goblin", (70, 70))
+    assert grid.tokens_near("hero", 5) == []
+    assert grid.occupants((51, 50)) == set()
+
+
+def test_reachable_respects_obstacles_and_difficult_terrain():
+    grid = TacticalGrid(10, 3)
+    for y in range(3):
+        grid.set_difficult((3, y))
+    grid.set_obstacle((1, 0))
+
+    cells = grid.reachable((0, 0), 30)
+    assert cells[(2, 0)] == 10
+    assert cells[(3, 0)] == 20                 # entering difficult terrain costs double
+    assert (5, 0) in cells and (6, 0) not in cells
+    assert (1, 0) not in cells
+    assert grid.reachable((0, 0), 30) is cells  # cached flood fill
+
+    grid.set_obstacle((1, 0), False)
+    assert grid.reachable((0, 0), 30) is not cells
+
+
+def test_reachable_for_blocks_hostiles_and_occupied_squares():
+    grid = TacticalGrid(5, 1)
+    grid.place("hero", (0, 0))
+    grid.place("ally", (1, 0))
+    grid.place("orc", (3, 0))
+
+    with_ally = grid.reachable_for("hero", 30, hostile_ids=["orc"])
+    assert (1, 0) not in with_ally     # can pass an ally but not stop on them
+    assert (2, 0) in with_ally
+    assert (4, 0) not in with_ally     # orc blocks the corridor
+
+
+def test_large_map_flood_fill_is_fast():
+    grid = TacticalGrid(100, 100)
+    for y in range(0, 100, 4):
+        grid.set_difficult((50, y))
+    start = time.perf_counter()
+    for x in range(20):
+        grid.reachable((x, x), 60)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_movement_validation_with_grid():
+    grid = TacticalGrid(5, 5)
+    grid.set_obstacle((1, 0))
+    grid.set_obstacle((1, 1))
+    assert validate_movement_range(1, 3, speed=2)
+    assert not validate_movement_range(1, 3, speed=2, grid=grid)
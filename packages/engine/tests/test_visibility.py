@@ -0,0 +1,157 @@
+"""
+Unit Tests — Fog of War (visibility.py)
+"""
+
+import time
+import numpy as np
+from PIL import Image
+
+from engine.visibility import VisibilityManager, VisibilityBitset, VisibilityRegistry, PARCHMENT_RGBA
+
+
+def _write_map(path, size):
+    Image.new("RGBA", size, (10, 20, 30, 255)).save(path)
+
+
+def test_apply_mask_reveals_explored_area(tmp_path):
+    vm = VisibilityManager(width=200, height=100)
+    vm.reveal_area(25, 50, radius_percent=10)
+    raw, out = tmp_path / "raw.png", tmp_path / "out.png"
+    _write_map(raw, (200, 100))
+
+    vm.apply_mask(raw, out)
+    pixels = np.asarray(Image.open(out))
+
+    assert tuple(pixels[50, 50]) == (10, 20, 30, 255)        # revealed centre
+    corner = pixels[5, 195]
+    assert abs(int(corner[0]) - PARCHMENT_RGBA[0]) <= 3       # unexplored parchment
+    assert corner[3] == 255
+
+
+def test_scaled_mask_cache_invalidated_on_reveal():
+    vm = VisibilityManager(width=200, height=100)
+    before = vm.mask_array((400, 200))
+    assert vm.mask_array((400, 200)) is before
+    vm.reveal_area(50, 50)
+    after = vm.mask_array((400, 200))
+    assert after is not before
+    assert after[100, 200] == 255
+
+
+def test_apply_mask_large_map_is_fast(tmp_path):
+    vm = VisibilityManager()
+    vm.reveal_area(50, 50)
+    raw, out = tmp_path / "raw.png", tmp_path / "out.png"
+    _write_map(raw, (2560, 1440))
+
+    vm.apply_mask(raw, out)  # warm caches
+    start = time.perf_counter()
+    vm.apply_mask(raw, out)
+    assert time.perf_counter() - start < 2.0
+
+
+def test_incremental_tiles_only_redraw_revealed_region(tmp_path):
+    vm = VisibilityManager(width=1280, height=720)
+    raw = tmp_path / "raw.png"
+    _write_map(raw, (1280, 720))
+
+    full = vm.apply_mask_tiles(raw, tmp_path / "tiles", "map_x")
+    assert len(full) == 5 * 3  # ceil(1280/256) x ceil(720/256)
+
+    since = vm.revision
+    vm.reveal_area(10, 10, radius_percent=2)
+    diff = vm.apply_mask_tiles(raw, tmp_path / "tiles", "map_x", since_revision=since)
+    assert [d["tile"] for d in diff] == [[0, 0]]
+
+    tile = np.asarray(Image.open(tmp_path / "tiles" / "map_x_0_0.png"))
+    assert tuple(tile[72, 128]) == (10, 20, 30, 255)
+
+
+def test_mask_tiles_round_trip(tmp_path):
+    vm = VisibilityManager(width=600, height=300)
+    vm.reveal_area(50, 50, radius_percent=5)
+    assert len(vm.save_mask_tiles(tmp_path)) == 3 * 2   # first save writes every tile
+
+    vm.reveal_area(5, 5, radius_percent=1)
+    assert vm.save_mask_tiles(tmp_path) == [(0, 0)]    # later saves only dirty tiles
+
+    restored = VisibilityManager(width=600, height=300)
+    assert restored.load_mask_tiles(tmp_path)
+    assert np.array_equal(np.asarray(restored.mask), np.asarray(vm.mask))
+
+
+def test_bitset_reveal_matches_circle():
+    bits = VisibilityBitset(101, 50)
+    bits.reveal_area(50, 50, 10)  # centre (50.5, 25), radius 10.1px
+    assert bits.is_revealed(50, 25)
+    assert not bits.is_revealed(0, 0)
+    assert not bits.is_revealed(50, 10)
+    # Padding bits past the right edge never get set
+    bits.reveal_area(100, 50, 10)
+    assert bits.count() == int(np.asarray(bits.to_image()).astype(bool).sum())
+
+
+def test_registry_party_views_and_round_trip():
+    registry = VisibilityRegistry(200, 100)
+    registry.reveal("a", 25, 50, 10)
+    registry.reveal("b", 35, 50, 10)
+
+    union = registry.party_view(["a", "b"])
+    both = registry.party_view(["a", "b"], mode="intersection")
+    assert both.count() < registry.get("a").count() < union.count()
+    assert union.is_revealed(50, 50) and union.is_revealed(70, 50)
+    assert both.is_revealed(60, 50) and not both.is_revealed(45, 50)
+
+    restored = VisibilityRegistry(200, 100)
+    restored.load_dict(registry.to_dict())
+    assert set(restored.masks) == {"a", "b"}
+    assert np.array_equal(restored.get("a").bits, registry.get("a").bits)
+
+
+def test_viewer_mask_composites_only_what_the_viewer_explored(tmp_path):
+    registry = VisibilityRegistry(200, 100)
+    registry.reveal("a", 25, 50, 10)
+    raw = tmp_path / "raw.png"
+    _write_map(raw, (400, 200))
+    vm = VisibilityManager(200, 100)  # World fog: nothing explored
+
+    vm.apply_mask(raw, tmp_path / "a.png", view=registry.view(["a"]))
+    vm.apply_mask(raw, tmp_path / "b.png", view=registry.view(["b"]))
+    vm.apply_mask(raw, tmp_path / "party.png", view=registry.view(["a", "b"]))
+    seen = lambda name: tuple(np.asarray(Image.open(tmp_path / name))[100, 100]) == (10, 20, 30, 255)
+    assert seen("a.png") and seen("party.png") and not seen("b.png")
+
+
+def test_viewer_mask_tiles_follow_the_viewers_reveals(tmp_path):
+    registry = VisibilityRegistry(1280, 720)
+    raw = tmp_path / "raw.png"
+    _write_map(raw, (1280, 720))
+    vm = VisibilityManager()
+
+    view = registry.view(["a"])
+    assert len(vm.apply_mask_tiles(raw, tmp_path / "tiles", "map_a", view=view)) == 5 * 3
+    registry.reveal("b", 90, 90, 5)  # Not a member: nothing to redraw
+    registry.reveal("a", 10, 10, 5)
+    diffs = vm.apply_mask_tiles(raw, tmp_path / "tiles", "map_a", since_revision=view.revision,
+                                view=registry.view(["a"]))
+    assert [d["tile"] for d in diffs] == [[0, 0]]
+
+    registry.load_dict(registry.to_dict())  # Masks replaced wholesale: full redraw
+    assert len(registry.dirty_tiles(["a"], (1280, 720), registry.revision - 1)) == 5 * 3
+
+
+def test_reveal_log_is_capped_and_trimmed(tmp_path):
+    vm = VisibilityManager(width=1280, height=720)
+    vm.reveal_log.limit = 8
+    for _ in range(20):
+        vm.reveal_area(10, 10, 1)
+    assert len(vm.reveal_log.entries) <= 8
+    # Older than what the log still holds: every tile is dirty
+    assert len(vm.dirty_tiles((1280, 720), 0)) == 5 * 3
+    assert vm.dirty_tiles((1280, 720), vm.revision - 1) == {(0, 0)}
+
+    vm.trim_reveal_log(vm.revision)
+    assert vm.reveal_log.entries  # Mask tiles not saved yet: still needed
+    vm.save_mask_tiles(tmp_path / "fog")
+    vm.trim_reveal_log(vm.revision)
+    assert vm.reveal_log.entries == [] and vm.dirty_tiles((1280, 720), vm.revision) == set()
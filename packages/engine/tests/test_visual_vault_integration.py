@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 import os
+import threading
 from src.engine.ai.visual_vault import VisualVaultClient
 
 @pytest.mark.asyncio
@@ -37,3 +38,55 @@ async def test_visual_vault_real_api_if_configured():
     desc = await client.generate_asset_description("staff_of_power", "a cracked obsidian staff")
     assert len(desc) > 0
     print(f"\n--- Real Visual Vault Description ---\n{desc}\n-----------------------------")
+
+def test_visual_vault_asset_key_is_stable(tmp_path):
+    """Asset keys must not depend on per-process hash randomization."""
+    client = VisualVaultClient(api_key=None, output_dir=str(tmp_path))
+    key = client.asset_key("Iron Sword", "looted item")
+    assert key == client.asset_key("iron_sword", "  Looted   Item ")
+    assert key != client.asset_key("iron_sword", "combat trophy")
+
+@pytest.mark.asyncio
+async def test_visual_vault_single_flight_and_index(tmp_path):
+    """Concurrent requests for one key render once; the index survives restarts."""
+    client = VisualVaultClient(api_key=None, output_dir=str(tmp_path))
+    client.is_mock = False
+    calls = []
+
+    async def fake_render(item_name, context):
+        calls.append(item_name)
+        await asyncio.sleep(0.01)
+        return b"\x89PNG fake"
+
+    client._render_image = fake_render
+    urls = await asyncio.gather(*[client.get_asset_url("iron_sword", "looted item") for _ in range(5)])
+    assert len(calls) == 1
+    assert len(set(urls)) == 1
+    assert urls[0].startswith("/assets/generated/iron_sword_")
+
+    # A fresh client (new process) serves the asset from the index
+    restarted = VisualVaultClient(api_key=None, output_dir=str(tmp_path))
+    restarted.is_mock = False
+    restarted._render_image = fake_render
+    assert await restarted.get_asset_url("Iron Sword", "looted item") == urls[0]
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_visual_vault_writes_off_the_event_loop(tmp_path):
+    """Image and index writes run in worker threads, not on the loop."""
+    client = VisualVaultClient(api_key=None, output_dir=str(tmp_path))
+    writers = []
+    write_image, save_index = client._write_image, client._save_index
+
+    def spy_image(*args):
+        writers.append(threading.current_thread())
+        write_image(*args)
+
+    def spy_index(*args):
+        writers.append(threading.current_thread())
+        save_index(*args)
+
+    client._write_image, client._save_index = spy_image, spy_index
+    url = await client._store("k1", "Bone Dagger", "looted item", b"\x89PNG fake")
+    assert len(writers) == 2 and threading.main_thread() not in writers
+    assert (tmp_path / url.rsplit("/", 1)[1]).exists()
@@ -65,3 +65,72 @@ def test_websocket_attack_flow():
         final_packet = next(r for r in responses if "attack_result" in r)["attack_result"]
         assert "hit" in final_packet
         assert "damage_total" in final_packet
+
+
+@pytest.fixture
+def aoe_session(monkeypatch):
+    from engine.routers import websocket as ws_router
+    from engine.spells import Spell
+    from engine.state import tracker, tactical_grid
+
+    shatter = Spell(
+        id="spell_shatter", name="Shatter", level=2, school="evocation", casting_time="1 action",
+        range="60 feet", components="V, S, M", duration="Instantaneous", description="",
+        is_save=True, save_stat="con", damage_dice_sides=8, damage_dice_count=3, damage_type="thunder",
+        aoe_radius=10, aoe_shape="sphere",
+    )
+    monkeypatch.setattr(ws_router, "get_spell", lambda spell_id: shatter)
+    monkeypatch.setattr(ws_router, "RATE_LIMIT_DELAY", 0)
+    tracker.combatants.clear()
+    tracker.has_started = False
+    tactical_grid.reset(tactical_grid.width, tactical_grid.height)
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/game/aoe_session?role=dm&dm_token=AG-DM-2026") as websocket:
+        assert websocket.receive_json()["type"] == "CONNECTION_ESTABLISHED"
+        positions = {}
+        for instance_id, is_player in (("hero", True), ("goblin_a", False), ("goblin_b", False)):
+            websocket.send_json({
+                "action": "add_combatant", "instance_id": instance_id, "name": instance_id,
+                "is_player": is_player, "hp_max": 40, "ac": 10,
+            })
+            update = websocket.receive_json()
+            assert update["type"] == "INITIATIVE_UPDATE"
+            positions = {c["id"]: c["position"] for c in update["combatants"]}
+        yield websocket, positions
+
+    tracker.combatants.clear()
+    tactical_grid.reset(tactical_grid.width, tactical_grid.height)
+
+
+def _cast(websocket, **fields):
+    websocket.send_json({"action": "cast_spell", "spell_id": "spell_shatter", "attacker_id": "hero", **fields})
+    hit = None
+    while True:
+        event = websocket.receive_json()
+        if event["type"] == "STATE_PATCH":
+            hit = {p["path"].split("/")[2] for p in event["patches"]}
+        elif event["type"] == "LOG" and hit is not None:
+            return hit  # The cast's summary closes it
+        else:
+            assert event["type"] == "NARRATIVE_CHUNK", event
+
+
+def test_aoe_spell_targets_come_from_the_grid(aoe_session):
+    websocket, positions = aoe_session
+    # Added combatants are placed: the hero on the west edge, monsters on the east
+    assert all(isinstance(cell, int) for cell in positions.values())
+    assert positions["hero"] != positions["goblin_a"]
+
+    # 10 ft burst on the first goblin also catches the one next to it, not the hero across the grid
+    assert _cast(websocket, target_cell=positions["goblin_a"]) == {"goblin_a", "goblin_b"}
+    assert _cast(websocket, target_id="goblin_b") == {"goblin_a", "goblin_b"}  # aim at the target's square
+
+
+def test_aoe_spell_falls_back_to_listed_targets_off_grid(aoe_session):
+    from engine.state import tactical_grid
+
+    websocket, _ = aoe_session
+    tactical_grid.reset(tactical_grid.width, tactical_grid.height)  # No positions to place a template
+    assert _cast(websocket, target_ids=["goblin_b"]) == {"goblin_b"}
+    assert _cast(websocket, target_id="goblin_a") == {"goblin_a"}
@@ -0,0 +1,82 @@
+"""
+Unit Tests — World graph store (world_store.py)
+"""
+
+import sqlite3
+import pytest
+from pydantic import ValidationError
+
+from engine.maps import MapNode, WORLD_GRAPH
+from engine.migrations import schema_version
+from engine.schemas import MapInteractionAction
+from engine.world_store import WorldStore
+
+
+@pytest.fixture
+def store():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    return WorldStore(lambda: conn)
+
+
+def _grid_nodes(n):
+    # n x n lattice, 4-connected, one Azgaar cell per node
+    nodes = []
+    for i in range(n):
+        for j in range(n):
+            conns = [f"n_{a}_{b}" for a, b in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1))
+                     if 0 <= a < n and 0 <= b < n]
+            nodes.append(MapNode(id=f"n_{i}_{j}", name=f"Node {i},{j}", type="wilderness",
+                                 coordinates={"x": i * 100 / n, "y": j * 100 / n},
+                                 description="", connections=conns, azgaar_cell_id=i * n + j))
+    return nodes
+
+
+def test_schema_comes_from_migrations(store):
+    db = store.db
+    assert schema_version(db) >= 9
+    tables = {r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"world_node", "world_edge"} <= tables
+    assert store.has_rtree == ("world_node_rtree" in tables)
+
+
+def test_seed_round_trip(store):
+    assert store.seed(WORLD_GRAPH.values())
+    assert not store.seed(WORLD_GRAPH.values())  # already populated
+    town = store.get("start_town")
+    assert town == WORLD_GRAPH["start_town"]
+    assert store.get_by_cell(3456).id == "sanguine_spire"
+
+
+def test_viewport_query_uses_spatial_index(store):
+    store.upsert_many(_grid_nodes(100))
+    assert store.count() == 10_000
+
+    nodes = store.in_bbox(10, 10, 12, 13)
+    assert {n.id for n in nodes} == {f"n_{i}_{j}" for i in (10, 11, 12) for j in (10, 11, 12, 13)}
+    assert all(len(n.connections) == 4 for n in nodes)
+    assert len(store.in_bbox(0, 0, 100, 100, limit=50)) == 50
+
+
+def test_viewport_payload_is_typed():
+    action = MapInteractionAction(action="map_interaction", character_id="p1", interaction_type="request_data",
+                                  viewport={"min_x": 10, "min_y": "10", "max_x": 12.5, "max_y": 13})
+    assert (action.viewport.min_y, action.viewport.max_x) == (10.0, 12.5)
+    with pytest.raises(ValidationError):
+        MapInteractionAction(action="map_interaction", character_id="p1", viewport={"min_x": 10})
+
+
+def test_incremental_updates(store):
+    store.upsert_many(_grid_nodes(3))
+    moved = store.get("n_0_0").model_copy(update={"coordinates": {"x": 90.0, "y": 90.0}})
+    store.upsert(moved)
+    assert "n_0_0" not in {n.id for n in store.in_bbox(0, 0, 10, 10)}
+    assert "n_0_0" in {n.id for n in store.in_bbox(85, 85, 95, 95)}
+
+    store.link("n_0_0", "n_2_2")
+    assert "n_2_2" in store.get("n_0_0").connections
+
+    store.remove("n_1_1")
+    assert store.get("n_1_1") is None
+    assert "n_1_1" not in store.get("n_0_1").connections
+    assert store.count() == 8
@@ -25,6 +25,11 @@ EN_DATA_DIR = ROOT / "external-sources" / "5e-database" / "src" / "2014"
 ES_DATA_DIR = ROOT / "external-sources" / "5e-database-spanish" / "src"
 DB_PATH = ROOT / "packages" / "engine" / "dungeon_cortex_dev.db"
 
+# Shared schema helpers (materialized SRD filter columns + indexes, search index)
+sys.path.insert(0, str(ROOT / "packages" / "engine" / "src"))
+from engine.migrations import ensure_srd_columns  # noqa: E402
+from engine.srd_search import rebuild_search_index  # noqa: E402
+
 # ── File → Type Mapping ───────────────────────────────────────
 # Maps the JSON filename stem to the `type` field in SrdMechanic.
 # We prefix the `index` with the type to create a unique SrdMechanic.id
@@ -94,22 +99,9 @@ def create_database():
         )
     """)
 
-    # FTS5 Virtual Table for Hybrid Search (Full-Text)
-    # We include id, type, content_en, and content_es for searching
-    cursor.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS srd_mechanic_fts USING fts5(
-            id UNINDEXED,
-            type,
-            content_en,
-            content_es,
-            tokenize='unicode61'
-        )
-    """)
-
-    # Index for fast type queries on the core table
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_srd_mechanic_type ON srd_mechanic(type)
-    """)
+    # Generated name/cr/level/rarity/school columns and their indexes
+    # (same definitions as engine migration 006)
+    ensure_srd_columns(conn)
 
     conn.commit()
     return conn
@@ -187,21 +179,6 @@ def ingest():
                 VALUES (?, ?, ?, ?)
             """, (mechanic_id, mechanic_type, data_json_str, data_es_str))
 
-            # Populate FTS table
-            # Extract names and descriptions for search
-            content_en = f"{item.get('name', '')} {item.get('desc', '') or ''}"
-            if isinstance(item.get('desc'), list):
-                content_en = f"{item.get('name', '')} {' '.join(item.get('desc', []))}"
-            
-            content_es = f"{es_item.get('name', '')} {es_item.get('desc', '') or ''}"
-            if isinstance(es_item.get('desc'), list):
-                content_es = f"{es_item.get('name', '')} {' '.join(es_item.get('desc', []))}"
-
-            cursor.execute("""
-                INSERT OR REPLACE INTO srd_mechanic_fts (id, type, content_en, content_es)
-                VALUES (?, ?, ?, ?)
-            """, (mechanic_id, mechanic_type, content_en, content_es))
-
             count += 1
 
         conn.commit()
@@ -213,6 +190,11 @@ def ingest():
         total_inserted += count
         total_es_matched += es_count
 
+    # FTS5 search index (weighted name/description columns, EN + ES)
+    indexed = rebuild_search_index(conn)
+    conn.commit()
+    print(f"  🔍 Search index     → {indexed:>4d} records")
+
     # Summary
     print()
     print("─" * 60)
@@ -1,7 +1,11 @@
 import sqlite3
+import sys
 import time
 from pathlib import Path
 
+sys.path.insert(0, "packages/engine/src")
+from engine.srd_search import search  # noqa: E402
+
 DB_PATH = Path("packages/engine/dungeon_cortex_dev.db")
 
 def benchmark():
@@ -34,7 +38,7 @@ def benchmark():
     # 3. Spanish Search Verification
     es_search = "Fuego"
     print(f"\n🇪🇸 Testing Spanish Search: '{es_search}'")
-    cursor.execute("SELECT id, content_es FROM srd_mechanic_fts WHERE content_es MATCH ?", (es_search,))
+    cursor.execute("SELECT id, content_es FROM srd_mechanic_fts WHERE srd_mechanic_fts MATCH ?", (f"{{name_es content_es}} : {es_search}",))
     es_results = cursor.fetchall()
     for rid, content in es_results[:3]:
         print(f"  ✅ Found: {rid}")
@@ -49,6 +53,18 @@ def benchmark():
     scoped_results = cursor.fetchall()
     print(f"  ✅ Found {len(scoped_results)} spells.")
 
+    # 5. Ranked Search (bm25 + facets + snippets, then cached)
+    for query in ("fire", "firebal", "Firebell"):
+        start_time = time.perf_counter()
+        found = search(query, limit=5, db=conn)
+        cold = (time.perf_counter() - start_time) * 1000
+        start_time = time.perf_counter()
+        search(query, limit=5, db=conn)
+        warm = (time.perf_counter() - start_time) * 1000
+        top = found["results"][0]["name"] if found["results"] else "-"
+        print(f"\n🏆 Ranked '{query}': {cold:.4f}ms cold / {warm:.4f}ms cached "
+              f"({found['total']} hits, top: {top}, fuzzy: {found['fuzzy']}, facets: {found['facets']['type']})")
+
     conn.close()
 
 if __name__ == "__main__":